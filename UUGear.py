@@ -101,9 +101,7 @@ class UUGearDevice(object):
         uugearlib.setShowLogs(show)
 
     def __init__(self, id):
-        print(type(id))
         asciiID = id.encode('ascii')
-        print(type(asciiID))
         uugearlib.setupUUGear()
         self.devProfile = uugearlib.attachUUGearDevice(asciiID)
 
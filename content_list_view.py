@@ -0,0 +1,45 @@
+from kivy.properties import ObjectProperty, StringProperty
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.image import Image
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+
+
+class ContentListView(RecycleView):
+    """
+    Shows the rows of a content list, recycling the row widgets of the
+    visible rows only.
+    """
+
+    content_list = ObjectProperty(None, allownone=True)
+
+    def __init__(self, **kwargs):
+        self.__content_list = None
+        super().__init__(**kwargs)
+
+    def on_content_list(self, instance, content_list):
+        """
+        Attaches the view's data to the content list, which applies all
+        further row changes to it, and detaches the previous content list.
+        :param instance: This view.
+        :param content_list: The content list to show.
+        :return:
+        """
+        if self.__content_list is not None:
+            self.__content_list.detach()
+        self.__content_list = content_list
+        if content_list is not None:
+            content_list.attach(self.data)
+
+
+class ContentRow(RecycleDataViewBehavior, BoxLayout):
+    """
+    A recycled row showing the icon and the name of a material.
+    """
+
+    image = StringProperty()
+    name = StringProperty()
+
+
+class ListItemImage(Image):
+    pass
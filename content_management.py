@@ -1,21 +1,23 @@
 import datetime
 
-from kivy.adapters.listadapter import ListAdapter
-from kivy.event import EventDispatcher
-from kivy.properties import ListProperty
-from kivy.uix.image import Image
-from kivy.uix.listview import CompositeListItem, ListItemLabel
-from kivy.uix.selectableview import SelectableView
+from service.content_list import ContentList
+from service.events import HEADLESS, Clock, EventDispatcher, ListProperty, \
+    ObjectProperty
+from service.icon_atlas import icon_atlas
+from service.weight_estimator import WeightEstimator
+from weekday_index import WeekdayIndex
 
-from service.informer import Informer
-from tag_registration import TagRegistration
+if HEADLESS:
+    from service.console_informer import ConsoleInformer as Informer
+else:
+    from service.informer import Informer
 
 
 class ContentManagement(EventDispatcher):
     """
     Manages the school bag content.
 
-    Checks for new rfid tags, updates the current configuration and
+    Applies the rfid tag reads, updates the current configuration and
     compares the current configuration with the configured configuration
     for the current day.
     """
@@ -32,66 +34,173 @@ class ContentManagement(EventDispatcher):
     target_content = ListProperty()
     content_to_insert = ListProperty()
     content_to_remove = ListProperty()
+    load_estimate = ObjectProperty(None, allownone=True)
 
-    def __init__(self, settings, *args, **kwargs):
+    def __init__(self, settings, *args, history=None,
+                 load_settle_time: float = 2., **kwargs):
         """
-        Saves a reference to the settings and sets up the rfid reader.
+        Saves a reference to the settings. The tag reads are passed to
+        apply_tag_events by the profile manager, which shares the reader
+        between the profiles.
         :param settings: The settings object to read from.
+        :param history: The packing history to log the packing in or None.
+        :param load_settle_time: The time in seconds the measured load has to
+        stay unchanged before it is compared with the current content.
         """
         super().__init__(*args, **kwargs)
         self.__settings = settings
-        self.__settings.bind(
-            current_content=self.update_content_lists,
-            tags=self.update_content_lists)
+        self.__history = history
+        self.__settings.bind(on_change=self.__on_settings_changed)
         self.__updated_content = False
-        self.target_content = self.__determine_today_s_target_content()
 
-        self.__tag_registration = TagRegistration(
-            self.__update_current_configuration)
-        self.__tag_registration.start_tag_reading()
+        # The headless mode shows no icons and skips loading the atlas.
+        self.__icon_atlas = None if HEADLESS else icon_atlas()
+        self.__unknown_tag_row = {
+            'image': self.__image_source('default_image'),
+            'name': 'Unbekanntes Material'
+        }
+
+        self.__tag_registry = settings.tag_registry
+        self.__weekday_index = WeekdayIndex(self.__tag_registry)
+        self.__weight_estimator = WeightEstimator(
+            self.__tag_registry, empty_weight=settings.bag_weight)
+        self.__settled_load = None
+        self.__is_put_on = False
+        self.__settled_load_check = Clock.create_trigger(
+            self.__check_settled_load, load_settle_time)
+        self.__tag_rows = {}
+        for uid, tag in self.__tag_registry.items():
+            self.__on_tag_added(self.__tag_registry, uid, tag)
+        self.__determine_today_s_target_content()
+        self.__day_rollover = None
+        self.__is_suspended = False
+        self.__schedule_day_rollover()
+        self.__tag_registry.bind(
+            on_tag_added=self.__on_tag_added,
+            on_tag_removed=self.__on_tag_removed,
+            on_tag_changed=self.__on_tag_changed)
 
-        self.__initialize_content_adapter()
+        self.__initialize_content_lists()
 
     def __del__(self):
         """
-        Stops the tag reader.
+        Logs the packing state and cancels the clock events.
         :return:
         """
-        self.__tag_registration.stop_tag_reading()
+        self.suspend()
+        self.__history = None
 
-    def __determine_today_s_target_content(self):
+    def suspend(self):
         """
-        Returns a list of tags which are needed for the current weekday.
-        :return: The target content tag list.
+        Logs the packing state of the day and cancels the clock events while
+        the profile is inactive.
+        :return:
         """
-        now = datetime.datetime.now()
-        self.current_day = self.WEEKDAY[now.weekday()]
+        if self.__is_suspended:
+            return
+        self.__is_suspended = True
+        self.on_schoolbag_put_down()
+        self.__day_rollover.cancel()
+        self.__close_day()
 
-        return [
-            tag for tag in self.__settings.tags
-            if self.current_day in self.__settings.tags[tag]
-            and self.__settings.tags[tag][self.current_day] == "1"]
+    def resume(self):
+        """
+        Catches up with a day change while the profile was inactive and
+        schedules the next day rollover.
+        :return:
+        """
+        if not self.__is_suspended:
+            return
+        self.__is_suspended = False
+        if datetime.date.today() != self.__date:
+            self.__determine_today_s_target_content()
+            self.update_content_lists(
+                self.__settings, self.__settings.current_content)
+        self.__schedule_day_rollover()
 
-    def __update_current_configuration(self, tag):
+    def check_load(self, load):
         """
-        Adds the given uid to the current configuration if it does not contains
-        the uid, else removes the uid from the current configuration.
-        :param tag: The tag uid to look for.
+        Compares the measured load with the expected weight of the current
+        content and points out unscanned, superfluous or untagged items once
+        the load did not change for the settle time, so the items still
+        being packed are not reported. Loads measured while the bag is put
+        down are not compared, as the sensors carry no weight then; to be
+        called on the main thread.
+        :param load: The measured load in grams.
         :return:
         """
-        if tag not in self.__settings.tags:
+        self.__settled_load = load
+        self.__settled_load_check.cancel()
+        if self.__is_put_on:
+            self.__settled_load_check()
+
+    def on_schoolbag_put_on(self):
+        """
+        Starts comparing the measured load once it settled.
+        :return:
+        """
+        self.__is_put_on = True
+        if self.__settled_load is not None:
+            self.__settled_load_check.cancel()
+            self.__settled_load_check()
+
+    def on_schoolbag_put_down(self):
+        """
+        Stops comparing the measured load and drops a pending comparison.
+        :return:
+        """
+        self.__is_put_on = False
+        self.__settled_load_check.cancel()
+
+    def __check_settled_load(self, dt):
+        if not self.__is_put_on \
+                or not self.__weight_estimator.has_weights():
+            return
+
+        self.load_estimate = self.__weight_estimator.estimate(
+            self.__settled_load, self.__settings.current_content,
+            self.content_to_insert_list.uids)
+        if self.load_estimate.unweighed:
+            return
+
+        if self.load_estimate.missing:
             Informer.show_popup(
                 'Tasche packen',
-                'Neues Schumaterial erkannt.\n'
+                'Nicht gescanntes Material in der Tasche?\n%s'
+                % self.__material_names(self.load_estimate.missing))
+        elif self.load_estimate.superfluous:
+            Informer.show_popup(
+                'Tasche packen',
+                'Gescanntes Material fehlt in der Tasche?\n%s'
+                % self.__material_names(self.load_estimate.superfluous))
+        elif abs(self.load_estimate.unexplained) \
+                > self.__weight_estimator.tolerance:
+            Informer.show_popup(
+                'Tasche packen',
+                'Unbekanntes Material in der Tasche?\n'
                 'Bitte zuerst in der App registrieren. :)')
-            self.__settings.register_new_tag(tag)
 
-        if tag in self.__settings.current_content:
-            self.__settings.current_content.remove(tag)
-        else:
-            self.__settings.current_content.append(tag)
+    def __material_names(self, uids):
+        return ', '.join(self.__tag_row(uid)['name'] for uid in uids)
+
+    def apply_tag_events(self, events):
+        """
+        Toggles the read tags in the current content as a single settings
+        transaction; the content journal persists each change.
+        :param events: The list of tag events.
+        :return:
+        """
+        inserted = []
+        removed = []
+        with self.__settings.transaction():
+            for event in events:
+                if self.__update_current_configuration(event.uid):
+                    inserted.append(event.uid)
+                else:
+                    removed.append(event.uid)
 
-        self.__settings.save()
+        if self.__history is not None:
+            self.__history.record_changes(inserted, removed)
 
         if self.content_to_insert or self.content_to_remove:
             return
@@ -100,34 +209,119 @@ class ContentManagement(EventDispatcher):
             'Tasche packen',
             'Die Tasche ist richtig gepackt, es kann losgehen. :)')
 
-    def __initialize_content_adapter(self):
+    def __determine_today_s_target_content(self):
+        """
+        Looks up the tags which are needed for the current weekday in the
+        weekday index.
+        :return:
+        """
+        now = datetime.datetime.now()
+        self.__date = now.date()
+        self.__weekday = now.weekday()
+        self.current_day = self.WEEKDAY[self.__weekday]
+        self.__target_tags = self.__weekday_index.tags_for(self.__weekday)
+        self.target_content = list(self.__target_tags)
+
+    def __schedule_day_rollover(self):
         """
-        Initializes the list view adapters for the insert and remove content
-        lists.
+        Schedules the switch to the next day's target content at midnight.
         :return:
         """
-        self.__data_converter = lambda row, item: {
-            'orientation': 'horizontal',
-            'cls_dicts': [
-                {'cls': ListItemImage, 'kwargs': {'source': item['image']}},
-                {'cls': ListItemLabel, 'kwargs': {'text': item['name']}}
-            ]
+        now = datetime.datetime.now()
+        midnight = datetime.datetime.combine(
+            now.date() + datetime.timedelta(days=1), datetime.time())
+        self.__day_rollover = Clock.schedule_once(
+            self.__on_day_rollover, (midnight - now).total_seconds())
+
+    def __on_day_rollover(self, dt):
+        """
+        Switches to the target content of the new day and refreshes the
+        content lists.
+        :param dt: The time elapsed since the rollover was scheduled.
+        :return:
+        """
+        self.__close_day()
+        self.__determine_today_s_target_content()
+        self.update_content_lists(self.__settings, self.__settings.tags)
+        self.__schedule_day_rollover()
+
+    def __close_day(self):
+        """
+        Logs the packing state of the current day in the packing history.
+        :return:
+        """
+        if self.__history is None:
+            return
+        self.__history.close_day(
+            self.__date, self.__target_tags, self.content_to_insert_list.uids,
+            self.content_to_remove_list.uids)
+
+    def __on_tag_added(self, registry, uid, tag):
+        """
+        Adds the list row of a newly registered tag.
+        """
+        self.__tag_rows[uid] = {
+            'image': self.__image_source(tag.image_name),
+            'name': tag.material_name
         }
 
-        self.current_content_adapter = ListAdapter(
-            data=self.__settings.current_content,
-            args_converter=self.__data_converter,
-            cls=CompositeListItem)
+    def __on_tag_removed(self, registry, uid, tag):
+        self.__tag_rows.pop(uid, None)
+
+    def __on_tag_changed(self, registry, uid, old_tag, new_tag):
+        """
+        Replaces the list row of a changed tag in every list showing it.
+        """
+        self.__on_tag_added(registry, uid, new_tag)
+        for content_list in (self.current_content_list,
+                             self.content_to_insert_list,
+                             self.content_to_remove_list):
+            content_list.refresh(uid)
+
+    def __on_settings_changed(self, settings, changed_names):
+        """
+        Refreshes the target content and the content lists once per settings
+        change notification.
+        :param settings: The changed settings.
+        :param changed_names: The set of changed property names.
+        :return:
+        """
+        if 'bag_weight' in changed_names:
+            self.__weight_estimator.empty_weight = settings.bag_weight
+        if 'tags' in changed_names:
+            self.target_content = list(self.__target_tags)
+        if 'tags' in changed_names or 'current_content' in changed_names:
+            self.update_content_lists(settings, settings.current_content)
+
+    def __update_current_configuration(self, tag):
+        """
+        Adds the given uid to the current configuration if it does not contains
+        the uid, else removes the uid from the current configuration.
+        :param tag: The tag uid to look for.
+        :return: True if the uid was added, else False.
+        """
+        if tag not in self.__settings.tags:
+            Informer.show_popup(
+                'Tasche packen',
+                'Neues Schumaterial erkannt.\n'
+                'Bitte zuerst in der App registrieren. :)')
+            self.__settings.register_new_tag(tag)
 
-        self.content_to_insert_adapter = ListAdapter(
-            data=self.content_to_insert,
-            args_converter=self.__data_converter,
-            cls=CompositeListItem)
+        if tag in self.__settings.current_content:
+            self.__settings.current_content.remove(tag)
+            return False
+        self.__settings.current_content.append(tag)
+        return True
 
-        self.content_to_remove_adapter = ListAdapter(
-            data=self.content_to_remove,
-            args_converter=self.__data_converter,
-            cls=CompositeListItem)
+    def __initialize_content_lists(self):
+        """
+        Initializes the rows of the current, insert and remove content lists,
+        which the content list views attach to.
+        :return:
+        """
+        self.current_content_list = ContentList(self.__tag_row)
+        self.content_to_insert_list = ContentList(self.__tag_row)
+        self.content_to_remove_list = ContentList(self.__tag_row)
 
         self.update_content_lists(self.__settings, self.__settings.current_content)
 
@@ -135,48 +329,41 @@ class ContentManagement(EventDispatcher):
         """
         Compares the target content list with the current content list to fill
         the insert and the remove content list.
+
+        Only the rows which joined or left a list are inserted or removed, so
+        unchanged lists dispatch nothing.
         :param instance: The calling settings.
         :param value: Updated setting property.
         :return:
         """
         assert(instance == self.__settings)
 
-        self.target_content = self.__determine_today_s_target_content()
-        self.__settings.current_content = set(self.__settings.current_content)\
-            .intersection(self.__settings.tags.keys())
-
-        self.__update_tag_list_adapter(
-            self.current_content_adapter,
-            self.__settings.current_content)
-
-        self.content_to_insert = set(self.target_content)\
-            .difference(self.__settings.current_content)
-        self.__update_tag_list_adapter(
-            self.content_to_insert_adapter,
-            self.content_to_insert)
-
-        self.content_to_remove = set(self.__settings.current_content)\
-            .difference(self.target_content)
-        self.__update_tag_list_adapter(
-            self.content_to_remove_adapter,
-            self.content_to_remove)
-
-    def __update_tag_list_adapter(self, adapter: ListAdapter, tags):
-        adapter.data = [
-            {
-                'image': 'icons/default_image.png',
-                'name': 'Unbekanntes Material'
-            }
-            if tag not in self.__settings.tags else
-            {
-                'image': 'icons/%s.png' % self.__settings.tags[tag]['imgName'],
-                'name': self.__settings.tags[tag]['materialName']
-            }
-            for tag in tags
-        ]
-        adapter.data.prop.dispatch(adapter.data.obj())
-
-
-class ListItemImage(SelectableView, Image):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
+        known_content = [uid for uid in self.__settings.current_content
+                         if uid in self.__settings.tags]
+        if len(known_content) != len(self.__settings.current_content):
+            # The assignment dispatches on_change, which refreshes the lists.
+            self.__settings.current_content = known_content
+            return
+
+        current_content = self.__settings.current_content
+        current_tags = set(current_content)
+        self.current_content_list.update(current_content)
+
+        if self.content_to_insert_list.update(
+                [uid for uid in self.__target_tags
+                 if uid not in current_tags]):
+            self.content_to_insert = self.content_to_insert_list.uids
+
+        if self.content_to_remove_list.update(
+                [uid for uid in current_content
+                 if uid not in self.__target_tags]):
+            self.content_to_remove = self.content_to_remove_list.uids
+
+    def __tag_row(self, uid):
+        return self.__tag_rows.get(uid, self.__unknown_tag_row)
+
+    def __image_source(self, image_name):
+        if self.__icon_atlas is None:
+            return ''
+        return self.__icon_atlas.source(image_name)
+
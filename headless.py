@@ -0,0 +1,98 @@
+from service.startup_profiler import is_profile_enabled, startup_profiler
+
+import os
+
+# Created ahead of the other imports, so their import times are recorded.
+startup_profiler()
+# Selects the headless event system before any module imports it.
+os.environ['SCHOOLBAG_HEADLESS'] = '1'
+
+import argparse
+import signal
+
+from service.events import Clock
+from service.hardware_startup import STATE_READY, STATE_FAILED
+from station import Station
+
+# The time in seconds to wait for the hardware before exiting after startup.
+HARDWARE_TIMEOUT = 10.
+
+
+class SchoolBagDaemon:
+    """
+    Program entry point of the headless mode, which runs the tag readers,
+    the weight measurement, the manual control and the led stripe without
+    loading Kivy and the graphical user interface.
+    """
+
+    def __init__(self, use_database=None):
+        """
+        :param use_database: True to store the settings in a database; taken
+        from the environment if None.
+        """
+        with startup_profiler().measure('Station'):
+            self.__station = Station(
+                self.__on_hardware_state_changed, use_database)
+        self.__exit_after_startup = False
+
+    def run(self, exit_after_startup=False):
+        """
+        Starts the hardware subsystems and runs the clock until stop is
+        called.
+        :param exit_after_startup: True to stop once the hardware subsystems
+        finished their initialization, e.g. to profile the startup.
+        :return:
+        """
+        self.__exit_after_startup = exit_after_startup
+        self.__station.start()
+        Clock.schedule_once(self.__on_first_frame)
+
+        try:
+            Clock.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.__station.stop()
+
+    def stop(self, *args):
+        Clock.stop()
+
+    def __on_first_frame(self, dt):
+        startup_profiler().mark('firstFrame')
+        if self.__exit_after_startup:
+            self.__station.hardware.wait(HARDWARE_TIMEOUT)
+            # Runs the state changes the hardware threads queued meanwhile,
+            # which the clock drops once it is stopped.
+            Clock.tick()
+            self.stop()
+        if self.__exit_after_startup or is_profile_enabled():
+            startup_profiler().print_report(
+                'headless', self.__station.hardware.statistics())
+
+    def __on_hardware_state_changed(self, name, state):
+        values = self.__station.hardware.statistics()[name]
+        if state not in (STATE_READY, STATE_FAILED):
+            print('[SchoolBagDaemon] %s: %s' % (name, state))
+        elif values['error'] is None:
+            print('[SchoolBagDaemon] %s: %s after %.2f s'
+                  % (name, state, values['duration']))
+        else:
+            print('[SchoolBagDaemon] %s: %s after %.2f s. %s'
+                  % (name, state, values['duration'], values['error']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Runs the school bag without the graphical user '
+                    'interface.')
+    parser.add_argument('--exit-after-startup', action='store_true',
+                        help='stop after the startup, e.g. to measure it')
+    parser.add_argument('--settings-database', action='store_true',
+                        default=None,
+                        help='store the settings in a SQLite database and '
+                             'keep the json file as export')
+    args = parser.parse_args()
+
+    daemon = SchoolBagDaemon(args.settings_database)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    daemon.run(args.exit_after_startup)
@@ -69,9 +69,7 @@ class LedStripeController:
         self.__stripe.begin()
 
         self.__settings = settings
-        self.__settings.bind(
-            lighting_mode=self.set_mode,
-            animation_type=self.set_animation)
+        self.__settings.bind(on_change=self.__on_settings_changed)
 
         self.__mode_initializer = {
             MODE_OFF: self.set_mode_off,
@@ -154,6 +152,34 @@ class LedStripeController:
         index = index + 1 if index < len(ANIMATION_TYPES) - 1 else 0
         self.__settings.animation_type = ANIMATION_TYPES[index]
 
+    def set_settings(self, settings):
+        """
+        Follows the lighting settings of another profile and applies its
+        animation type and lighting mode.
+        :param settings: The settings which handles the lighting mode.
+        :return:
+        """
+        if settings is self.__settings:
+            return
+
+        self.__settings.unbind(on_change=self.__on_settings_changed)
+        self.__settings = settings
+        self.__settings.bind(on_change=self.__on_settings_changed)
+        self.__on_settings_changed(
+            settings, {'animation_type', 'lighting_mode'})
+
+    def __on_settings_changed(self, instance, changed_names):
+        """
+        Applies a changed animation type and lighting mode at once.
+        :param instance: The calling event instance.
+        :param changed_names: The set of changed property names.
+        :return:
+        """
+        if 'animation_type' in changed_names:
+            self.set_animation(instance, self.__settings.animation_type)
+        if 'lighting_mode' in changed_names:
+            self.set_mode(instance, self.__settings.lighting_mode)
+
     def set_mode(self, instance, mode):
         """
         Sets the lighting mode and starts any action if needed.
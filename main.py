@@ -1,35 +1,77 @@
+from service.startup_profiler import is_profile_enabled, startup_profiler
+
+# Created ahead of the other imports, so their import times are recorded.
+startup_profiler()
+
 from kivy.app import App
+from kivy.clock import Clock
+from kivy.properties import ObjectProperty, StringProperty
 from kivy.uix.tabbedpanel import TabbedPanel
 
-from content_management import ContentManagement
-from led_stripe_controller import LedStripeController
-from settings import Settings
-from weight_measurement import WeightMeasurement
-from manual_control import  ManualControl
+# Registers the list view classes used by the kv file.
+import content_list_view  # noqa: F401
+from service.hardware_startup import STATE_PENDING, STATE_STARTING, \
+    STATE_READY, STATE_FAILED
+from station import Station
 
 
 class Management(TabbedPanel):
     """
     Base management class for all business logic.
+
+    The settings and the content management are the ones of the active
+    profile. The user interface is shown right away while the station
+    initializes the hardware subsystems in the background.
     """
-    settings = Settings()
-    content_management = ContentManagement(settings)
-    led_stripe_controller = LedStripeController(settings)
-    weight_measurement = WeightMeasurement(
-        settings,
-        led_stripe_controller.on_schoolbag_put_on,
-        led_stripe_controller.on_schoolbag_put_down)
-    manual_control = ManualControl(
-        led_stripe_controller.on_toggle_lighting_state,
-        led_stripe_controller.on_set_next_animation)
+    settings = ObjectProperty(None)
+    content_management = ObjectProperty(None)
+    hardware_status = StringProperty()
+
+    HARDWARE_STATE_NAMES = {
+        STATE_PENDING: 'wartet',
+        STATE_STARTING: 'startet',
+        STATE_READY: 'bereit',
+        STATE_FAILED: 'Fehler'
+    }
 
     def __init__(self):
-        super().__init__()
+        self.station = Station(self.__on_hardware_state_changed)
+        self.profile_manager = self.station.profile_manager
+        super().__init__(
+            settings=self.profile_manager.settings,
+            content_management=self.profile_manager.content_management)
+        self.profile_manager.bind(active_profile=self.__on_active_profile)
+        self.station.start()
 
     def __del__(self):
-        self.content_management.__del__()
-        self.led_stripe_controller.__del__()
-        self.weight_measurement.__del__()
+        self.station.stop()
+
+    def __on_hardware_state_changed(self, name, state):
+        """
+        Shows the state and initialization time of each hardware subsystem.
+        :param name: The name of the changed subsystem.
+        :param state: The new state.
+        :return:
+        """
+        statuses = []
+        for subsystem_name, values in \
+                self.station.hardware.statistics().items():
+            status = '%s: %s' % (
+                subsystem_name, self.HARDWARE_STATE_NAMES[values['state']])
+            if values['duration'] is not None:
+                status += ' (%.2f s)' % values['duration']
+            statuses.append(status)
+        self.hardware_status = '\n'.join(statuses)
+
+    def __on_active_profile(self, profile_manager, profile):
+        """
+        Shows the settings and content of the newly active profile.
+        :param profile_manager: The profile manager.
+        :param profile: The active profile.
+        :return:
+        """
+        self.settings = profile.settings
+        self.content_management = profile.content_management
 
 
 class SchoolBagApp(App):
@@ -39,9 +81,19 @@ class SchoolBagApp(App):
     """
 
     def build(self):
-        self.__management = Management()
+        with startup_profiler().measure('Management'):
+            self.__management = Management()
         return self.__management
 
+    def on_start(self):
+        Clock.schedule_once(self.__on_first_frame)
+
+    def __on_first_frame(self, dt):
+        startup_profiler().mark('firstFrame')
+        if is_profile_enabled():
+            startup_profiler().print_report(
+                'gui', self.__management.station.hardware.statistics())
+
     def on_stop(self):
         self.__management.__del__()
 
@@ -2,9 +2,41 @@
 # -*- coding: utf8 -*-
 
 import RPi.GPIO as GPIO
-import spi
+import spidev
 import signal
 import time
+
+def _build_crc_a_table():
+  # ISO/IEC 14443-3 CRC_A: polynomial x^16 + x^12 + x^5 + 1, processed
+  # LSB first (reflected polynomial 0x8408).
+  table = []
+  i = 0
+  while i < 256:
+    crc = i
+    j = 0
+    while j < 8:
+      if crc & 0x0001:
+        crc = (crc >> 1) ^ 0x8408
+      else:
+        crc = crc >> 1
+      j = j + 1
+    table.append(crc)
+    i = i + 1
+  return table
+
+CRC_A_TABLE = _build_crc_a_table()
+CRC_A_PRESET = 0x6363
+
+def crc_a(data):
+  """
+  Computes the ISO/IEC 14443-A CRC of the given bytes on the host.
+  :param data: The bytes to protect.
+  :return: The CRC as [low byte, high byte], the order in which it is sent.
+  """
+  crc = CRC_A_PRESET
+  for byte in data:
+    crc = (crc >> 8) ^ CRC_A_TABLE[(crc ^ byte) & 0xFF]
+  return [crc & 0xFF, (crc >> 8) & 0xFF]
   
 class MFRC522:
   NRSTPD = 22
@@ -105,10 +137,34 @@ class MFRC522:
   Reserved33      = 0x3E
   Reserved34      = 0x3F
     
+  # Registers whose content is changed by the chip itself (interrupt and
+  # status flags, FIFO, receive results, timer and CRC output) or whose bits
+  # clear themselves. They are always read from the hardware.
+  VOLATILE_REGISTERS = frozenset([
+    CommandReg, CommIrqReg, DivIrqReg, ErrorReg, Status1Reg, Status2Reg,
+    FIFODataReg, FIFOLevelReg, WaterLevelReg, ControlReg, CollReg,
+    CRCResultRegM, CRCResultRegL, TCounterValueRegH, TCounterValueRegL,
+    TestPinValueReg, TestBusReg, AutoTestReg, VersionReg, AnalogTestReg,
+    TestADCReg])
+
   serNum = []
+
+  # One open SPI handle per (bus, device). Each device node drives its own
+  # chip select line, so the handles of several readers stay open side by
+  # side and switching between the readers needs no reopening.
+  openDevices = {}
   
-  def __init__(self, dev='/dev/spidev0.0', spd=1000000):
-    spi.openSPI(device=dev,speed=spd)
+  def __init__(self, dev='/dev/spidev0.0', spd=1000000, host_crc=True):
+    self.dev = dev
+    self.spd = spd
+    self.requestIrq = (0x77, 0x30)
+    # Computing the CRC on the host saves the FIFO transfer and the polling
+    # of the chip's CRC coprocessor on every select, read and write.
+    self.host_crc = host_crc
+    # Write-through shadow of the configuration registers, so bit mask
+    # updates on them need a single SPI transfer.
+    self.registerCache = {}
+    self.SelectSPI()
     GPIO.setmode(GPIO.BOARD)
     GPIO.setup(22, GPIO.OUT)
     GPIO.output(self.NRSTPD, 1)
@@ -116,12 +172,31 @@ class MFRC522:
   
   def MFRC522_Reset(self):
     self.Write_MFRC522(self.CommandReg, self.PCD_RESETPHASE)
+    # A soft reset restores the register defaults behind the cache's back.
+    self.registerCache.clear()
   
+  def SelectSPI(self):
+    bus, device = self.dev.rsplit('spidev', 1)[1].split('.')
+    key = (int(bus), int(device))
+    if key not in self.openDevices:
+      handle = spidev.SpiDev()
+      handle.open(*key)
+      handle.max_speed_hz = self.spd
+      self.openDevices[key] = handle
+    self.spi = self.openDevices[key]
+
   def Write_MFRC522(self, addr, val):
-    spi.transfer(((addr<<1)&0x7E,val))
+    val = val & 0xFF
+    self.spi.xfer2([(addr<<1)&0x7E,val])
+    if addr not in self.VOLATILE_REGISTERS:
+      self.registerCache[addr] = val
   
   def Read_MFRC522(self, addr):
-    val = spi.transfer((((addr<<1)&0x7E) | 0x80,0))
+    if addr in self.registerCache:
+      return self.registerCache[addr]
+    val = self.spi.xfer2([((addr<<1)&0x7E) | 0x80,0])
+    if addr not in self.VOLATILE_REGISTERS:
+      self.registerCache[addr] = val[1]
     return val[1]
   
   def SetBitMask(self, reg, mask):
@@ -131,6 +206,9 @@ class MFRC522:
   def ClearBitMask(self, reg, mask):
     tmp = self.Read_MFRC522(reg);
     self.Write_MFRC522(reg, tmp & (~mask))
+
+  def InvalidateRegisterCache(self):
+    self.registerCache.clear()
   
   def AntennaOn(self):
     temp = self.Read_MFRC522(self.TxControlReg)
@@ -141,13 +219,12 @@ class MFRC522:
     self.ClearBitMask(self.TxControlReg, 0x03)
   
   def MFRC522_ToCard(self,command,sendData):
-    backData = []
-    backLen = 0
-    status = self.MI_ERR
+    (irqEn,waitIRq) = self.MFRC522_ToCardStart(command,sendData)
+    return self.MFRC522_ToCardFinish(command,irqEn,waitIRq)
+
+  def MFRC522_ToCardStart(self,command,sendData):
     irqEn = 0x00
     waitIRq = 0x00
-    lastBits = None
-    n = 0
     i = 0
     
     if command == self.PCD_AUTHENT:
@@ -171,6 +248,17 @@ class MFRC522:
       
     if command == self.PCD_TRANSCEIVE:
       self.SetBitMask(self.BitFramingReg, 0x80)
+
+    return (irqEn,waitIRq)
+
+  def MFRC522_ToCardFinish(self,command,irqEn,waitIRq,stopOnTimeout=False):
+    # With stopOnTimeout the polling also ends on the timer interrupt, which
+    # the chip raises when no card answered.
+    backData = []
+    backLen = 0
+    status = self.MI_ERR
+    lastBits = None
+    n = 0
     
     i = 2000
     while True:
@@ -178,6 +266,8 @@ class MFRC522:
       i = i - 1
       if ~((i!=0) and ~(n&0x01) and ~(n&waitIRq)):
         break
+      if stopOnTimeout and (n&irqEn&0x01):
+        break
     
     self.ClearBitMask(self.BitFramingReg, 0x80)
   
@@ -227,6 +317,23 @@ class MFRC522:
     return (status,backBits)
   
   
+  def MFRC522_RequestStart(self, reqMode):
+    # Sends the request without waiting for the answer, so the RF timeouts
+    # of several readers on the same bus overlap.
+    self.Write_MFRC522(self.BitFramingReg, 0x07)
+    self.requestIrq = self.MFRC522_ToCardStart(self.PCD_TRANSCEIVE, [reqMode])
+
+  def MFRC522_RequestFinish(self):
+    (irqEn,waitIRq) = self.requestIrq
+    (status,backData,backBits) = self.MFRC522_ToCardFinish(
+      self.PCD_TRANSCEIVE, irqEn, waitIRq, stopOnTimeout=True)
+
+    if ((status != self.MI_OK) | (backBits != 0x10)):
+      status = self.MI_ERR
+
+    return (status,backBits)
+  
+  
   def MFRC522_Anticoll(self):
     backData = []
     serNumCheck = 0
@@ -254,6 +361,11 @@ class MFRC522:
     return (status,backData)
   
   def CalulateCRC(self, pIndata):
+    if self.host_crc:
+      return crc_a(pIndata)
+    return self.CalulateCRC_Coprocessor(pIndata)
+
+  def CalulateCRC_Coprocessor(self, pIndata):
     self.ClearBitMask(self.DivIrqReg, 0x04)
     self.SetBitMask(self.FIFOLevelReg, 0x80);
     i = 0
@@ -272,6 +384,10 @@ class MFRC522:
     pOutData.append(self.Read_MFRC522(self.CRCResultRegM))
     return pOutData
   
+  def MFRC522_CheckCRC(self, pIndata):
+    # Cross-checks the host CRC against the chip's coprocessor.
+    return crc_a(pIndata) == self.CalulateCRC_Coprocessor(pIndata)
+
   def MFRC522_SelectTag(self, serNum):
     backData = []
     buf = []
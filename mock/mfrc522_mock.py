@@ -4,8 +4,9 @@ class MFRC522:
     MI_OK = True
     MI_NOT_OK = False
 
-    def __init__(self, dev='/dev/spidev0.0', spd=1000000):
-        pass
+    def __init__(self, dev='/dev/spidev0.0', spd=1000000, host_crc=True):
+        self.dev = dev
+        self.host_crc = host_crc
 
     def MFRC522_Reset(self):
         pass
@@ -22,6 +23,9 @@ class MFRC522:
     def ClearBitMask(self, reg, mask):
         pass
 
+    def InvalidateRegisterCache(self):
+        pass
+
     def AntennaOn(self):
         pass
 
@@ -34,6 +38,12 @@ class MFRC522:
     def MFRC522_Request(self, reqMode):
         return self.MI_NOT_OK, 0
 
+    def MFRC522_RequestStart(self, reqMode):
+        pass
+
+    def MFRC522_RequestFinish(self):
+        return self.MI_NOT_OK, 0
+
     def MFRC522_Anticoll(self):
         return self.MI_OK, 0
 
@@ -41,6 +51,13 @@ class MFRC522:
         out_data = []
         return out_data
 
+    def CalulateCRC_Coprocessor(self, pIndata):
+        out_data = []
+        return out_data
+
+    def MFRC522_CheckCRC(self, pIndata):
+        return True
+
     def MFRC522_SelectTag(self, serNum):
         back_data = [0]
         return back_data[0]
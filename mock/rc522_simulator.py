@@ -0,0 +1,447 @@
+import sys
+import time
+import types
+
+from mock.rpi_mock import GPIO
+
+REGISTER_COUNT = 0x40
+FIFO_SIZE = 64
+
+COMMAND_REG = 0x01
+COMM_IRQ_REG = 0x04
+DIV_IRQ_REG = 0x05
+ERROR_REG = 0x06
+STATUS_2_REG = 0x08
+FIFO_DATA_REG = 0x09
+FIFO_LEVEL_REG = 0x0A
+CONTROL_REG = 0x0C
+BIT_FRAMING_REG = 0x0D
+CRC_RESULT_REG_M = 0x21
+CRC_RESULT_REG_L = 0x22
+
+PCD_IDLE = 0x00
+PCD_CALCCRC = 0x03
+PCD_AUTHENT = 0x0E
+PCD_TRANSCEIVE = 0x0C
+PCD_RESETPHASE = 0x0F
+
+PICC_REQIDL = 0x26
+PICC_REQALL = 0x52
+PICC_ANTICOLL = 0x93
+PICC_READ = 0x30
+PICC_WRITE = 0xA0
+PICC_HALT = 0x50
+PICC_ACK = 0x0A
+
+TIMER_IRQ = 0x01
+IDLE_IRQ = 0x10
+RX_IRQ = 0x20
+CRC_IRQ = 0x04
+CRYPTO_1_ON = 0x08
+PROTOCOL_ERROR = 0x01
+COLLISION_ERROR = 0x08
+
+STATE_IDLE = 'idle'
+STATE_READY = 'ready'
+STATE_ACTIVE = 'active'
+STATE_HALT = 'halt'
+
+DEFAULT_KEY = [0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF]
+
+
+def crc_a(data):
+    """
+    Bitwise ISO/IEC 14443-A CRC, kept independent from the driver's table
+    based implementation so the simulator cross-checks it.
+    :param data: The bytes to protect.
+    :return: The CRC as [low byte, high byte].
+    """
+    crc = 0x6363
+    for byte in data:
+        byte ^= crc & 0xFF
+        byte ^= (byte << 4) & 0xFF
+        crc = (crc >> 8) ^ (byte << 8) ^ (byte << 3) ^ (byte >> 4)
+    return [crc & 0xFF, (crc >> 8) & 0xFF]
+
+
+class SimulatedCard:
+    """
+    A MIFARE Classic like ISO 14443-A card with a four byte unique id.
+    """
+
+    def __init__(self, uid, sak: int = 0x08, atqa=(0x04, 0x00), key=None):
+        """
+        :param uid: The four bytes of the unique id.
+        :param sak: The select acknowledge byte.
+        :param atqa: The two bytes answering a request.
+        :param key: The sector key A, the transport key if None.
+        """
+        self.uid = list(uid)
+        self.sak = sak
+        self.atqa = list(atqa)
+        self.key = DEFAULT_KEY if key is None else list(key)
+        self.state = STATE_IDLE
+        self.blocks = {}
+        self.pending_write = None
+
+    @property
+    def serial_number(self):
+        """
+        :return: The unique id followed by its check byte.
+        """
+        check = 0
+        for fragment in self.uid:
+            check ^= fragment
+        return self.uid + [check]
+
+    @property
+    def uid_string(self):
+        """
+        :return: The unique id formatted like the tag registration does.
+        """
+        return '-'.join(format(fragment, '02x') for fragment in self.serial_number)
+
+    def read_block(self, block):
+        return self.blocks.get(block, [0] * 16)
+
+
+class CardScript:
+    """
+    Schedule of cards entering and leaving the reader field.
+    """
+
+    def __init__(self):
+        self.__entries = []
+        self.__start = time.monotonic()
+
+    def add(self, card: SimulatedCard, enter: float, leave: float):
+        """
+        Schedules a card to be held in front of the reader.
+        :param card: The card.
+        :param enter: The time in seconds after start at which it enters.
+        :param leave: The time in seconds after start at which it leaves.
+        :return:
+        """
+        self.__entries.append((card, enter, leave))
+
+    def restart(self):
+        """
+        Sets the script's time origin to now.
+        :return:
+        """
+        self.__start = time.monotonic()
+
+    @property
+    def start(self):
+        return self.__start
+
+    @property
+    def entries(self):
+        return list(self.__entries)
+
+    def cards_in_field(self, now: float = None):
+        """
+        :param now: The monotonic time, the current time if None.
+        :return: The cards within the field at the given time.
+        """
+        elapsed = (time.monotonic() if now is None else now) - self.__start
+        return [card for card, enter, leave in self.__entries
+                if enter <= elapsed < leave]
+
+
+class Rc522Simulator:
+    """
+    Emulates the register file, the FIFO and the command set of a RC522
+    reader as seen through its SPI interface.
+    """
+
+    def __init__(self, script: CardScript = None,
+                 transfer_latency: float = 0., response_latency: float = 0.,
+                 rf_timeout: float = 0.015):
+        """
+        :param script: The cards to present to the reader.
+        :param transfer_latency: The time in seconds each SPI transfer takes.
+        :param response_latency: The time in seconds a card takes to answer.
+        :param rf_timeout: The time in seconds until the timer interrupt is
+        raised if no card answers.
+        """
+        self.__script = CardScript() if script is None else script
+        self.__transfer_latency = transfer_latency
+        self.__response_latency = response_latency
+        self.__rf_timeout = rf_timeout
+
+        self.__registers = [0] * REGISTER_COUNT
+        self.__fifo = []
+        self.__pending_irq = 0
+        self.__pending_irq_time = 0.
+        self.__selected_card = None
+        self.__field = []
+
+        self.transfers = 0
+        self.frames = 0
+
+    @property
+    def script(self):
+        return self.__script
+
+    def transfer(self, data):
+        """
+        Executes a single register access.
+        :param data: The address byte and the value byte.
+        :return: The two bytes clocked out by the reader.
+        """
+        self.transfers += 1
+        if self.__transfer_latency:
+            # Busy wait, sleeping is far too coarse for microsecond latencies.
+            end = time.perf_counter() + self.__transfer_latency
+            while time.perf_counter() < end:
+                pass
+
+        address_byte, value = data[0], data[1]
+        address = (address_byte >> 1) & 0x3F
+        if address_byte & 0x80:
+            return 0, self.__read(address)
+        self.__write(address, value & 0xFF)
+        return 0, 0
+
+    def __read(self, address):
+        if address == FIFO_DATA_REG:
+            return self.__fifo.pop(0) if self.__fifo else 0
+        if address == FIFO_LEVEL_REG:
+            return len(self.__fifo)
+        if address == COMM_IRQ_REG:
+            self.__raise_pending_irq()
+        return self.__registers[address]
+
+    def __write(self, address, value):
+        if address == FIFO_DATA_REG:
+            if len(self.__fifo) < FIFO_SIZE:
+                self.__fifo.append(value)
+        elif address == FIFO_LEVEL_REG:
+            if value & 0x80:
+                self.__fifo = []
+        elif address in (COMM_IRQ_REG, DIV_IRQ_REG):
+            if value & 0x80:
+                self.__registers[address] |= value & 0x7F
+            else:
+                self.__registers[address] &= ~value & 0x7F
+        elif address == COMMAND_REG:
+            self.__registers[address] = value
+            self.__execute(value & 0x0F)
+        elif address == BIT_FRAMING_REG:
+            self.__registers[address] = value
+            if value & 0x80 and self.__command() == PCD_TRANSCEIVE:
+                self.__transceive()
+        else:
+            self.__registers[address] = value
+
+    def __command(self):
+        return self.__registers[COMMAND_REG] & 0x0F
+
+    def __execute(self, command):
+        if command == PCD_IDLE:
+            self.__pending_irq = 0
+        elif command == PCD_RESETPHASE:
+            self.__registers = [0] * REGISTER_COUNT
+            self.__fifo = []
+            self.__pending_irq = 0
+        elif command == PCD_CALCCRC:
+            crc = crc_a(self.__fifo)
+            self.__fifo = []
+            self.__registers[CRC_RESULT_REG_L] = crc[0]
+            self.__registers[CRC_RESULT_REG_M] = crc[1]
+            self.__registers[DIV_IRQ_REG] |= CRC_IRQ
+        elif command == PCD_AUTHENT:
+            self.__authenticate()
+
+    def __raise_pending_irq(self):
+        if self.__pending_irq and time.monotonic() >= self.__pending_irq_time:
+            self.__registers[COMM_IRQ_REG] |= self.__pending_irq
+            self.__pending_irq = 0
+
+    def __schedule_irq(self, irq, delay):
+        self.__pending_irq = irq
+        self.__pending_irq_time = time.monotonic() + delay
+
+    def __update_field(self):
+        """
+        Powers down the cards which left the field since the last frame.
+        :return: The cards within the field.
+        """
+        field = self.__script.cards_in_field()
+        for card in self.__field:
+            if card not in field:
+                card.state = STATE_IDLE
+        self.__field = field
+        return field
+
+    def __transceive(self):
+        self.frames += 1
+        frame = self.__fifo
+        self.__fifo = []
+        self.__registers[ERROR_REG] = 0
+        tx_last_bits = self.__registers[BIT_FRAMING_REG] & 0x07
+
+        responses = self.__respond(self.__update_field(), frame, tx_last_bits)
+        if not responses:
+            self.__schedule_irq(TIMER_IRQ, self.__rf_timeout)
+            return
+
+        if len(responses) > 1:
+            self.__registers[ERROR_REG] = COLLISION_ERROR
+        response, bits = responses[0]
+        self.__fifo = list(response)
+        self.__registers[CONTROL_REG] = bits % 8
+        self.__schedule_irq(RX_IRQ | IDLE_IRQ, self.__response_latency)
+
+    def __respond(self, field, frame, tx_last_bits):
+        """
+        Passes a frame to every card within the field.
+        :return: The list of (response bytes, response bit count) of all
+        answering cards.
+        """
+        responses = []
+        for card in field:
+            response = self.__card_response(card, frame, tx_last_bits)
+            if response is not None:
+                responses.append(response)
+        return responses
+
+    def __card_response(self, card, frame, tx_last_bits):
+        if tx_last_bits == 7 and len(frame) == 1:
+            wake_up = frame[0] == PICC_REQALL
+            if frame[0] == PICC_REQIDL or wake_up:
+                if card.state == STATE_IDLE \
+                        or (wake_up and card.state == STATE_HALT):
+                    card.state = STATE_READY
+                    return card.atqa, 16
+            # Any unexpected frame sends a ready or active card back to idle.
+            if card.state != STATE_HALT:
+                card.state = STATE_IDLE
+            return None
+
+        if card.state == STATE_READY:
+            return self.__anticollision_response(card, frame)
+        if card.state == STATE_ACTIVE:
+            return self.__active_response(card, frame)
+        return None
+
+    def __anticollision_response(self, card, frame):
+        if frame == [PICC_ANTICOLL, 0x20]:
+            return card.serial_number, 40
+
+        if len(frame) == 9 and frame[:2] == [PICC_ANTICOLL, 0x70] \
+                and frame[2:7] == card.serial_number \
+                and frame[7:] == crc_a(frame[:7]):
+            card.state = STATE_ACTIVE
+            self.__selected_card = card
+            response = [card.sak]
+            return response + crc_a(response), 24
+
+        card.state = STATE_IDLE
+        return None
+
+    def __active_response(self, card, frame):
+        crc_valid = len(frame) > 2 and frame[-2:] == crc_a(frame[:-2])
+
+        if crc_valid and frame[0] == PICC_READ and len(frame) == 4:
+            data = card.read_block(frame[1])
+            return data + crc_a(data), 144
+
+        if crc_valid and frame[0] == PICC_WRITE and len(frame) == 4:
+            card.pending_write = frame[1]
+            return [PICC_ACK], 4
+
+        if crc_valid and len(frame) == 18 and card.pending_write is not None:
+            card.blocks[card.pending_write] = frame[:16]
+            card.pending_write = None
+            return [PICC_ACK], 4
+
+        if crc_valid and frame[0] == PICC_HALT:
+            card.state = STATE_HALT
+            return None
+
+        card.state = STATE_IDLE
+        return None
+
+    def __authenticate(self):
+        frame = self.__fifo
+        self.__fifo = []
+        card = self.__selected_card
+        if card is not None and card.state == STATE_ACTIVE \
+                and card in self.__script.cards_in_field() \
+                and len(frame) == 12 and frame[2:8] == card.key \
+                and frame[8:12] == card.uid:
+            self.__registers[ERROR_REG] = 0
+            self.__registers[STATUS_2_REG] |= CRYPTO_1_ON
+        else:
+            self.__registers[ERROR_REG] = PROTOCOL_ERROR
+        self.__schedule_irq(IDLE_IRQ, self.__response_latency)
+
+
+class SimulatedSpiBus:
+    """
+    Replacement for the spidev module which routes the transfers of each
+    opened handle to the simulated reader on its device.
+    """
+
+    def __init__(self, readers=None):
+        """
+        :param readers: A dictionary of device paths and simulated readers.
+        """
+        self.readers = {} if readers is None else dict(readers)
+        self.opens = 0
+
+    def SpiDev(self):
+        return SimulatedSpiDev(self)
+
+    def open(self, bus, device):
+        """
+        :param bus: The number of the SPI bus.
+        :param device: The number of the chip select.
+        :return: The simulated reader on the device.
+        """
+        path = '/dev/spidev%d.%d' % (bus, device)
+        if path not in self.readers:
+            self.readers[path] = Rc522Simulator()
+        self.opens += 1
+        return self.readers[path]
+
+
+class SimulatedSpiDev:
+    """
+    Handle of a single SPI device like spidev.SpiDev.
+    """
+
+    def __init__(self, bus: SimulatedSpiBus):
+        self.__bus = bus
+        self.__reader = None
+        self.max_speed_hz = 0
+
+    def open(self, bus, device):
+        self.__reader = self.__bus.open(bus, device)
+
+    def close(self):
+        self.__reader = None
+
+    def xfer2(self, data):
+        return list(self.__reader.transfer(data))
+
+
+def install(bus: SimulatedSpiBus):
+    """
+    Registers the simulated SPI bus and the GPIO mock as the "spidev" and
+    "RPi.GPIO" modules, so the unmodified MFRC522 driver runs against them.
+    Has to be called before the driver is imported.
+    :param bus: The simulated SPI bus.
+    :return:
+    """
+    spidev_module = types.ModuleType('spidev')
+    spidev_module.SpiDev = bus.SpiDev
+
+    rpi_module = types.ModuleType('RPi')
+    rpi_module.GPIO = GPIO
+
+    sys.modules['spidev'] = spidev_module
+    sys.modules['RPi'] = rpi_module
+    sys.modules['RPi.GPIO'] = GPIO
@@ -12,7 +12,11 @@ class GPIO:
         gpio = gpio
 
     @staticmethod
-    def setup(pin, pin_type, pull_up_down):
+    def setup(pin, pin_type, pull_up_down=None):
+        pass
+
+    @staticmethod
+    def output(pin, value):
         pass
 
     @staticmethod
@@ -0,0 +1,262 @@
+import os
+from os.path import abspath, dirname, isdir, join
+
+from content_management import ContentManagement
+from service.events import Clock, EventDispatcher, ObjectProperty
+from service.packing_history import PackingHistory
+from service.startup_profiler import startup_profiler
+from service.tag_event_queue import TagEventQueue
+from settings import Settings
+
+DEFAULT_PROFILE = 'default'
+ROOT_DIRECTORY = dirname(abspath(__file__))
+PROFILES_DIRECTORY = join(ROOT_DIRECTORY, 'profiles')
+HISTORY_FILE_NAME = 'history.db'
+DATABASE_FILE_NAME = 'settings.db'
+# Set to 1 to store the settings of every profile in a SQLite database, with
+# the json settings file kept as export for the companion app.
+DATABASE_VARIABLE = 'SCHOOLBAG_SETTINGS_DATABASE'
+
+
+class Profile:
+    """
+    The settings, the content management and the packing history of a
+    single user.
+    """
+
+    __slots__ = ('name', 'settings', 'content_management', 'history',
+                 'is_suspended')
+
+    def __init__(self, name, settings, content_management, history):
+        self.name = name
+        self.settings = settings
+        self.content_management = content_management
+        self.history = history
+        self.is_suspended = False
+
+    def suspend(self):
+        """
+        Logs the packing state, writes the pending changes and releases the
+        file watcher, the writing threads, the open files, the databases and
+        the clock events of the profile; its state stays in memory.
+        :return:
+        """
+        if self.is_suspended:
+            return
+        self.content_management.suspend()
+        self.settings.suspend()
+        self.history.close()
+        self.is_suspended = True
+
+    def resume(self):
+        """
+        Reopens the resources released by suspend.
+        :return:
+        """
+        if not self.is_suspended:
+            return
+        self.history.reopen()
+        self.settings.resume()
+        self.content_management.resume()
+        self.is_suspended = False
+
+
+class ProfileManager(EventDispatcher):
+    """
+    Keeps the settings and content states of several users on one device.
+
+    Every profile holds its own settings, tag registry and weekday index,
+    loaded once on startup. The tag reader is shared and its reads are
+    applied to the active profile only. Inactive profiles are suspended:
+    they keep their settings, indexes and list rows in memory, but hold no
+    file watcher, writing thread, open file, database connection or clock
+    event. Switching profiles reopens these without reading the settings
+    files, unless the companion app changed them in the meantime.
+
+    The default profile uses the settings files of the project root, further
+    profiles a sub directory of the profiles directory each.
+    """
+
+    active_profile = ObjectProperty(None)
+    settings = ObjectProperty(None)
+    content_management = ObjectProperty(None)
+
+    def __init__(self, profile_names=None,
+                 profiles_directory=PROFILES_DIRECTORY, use_database=None,
+                 **kwargs):
+        """
+        Loads all profiles and activates the first one.
+        :param profile_names: The names of the profiles to load; the default
+        profile and all profiles found in the profiles directory if None.
+        :param profiles_directory: The directory of the profile directories.
+        :param use_database: True to store the settings in a database within
+        each profile directory; taken from the environment if None.
+        :param kwargs:
+        """
+        super().__init__(**kwargs)
+        self.__profiles_directory = profiles_directory
+        if use_database is None:
+            use_database = os.environ.get(DATABASE_VARIABLE, '0') \
+                not in ('', '0')
+        self.__use_database = use_database
+        self.__is_put_on = False
+        self.__profiles = {}
+
+        if profile_names is None:
+            profile_names = [DEFAULT_PROFILE] + self.__stored_profile_names()
+        for name in profile_names:
+            self.add_profile(name)
+        self.switch_to(profile_names[0])
+
+        self.__tag_events = TagEventQueue()
+        self.__tag_event_consumer = Clock.schedule_interval(
+            self.__consume_tag_events, 0)
+        self.__tag_registration = None
+
+    def __del__(self):
+        """
+        Stops the tag reader and the content management of every profile.
+        :return:
+        """
+        if self.__tag_registration is not None:
+            self.__tag_registration.stop_tag_reading()
+        self.__tag_event_consumer.cancel()
+        for profile in self.__profiles.values():
+            profile.suspend()
+
+    def start_tag_reading(self, tag_readers=None):
+        """
+        Sets up the rfid readers and starts passing their reads to the active
+        profile; may be called from a background thread.
+        :param tag_readers: The readers to scan; the default readers if None.
+        :return: The tag registration.
+        """
+        from tag_registration import TagRegistration
+        tag_registration = TagRegistration(
+            self.__tag_events.publish, tag_readers)
+        tag_registration.start_tag_reading()
+        self.__tag_registration = tag_registration
+        return tag_registration
+
+    def __contains__(self, name):
+        return name in self.__profiles
+
+    def profile_names(self):
+        """
+        :return: The names of all loaded profiles.
+        """
+        return list(self.__profiles)
+
+    def add_profile(self, name):
+        """
+        Loads the profile of the given name, creating its directory if it is
+        new. Any profile but the first one loaded is suspended right away.
+        :param name: The profile name.
+        :return: The profile.
+        """
+        if name in self.__profiles:
+            return self.__profiles[name]
+
+        profile_directory = None if name == DEFAULT_PROFILE \
+            else join(self.__profiles_directory, name)
+        database_path = join(profile_directory or ROOT_DIRECTORY,
+                             DATABASE_FILE_NAME) \
+            if self.__use_database else None
+        with startup_profiler().measure('Profile %s' % name):
+            settings = Settings(database_path=database_path,
+                                profile_directory=profile_directory)
+            history = PackingHistory(join(
+                profile_directory or ROOT_DIRECTORY, HISTORY_FILE_NAME))
+            profile = Profile(name, settings, ContentManagement(
+                settings, history=history), history)
+        self.__profiles[name] = profile
+        if len(self.__profiles) > 1:
+            profile.suspend()
+        return profile
+
+    def switch_to(self, name):
+        """
+        Suspends the active profile and makes the profile of the given name
+        the active one.
+        :param name: The profile name.
+        :return:
+        """
+        profile = self.__profiles[name]
+        if profile is self.active_profile:
+            return
+
+        if self.active_profile is not None:
+            self.active_profile.suspend()
+        profile.resume()
+        self.settings = profile.settings
+        self.content_management = profile.content_management
+        if self.__is_put_on:
+            self.content_management.on_schoolbag_put_on()
+        self.active_profile = profile
+
+    def flush(self):
+        """
+        Writes any pending changes of all profiles; to be called on shutdown.
+        :return:
+        """
+        for profile in self.__profiles.values():
+            profile.settings.flush()
+
+    def on_load_changed(self, load):
+        """
+        Passes a measured load to the active profile on the main thread.
+        :param load: The measured load in grams.
+        :return:
+        """
+        Clock.schedule_once(
+            lambda dt: self.content_management.check_load(load))
+
+    def on_schoolbag_put_on(self):
+        """
+        Lets the active profile compare the measured load from now on; may
+        be called from the measurement thread.
+        :return:
+        """
+        Clock.schedule_once(lambda dt: self.__set_put_on(True))
+
+    def on_schoolbag_put_down(self):
+        """
+        Stops comparing the measured load, which drops to about zero once
+        the bag is put down; may be called from the measurement thread.
+        :return:
+        """
+        Clock.schedule_once(lambda dt: self.__set_put_on(False))
+
+    def __set_put_on(self, is_put_on):
+        self.__is_put_on = is_put_on
+        if is_put_on:
+            self.content_management.on_schoolbag_put_on()
+        else:
+            self.content_management.on_schoolbag_put_down()
+
+    def tag_event_statistics(self):
+        """
+        Returns the depth and event age counters of the shared tag event
+        queue.
+        :return: A dictionary of the counter values.
+        """
+        return self.__tag_events.statistics()
+
+    def __consume_tag_events(self, dt):
+        """
+        Applies all tag reads queued since the last frame to the active
+        profile.
+        :param dt: The time elapsed since the last call.
+        :return:
+        """
+        events = self.__tag_events.drain()
+        if events:
+            self.content_management.apply_tag_events(events)
+
+    def __stored_profile_names(self):
+        if not isdir(self.__profiles_directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.__profiles_directory)
+            if name != DEFAULT_PROFILE
+            and isdir(join(self.__profiles_directory, name)))
@@ -0,0 +1,50 @@
+from threading import Lock
+
+
+class ConsoleInformer:
+    """
+    Prints the notifications to the console in place of the popup of the
+    Informer, for the headless mode.
+
+    A message equal to the last printed one is dropped.
+    """
+
+    __lock = Lock()
+    __shown = None
+
+    __requests = 0
+    __coalesced = 0
+    __shown_count = 0
+
+    @staticmethod
+    def show_popup(title, text):
+        ConsoleInformer.__show('%s: %s' % (title, text.replace('\n', ' ')))
+
+    @staticmethod
+    def show_smiley_popup(title):
+        ConsoleInformer.__show('%s :)' % title)
+
+    @staticmethod
+    def statistics():
+        """
+        Returns the notification counters.
+        :return: A dictionary of the counter values.
+        """
+        with ConsoleInformer.__lock:
+            return {
+                'requests': ConsoleInformer.__requests,
+                'coalesced': ConsoleInformer.__coalesced,
+                'replaced': 0,
+                'shown': ConsoleInformer.__shown_count
+            }
+
+    @staticmethod
+    def __show(message):
+        with ConsoleInformer.__lock:
+            ConsoleInformer.__requests += 1
+            if message == ConsoleInformer.__shown:
+                ConsoleInformer.__coalesced += 1
+                return
+            ConsoleInformer.__shown = message
+            ConsoleInformer.__shown_count += 1
+        print('[Informer] %s' % message)
@@ -0,0 +1,203 @@
+import json
+import os
+import time
+from json import JSONDecodeError
+from threading import Lock
+
+from service.write_behind_persister import write_atomically
+
+INSERT_MARKER = '+'
+REMOVE_MARKER = '-'
+
+
+class ContentJournal:
+    """
+    Persists the current bag content as a snapshot plus an append-only
+    journal of insert and remove entries.
+
+    Each change costs one small synced append. Once the journal holds enough
+    entries it is compacted by atomically replacing the snapshot and
+    truncating the journal. The entries state the membership of a tag rather
+    than toggling it, so replaying a journal which survived a crash during
+    compaction onto the new snapshot yields the same content.
+    """
+
+    def __init__(self, journal_path, snapshot_path,
+                 compaction_threshold: int = 128):
+        """
+        :param journal_path: The path of the journal file.
+        :param snapshot_path: The path of the snapshot file.
+        :param compaction_threshold: The number of journal entries after
+        which the journal should be compacted.
+        """
+        self.__journal_path = journal_path
+        self.__snapshot_path = snapshot_path
+        self.__compaction_threshold = compaction_threshold
+        self.__lock = Lock()
+        self.__journal = None
+        self.__entries = 0
+
+        self.__appends = 0
+        self.__compactions = 0
+        self.__total_append_time = 0.
+        self.__max_append_time = 0.
+
+    def load(self, initial_content):
+        """
+        Rebuilds the current content from the snapshot and the journal. An
+        incomplete last entry left by a power cut is discarded, as is
+        everything from the first undecodable or malformed entry on.
+        :param initial_content: The content which becomes the snapshot if
+        there is no readable snapshot yet.
+        :return: The list of unique ids of the current content.
+        """
+        with self.__lock:
+            snapshot = self.__read_snapshot()
+            if snapshot is None:
+                snapshot = list(initial_content)
+                write_atomically(self.__snapshot_path,
+                                 json.dumps(snapshot).encode('utf-8'))
+            content = dict.fromkeys(snapshot)
+
+            valid_length = 0
+            self.__entries = 0
+            if os.path.exists(self.__journal_path):
+                with open(self.__journal_path, 'rb') as journal:
+                    data = journal.read()
+                for line in data.splitlines(keepends=True):
+                    entry = self.__parse_entry(line)
+                    if entry is None:
+                        break
+                    valid_length += len(line)
+                    self.__apply_entry(content, *entry)
+                    self.__entries += 1
+
+                if valid_length != len(data):
+                    print('[ContentJournal] Discarding %d bytes of an '
+                          'incomplete or unreadable journal entry.'
+                          % (len(data) - valid_length))
+
+            self.__journal = open(self.__journal_path, 'ab')
+            self.__journal.truncate(valid_length)
+            return list(content)
+
+    def record(self, inserted, removed):
+        """
+        Appends the given changes to the journal and syncs it to disk.
+        :param inserted: The unique ids added to the content.
+        :param removed: The unique ids removed from the content.
+        :return: True if the journal should be compacted, else False.
+        """
+        lines = [INSERT_MARKER + uid for uid in inserted] \
+            + [REMOVE_MARKER + uid for uid in removed]
+        if not lines:
+            return False
+
+        start = time.perf_counter()
+        with self.__lock:
+            self.__journal.write(('\n'.join(lines) + '\n').encode('utf-8'))
+            self.__journal.flush()
+            self.__sync(self.__journal.fileno())
+            self.__entries += len(lines)
+
+            append_time = time.perf_counter() - start
+            self.__appends += 1
+            self.__total_append_time += append_time
+            self.__max_append_time = max(self.__max_append_time, append_time)
+            return self.__entries >= self.__compaction_threshold
+
+    def compact(self, content):
+        """
+        Replaces the snapshot with the given content and empties the journal.
+        :param content: The list of unique ids of the current content.
+        :return:
+        """
+        with self.__lock:
+            write_atomically(self.__snapshot_path,
+                             json.dumps(list(content)).encode('utf-8'))
+            self.__journal.truncate(0)
+            self.__sync(self.__journal.fileno())
+            self.__entries = 0
+            self.__compactions += 1
+
+    def close(self):
+        """
+        Closes the journal file.
+        :return:
+        """
+        with self.__lock:
+            if self.__journal is not None:
+                self.__journal.close()
+                self.__journal = None
+
+    def reopen(self):
+        """
+        Opens the journal file for appending again after close without
+        replaying it, as the caller still holds the content.
+        :return:
+        """
+        with self.__lock:
+            if self.__journal is None:
+                self.__journal = open(self.__journal_path, 'ab')
+
+    def statistics(self):
+        """
+        Returns the journal length and the append counters and latencies.
+        :return: A dictionary of the counter values.
+        """
+        with self.__lock:
+            return {
+                'entries': self.__entries,
+                'appends': self.__appends,
+                'compactions': self.__compactions,
+                'meanAppendTime': self.__total_append_time / self.__appends
+                if self.__appends else 0.,
+                'maxAppendTime': self.__max_append_time
+            }
+
+    def __read_snapshot(self):
+        """
+        :return: The list of unique ids of the snapshot or None if there is
+        no readable snapshot.
+        """
+        if not os.path.exists(self.__snapshot_path):
+            return None
+        try:
+            with open(self.__snapshot_path) as snapshot:
+                return json.load(snapshot)
+        except (JSONDecodeError, UnicodeDecodeError) as e:
+            print('[ContentJournal] Could not read the snapshot "%s". %s'
+                  % (self.__snapshot_path, str(e)))
+            return None
+
+    @staticmethod
+    def __parse_entry(line):
+        """
+        :param line: A line of the journal including its line break.
+        :return: The tuple of marker and unique id or None if the line is
+        incomplete, undecodable or malformed.
+        """
+        if not line.endswith(b'\n'):
+            return None
+        try:
+            entry = line[:-1].decode('utf-8')
+        except UnicodeDecodeError:
+            return None
+        marker, uid = entry[:1], entry[1:]
+        if marker not in (INSERT_MARKER, REMOVE_MARKER) or not uid:
+            return None
+        return marker, uid
+
+    @staticmethod
+    def __apply_entry(content, marker, uid):
+        if marker == INSERT_MARKER:
+            content[uid] = None
+        else:
+            content.pop(uid, None)
+
+    @staticmethod
+    def __sync(descriptor):
+        if hasattr(os, 'fdatasync'):
+            os.fdatasync(descriptor)
+        else:
+            os.fsync(descriptor)
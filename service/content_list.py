@@ -0,0 +1,88 @@
+class ContentList:
+    """
+    Keeps the row data of a list view in sync with an ordered collection of
+    unique ids.
+
+    Each update computes the unique ids which left and joined the collection
+    and applies only those removals and insertions to the attached data, so
+    a single tag toggle costs a single list operation and an unchanged
+    collection does not touch the data at all. Rows keep their position,
+    new rows are appended.
+    """
+
+    def __init__(self, row_for):
+        """
+        :param row_for: The method returning the row data of a unique id.
+        """
+        self.__row_for = row_for
+        self.__uids = []
+        self.__data = []
+
+    @property
+    def uids(self):
+        """
+        :return: A copy of the listed unique ids in row order.
+        """
+        return list(self.__uids)
+
+    def __contains__(self, uid):
+        return uid in self.__uids
+
+    def __len__(self):
+        return len(self.__uids)
+
+    def attach(self, data):
+        """
+        Makes the given list the target of all further row operations and
+        fills it with the current rows.
+        :param data: The mutable row list of a view, usually an observable
+        list which updates the view on each operation.
+        :return:
+        """
+        data[:] = self.__data
+        self.__data = data
+
+    def detach(self):
+        """
+        Keeps further row operations in a private copy of the rows, leaving
+        the previously attached list untouched.
+        :return:
+        """
+        self.__data = list(self.__data)
+
+    def update(self, uids):
+        """
+        Applies the minimal removals and insertions turning the listed unique
+        ids into the given ones.
+        :param uids: The new unique ids in the order of their insertion.
+        :return: True if the rows changed, else False.
+        """
+        wanted = uids if isinstance(uids, (set, frozenset, dict)) \
+            else set(uids)
+        removed_indexes = [index for index, uid in enumerate(self.__uids)
+                           if uid not in wanted]
+        listed = set(self.__uids)
+        inserted = [uid for uid in uids if uid not in listed]
+        if not removed_indexes and not inserted:
+            return False
+
+        for index in reversed(removed_indexes):
+            del self.__uids[index]
+            del self.__data[index]
+        for uid in inserted:
+            self.__uids.append(uid)
+            self.__data.append(self.__row_for(uid))
+        return True
+
+    def refresh(self, uid):
+        """
+        Replaces the row of the given unique id, e.g. after its tag changed.
+        :param uid: The unique id whose row to rebuild.
+        :return: True if the unique id is listed, else False.
+        """
+        try:
+            index = self.__uids.index(uid)
+        except ValueError:
+            return False
+        self.__data[index] = self.__row_for(uid)
+        return True
@@ -0,0 +1,15 @@
+import os
+
+# Set to 1 to run the business logic on the headless event system instead of
+# Kivy, e.g. by the headless daemon.
+HEADLESS = os.environ.get('SCHOOLBAG_HEADLESS', '0') not in ('', '0')
+
+if HEADLESS:
+    from service.headless_events import Clock, EventDispatcher, \
+        DictProperty, ListProperty, NumericProperty, ObjectProperty, \
+        OptionProperty, StringProperty
+else:
+    from kivy.clock import Clock
+    from kivy.event import EventDispatcher
+    from kivy.properties import DictProperty, ListProperty, \
+        NumericProperty, ObjectProperty, OptionProperty, StringProperty
@@ -0,0 +1,249 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from os.path import basename, dirname
+from threading import Event, Thread
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+INOTIFY_EVENT = struct.Struct('iIII')
+INOTIFY_BUFFER_SIZE = 4096
+
+
+def _load_inotify():
+    """
+    Looks up the inotify functions of the c library.
+    :return: The c library or None if inotify is not available.
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError, TypeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    """
+    Watches a single file and reports changes once a burst of events settled.
+
+    The parent directory is watched with inotify, subscribing only to
+    completed writes and renames onto the file, so atomic replacements are
+    recognized and other files within the directory are filtered by name.
+    Without inotify the modification time and size of the file are polled,
+    which works on every platform.
+    """
+
+    def __init__(self, path, on_changed, debounce_period: float = .3,
+                 poll_interval: float = 1., use_inotify: bool = True):
+        """
+        :param path: The path of the file to watch.
+        :param on_changed: The method called from the watcher thread after
+        the file changed.
+        :param debounce_period: The time in seconds without further events
+        after which the change is reported.
+        :param poll_interval: The time in seconds between two checks of the
+        file when polling.
+        :param use_inotify: False to poll even if inotify is available.
+        """
+        self.__path = path
+        self.__directory = dirname(path)
+        self.__name = os.fsencode(basename(path))
+        self.__on_changed = on_changed
+        self.__debounce_period = debounce_period
+        self.__poll_interval = poll_interval
+
+        self.__libc = _load_inotify() if use_inotify else None
+        self.__inotify_descriptor = None
+        # Wakes up the inotify thread waiting in select.
+        self.__stop_reader, self.__stop_writer = None, None
+        self.__stop_event = Event()
+        self.__thread = None
+
+        self.__events = 0
+        self.__notifications = 0
+
+    @property
+    def backend(self):
+        """
+        :return: 'inotify' or 'polling' depending on the method in use.
+        """
+        return 'inotify' if self.__libc is not None else 'polling'
+
+    def start(self):
+        """
+        Starts watching the file in a background thread.
+        :return:
+        """
+        if self.__thread is not None:
+            return
+
+        if self.__libc is not None and not self.__open_inotify():
+            self.__libc = None
+        self.__stop_event.clear()
+        if self.__libc is not None:
+            self.__stop_reader, self.__stop_writer = os.pipe()
+
+        target = self.__inotify_thread_method if self.__libc is not None \
+            else self.__polling_thread_method
+        self.__thread = Thread(target=target, daemon=True,
+                               name='FileWatcher %s' % self.__path)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stops the watcher thread and releases the inotify instance.
+        :return:
+        """
+        if self.__thread is None:
+            return
+
+        self.__stop_event.set()
+        if self.__stop_writer is not None:
+            os.write(self.__stop_writer, b'\0')
+        self.__thread.join()
+        self.__thread = None
+
+        for descriptor in (self.__inotify_descriptor, self.__stop_reader,
+                           self.__stop_writer):
+            if descriptor is not None:
+                os.close(descriptor)
+        self.__inotify_descriptor = None
+        self.__stop_reader, self.__stop_writer = None, None
+
+    def statistics(self):
+        """
+        Returns the number of received events and reported changes.
+        :return: A dictionary of the counter values.
+        """
+        return {
+            'backend': self.backend,
+            'events': self.__events,
+            'notifications': self.__notifications
+        }
+
+    def __open_inotify(self):
+        """
+        Creates the inotify instance and watches the parent directory.
+        :return: True on success, else False.
+        """
+        descriptor = self.__libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if descriptor < 0:
+            print('[FileWatcher] Could not initialize inotify, polling "%s". %s'
+                  % (self.__path, os.strerror(ctypes.get_errno())))
+            return False
+
+        watch = self.__libc.inotify_add_watch(
+            descriptor, os.fsencode(self.__directory),
+            IN_CLOSE_WRITE | IN_MOVED_TO)
+        if watch < 0:
+            print('[FileWatcher] Could not watch "%s", polling instead. %s'
+                  % (self.__directory, os.strerror(ctypes.get_errno())))
+            os.close(descriptor)
+            return False
+
+        self.__inotify_descriptor = descriptor
+        return True
+
+    def __inotify_thread_method(self):
+        """
+        Waits for inotify events of the watched file and reports a change
+        once no further event arrived within the debounce period.
+        :return:
+        """
+        deadline = None
+        while True:
+            timeout = None if deadline is None \
+                else max(0., deadline - time.monotonic())
+            readable, _, _ = select.select(
+                [self.__inotify_descriptor, self.__stop_reader], [], [],
+                timeout)
+
+            if self.__stop_reader in readable:
+                return
+
+            if self.__inotify_descriptor in readable \
+                    and self.__read_inotify_events():
+                deadline = time.monotonic() + self.__debounce_period
+            elif deadline is not None and time.monotonic() >= deadline:
+                deadline = None
+                self.__notify()
+
+    def __read_inotify_events(self):
+        """
+        Reads all queued inotify events.
+        :return: True if any event concerned the watched file, else False.
+        """
+        matched = False
+        while True:
+            try:
+                buffer = os.read(self.__inotify_descriptor,
+                                 INOTIFY_BUFFER_SIZE)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return matched
+                raise
+
+            offset = 0
+            while offset < len(buffer):
+                _, mask, _, length = INOTIFY_EVENT.unpack_from(buffer, offset)
+                offset += INOTIFY_EVENT.size
+                name = buffer[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW or name == self.__name:
+                    self.__events += 1
+                    matched = True
+
+    def __polling_thread_method(self):
+        """
+        Compares the modification time, size and inode of the file in every
+        poll interval and reports a change once they are stable for the
+        debounce period.
+        :return:
+        """
+        last_state = self.__file_state()
+        deadline = None
+        while True:
+            timeout = self.__poll_interval if deadline is None \
+                else max(0., min(self.__poll_interval,
+                                 deadline - time.monotonic()))
+            if self.__stop_event.wait(timeout):
+                return
+
+            state = self.__file_state()
+            if state != last_state:
+                last_state = state
+                self.__events += 1
+                deadline = time.monotonic() + self.__debounce_period
+            elif deadline is not None and time.monotonic() >= deadline:
+                deadline = None
+                self.__notify()
+
+    def __file_state(self):
+        try:
+            status = os.stat(self.__path)
+        except FileNotFoundError:
+            return None
+        return status.st_mtime_ns, status.st_size, status.st_ino
+
+    def __notify(self):
+        self.__notifications += 1
+        try:
+            self.__on_changed()
+        except Exception as e:
+            print('[FileWatcher] Change handler of "%s" failed. %s'
+                  % (self.__path, str(e)))
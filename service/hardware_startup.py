@@ -0,0 +1,141 @@
+import time
+from threading import Event, Lock, Thread
+
+STATE_PENDING = 'pending'
+STATE_STARTING = 'starting'
+STATE_READY = 'ready'
+STATE_FAILED = 'failed'
+
+
+class HardwareStartup:
+    """
+    Initializes the hardware subsystems in parallel background threads, so
+    a slow device does not delay the user interface or the other devices.
+
+    Each subsystem reports its state, its initialization time and the error
+    it failed with. A failed subsystem stays unavailable while all others
+    keep working.
+    """
+
+    def __init__(self, on_state_changed=None):
+        """
+        :param on_state_changed: The method called with the subsystem name
+        and state from the initializing thread whenever a state changes.
+        """
+        self.__on_state_changed = on_state_changed
+        self.__lock = Lock()
+        self.__subsystems = {}
+        self.__done = {}
+
+    def add(self, name, factory):
+        """
+        Registers a subsystem.
+        :param name: The name of the subsystem.
+        :param factory: The method creating the subsystem; it should raise
+        an exception if the device is not usable.
+        :return:
+        """
+        with self.__lock:
+            self.__subsystems[name] = {
+                'factory': factory,
+                'instance': None,
+                'state': STATE_PENDING,
+                'duration': None,
+                'error': None
+            }
+            self.__done[name] = Event()
+
+    def start(self):
+        """
+        Initializes all pending subsystems, each in its own thread.
+        :return:
+        """
+        with self.__lock:
+            names = [name for name, subsystem in self.__subsystems.items()
+                     if subsystem['state'] == STATE_PENDING]
+            for name in names:
+                self.__subsystems[name]['state'] = STATE_STARTING
+
+        for name in names:
+            self.__notify(name, STATE_STARTING)
+            Thread(target=self.__initialize, args=(name,), daemon=True).start()
+
+    def wait(self, timeout: float = None):
+        """
+        Waits for all subsystems to finish their initialization.
+        :param timeout: The maximum time in seconds to wait or None.
+        :return: True if all subsystems finished, else False.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for done in list(self.__done.values()):
+            remaining = None if deadline is None \
+                else max(0., deadline - time.monotonic())
+            if not done.wait(remaining):
+                return False
+        return True
+
+    def get(self, name):
+        """
+        :param name: The name of the subsystem.
+        :return: The subsystem instance or None if it is not ready.
+        """
+        with self.__lock:
+            subsystem = self.__subsystems.get(name)
+            if subsystem is None or subsystem['state'] != STATE_READY:
+                return None
+            return subsystem['instance']
+
+    def instances(self):
+        """
+        :return: The list of the instances of all ready subsystems.
+        """
+        with self.__lock:
+            return [subsystem['instance']
+                    for subsystem in self.__subsystems.values()
+                    if subsystem['state'] == STATE_READY]
+
+    def statistics(self):
+        """
+        Returns the state, initialization time and error of each subsystem.
+        :return: A dictionary of the subsystem names and their values.
+        """
+        with self.__lock:
+            return {
+                name: {
+                    'state': subsystem['state'],
+                    'duration': subsystem['duration'],
+                    'error': subsystem['error']
+                }
+                for name, subsystem in self.__subsystems.items()}
+
+    def __initialize(self, name):
+        """
+        Creates the subsystem and records the outcome.
+        :param name: The name of the subsystem.
+        :return:
+        """
+        factory = self.__subsystems[name]['factory']
+        start = time.perf_counter()
+        try:
+            instance = factory()
+            error = None
+        except Exception as e:
+            instance = None
+            error = '%s: %s' % (type(e).__name__, str(e))
+            print('[HardwareStartup] Could not initialize %s. %s'
+                  % (name, error))
+        duration = time.perf_counter() - start
+
+        state = STATE_READY if error is None else STATE_FAILED
+        with self.__lock:
+            subsystem = self.__subsystems[name]
+            subsystem['instance'] = instance
+            subsystem['state'] = state
+            subsystem['duration'] = duration
+            subsystem['error'] = error
+        self.__done[name].set()
+        self.__notify(name, state)
+
+    def __notify(self, name, state):
+        if self.__on_state_changed is not None:
+            self.__on_state_changed(name, state)
@@ -0,0 +1,371 @@
+import time
+from threading import Condition
+
+
+class Property:
+    """
+    Base class of the headless properties, a descriptor which keeps the
+    value per instance and calls the bound observers on every change.
+
+    Provides the part of the Kivy property interface the business logic
+    uses, so the logic runs unchanged without loading Kivy.
+    """
+
+    def __init__(self, defaultvalue=None, allownone=False, **kwargs):
+        self.name = None
+        self.defaultvalue = defaultvalue
+        self.allownone = allownone
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        values = instance.__dict__
+        if self.name not in values:
+            values[self.name] = self.convert(instance, self.defaultvalue)
+        return values[self.name]
+
+    def __set__(self, instance, value):
+        if value is None and not self.allownone:
+            raise ValueError('%s.%s accepts no None value.'
+                             % (type(instance).__name__, self.name))
+        value = self.convert(instance, value)
+        if self.compare(self.__get__(instance, type(instance)), value):
+            return
+        instance.__dict__[self.name] = value
+        instance._dispatch_property(self.name, value)
+
+    def convert(self, instance, value):
+        return value
+
+    @staticmethod
+    def compare(old_value, new_value):
+        try:
+            return bool(old_value == new_value)
+        except Exception:
+            return old_value is new_value
+
+
+class ObjectProperty(Property):
+    pass
+
+
+class StringProperty(Property):
+
+    def __init__(self, defaultvalue='', **kwargs):
+        super().__init__(defaultvalue, **kwargs)
+
+
+class NumericProperty(Property):
+
+    def __init__(self, defaultvalue=0, **kwargs):
+        super().__init__(defaultvalue, **kwargs)
+
+
+class OptionProperty(Property):
+
+    def __init__(self, defaultvalue=None, options=(), **kwargs):
+        super().__init__(defaultvalue, **kwargs)
+        self.options = list(options)
+
+    def convert(self, instance, value):
+        if value not in self.options \
+                and not (value is None and self.allownone):
+            raise ValueError('%s.%s is set to "%s" which is not one of %s.'
+                             % (type(instance).__name__, self.name, value,
+                                self.options))
+        return value
+
+
+class ListProperty(Property):
+
+    def __init__(self, defaultvalue=None, **kwargs):
+        super().__init__([] if defaultvalue is None else defaultvalue,
+                         **kwargs)
+
+    def convert(self, instance, value):
+        if value is None:
+            return None
+        return ObservableList(instance, self.name, value)
+
+
+class DictProperty(Property):
+
+    def __init__(self, defaultvalue=None, **kwargs):
+        super().__init__({} if defaultvalue is None else defaultvalue,
+                         **kwargs)
+
+    def convert(self, instance, value):
+        if value is None:
+            return None
+        return ObservableDict(instance, self.name, value)
+
+
+def _observable(method_name, base):
+    """
+    Wraps a mutating method so it dispatches the owning property afterwards.
+    """
+    method = getattr(base, method_name)
+
+    def mutate(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._owner._dispatch_property(self._name, self)
+        return result
+    mutate.__name__ = method_name
+    return mutate
+
+
+class ObservableList(list):
+    """
+    List which dispatches its property whenever it is modified in place.
+    """
+
+    def __init__(self, owner, name, values):
+        super().__init__(values)
+        self._owner = owner
+        self._name = name
+
+
+class ObservableDict(dict):
+    """
+    Dictionary which dispatches its property whenever it is modified in
+    place.
+    """
+
+    def __init__(self, owner, name, values):
+        super().__init__(values)
+        self._owner = owner
+        self._name = name
+
+
+for _method_name in ('__setitem__', '__delitem__', '__iadd__', '__imul__',
+                     'append', 'extend', 'insert', 'pop', 'remove', 'clear',
+                     'sort', 'reverse'):
+    setattr(ObservableList, _method_name, _observable(_method_name, list))
+for _method_name in ('__setitem__', '__delitem__', 'clear', 'pop', 'popitem',
+                     'setdefault', 'update'):
+    setattr(ObservableDict, _method_name, _observable(_method_name, dict))
+
+
+class EventDispatcher:
+    """
+    Headless counterpart of the Kivy event dispatcher for the events named in
+    __events__ and the properties declared on the class.
+
+    Event handlers are called in reverse order of binding followed by the
+    default handler, a handler returning True stops the dispatch. Property
+    observers are called in order of binding after the on_<name> method.
+    """
+
+    def __init__(self, **kwargs):
+        self.__observers = {}
+        self.__event_types = set()
+        for cls in type(self).__mro__:
+            self.__event_types.update(cls.__dict__.get('__events__', ()))
+        for name in self.__event_types:
+            if not hasattr(self, name):
+                raise Exception('Missing default handler %s in %s.'
+                                % (name, type(self).__name__))
+        for name, value in kwargs.items():
+            if self.__property(name) is None:
+                raise TypeError('%s got an unexpected keyword argument %s.'
+                                % (type(self).__name__, name))
+            setattr(self, name, value)
+
+    def bind(self, **kwargs):
+        for name, callback in kwargs.items():
+            self.fbind(name, callback)
+
+    def unbind(self, **kwargs):
+        for name, callback in kwargs.items():
+            self.funbind(name, callback)
+
+    def fbind(self, name, callback, *largs):
+        """
+        Binds the callback to the event or property, passing the given
+        arguments ahead of the dispatched ones.
+        :return: True.
+        """
+        if name not in self.__event_types and self.__property(name) is None:
+            raise KeyError('%s has no event or property %s.'
+                           % (type(self).__name__, name))
+        self.__observers.setdefault(name, []).append((callback, largs))
+        return True
+
+    def funbind(self, name, callback, *largs):
+        observers = self.__observers.get(name, [])
+        if (callback, largs) in observers:
+            observers.remove((callback, largs))
+
+    def dispatch(self, event_type, *args):
+        """
+        Calls the handlers of the event.
+        :return: True if a handler stopped the dispatch, else None.
+        """
+        for callback, largs in reversed(
+                list(self.__observers.get(event_type, []))):
+            if callback(*(largs + (self,) + args)):
+                return True
+        return getattr(self, event_type)(*args)
+
+    def _dispatch_property(self, name, value):
+        default_handler = getattr(self, 'on_' + name, None)
+        if default_handler is not None:
+            default_handler(self, value)
+        for callback, largs in list(self.__observers.get(name, [])):
+            callback(*(largs + (self, value)))
+
+    def __property(self, name):
+        attribute = getattr(type(self), name, None)
+        return attribute if isinstance(attribute, Property) else None
+
+
+class ClockEvent:
+    """
+    A callback scheduled on the headless clock.
+    """
+
+    def __init__(self, clock, callback, timeout, interval):
+        self.callback = callback
+        self.timeout = timeout
+        self.interval = interval
+        self.deadline = None
+        self.last_time = None
+        self.__clock = clock
+
+    def __call__(self, *args):
+        """
+        Schedules the event unless it is scheduled already, which makes it
+        usable as a trigger.
+        :return:
+        """
+        self.__clock.schedule_event(self)
+
+    def cancel(self):
+        self.__clock.unschedule(self)
+
+
+class HeadlessClock:
+    """
+    Runs scheduled callbacks in the thread calling run, in place of the Kivy
+    clock and its window loop.
+
+    Callbacks scheduled with an interval of 0 are called once per frame. The
+    loop sleeps until the next deadline, so an idle clock costs no cpu time;
+    scheduling from another thread wakes it up.
+    """
+
+    def __init__(self, frame_time: float = 1 / 30.):
+        """
+        :param frame_time: The time in seconds between two frames.
+        """
+        self.__frame_time = frame_time
+        self.__condition = Condition()
+        self.__events = []
+        self.__running = False
+        self.__frames = 0
+
+    def schedule_once(self, callback, timeout: float = 0):
+        event = ClockEvent(self, callback, timeout, None)
+        self.schedule_event(event)
+        return event
+
+    def schedule_interval(self, callback, timeout: float):
+        event = ClockEvent(self, callback, timeout, timeout)
+        self.schedule_event(event)
+        return event
+
+    def create_trigger(self, callback, timeout: float = 0):
+        return ClockEvent(self, callback, timeout, None)
+
+    def schedule_event(self, event):
+        with self.__condition:
+            if event in self.__events:
+                return
+            event.last_time = time.monotonic()
+            event.deadline = event.last_time + max(0., event.timeout)
+            self.__events.append(event)
+            self.__condition.notify()
+
+    def unschedule(self, event):
+        """
+        :param event: The clock event or the callback to unschedule.
+        :return:
+        """
+        with self.__condition:
+            self.__events = [
+                scheduled for scheduled in self.__events
+                if scheduled is not event and scheduled.callback != event]
+
+    def tick(self):
+        """
+        Calls all callbacks which are due.
+        :return:
+        """
+        now = time.monotonic()
+        with self.__condition:
+            due = sorted((event for event in self.__events
+                          if event.deadline <= now),
+                         key=lambda event: event.deadline)
+        self.__frames += 1
+
+        for event in due:
+            with self.__condition:
+                if event not in self.__events:
+                    continue
+                if event.interval is None:
+                    self.__events.remove(event)
+                elif event.interval and \
+                        event.deadline + event.interval > now:
+                    event.deadline += event.interval
+                else:
+                    event.deadline = now + (event.interval or self.__frame_time)
+            dt = now - event.last_time
+            event.last_time = now
+            if event.callback(dt) is False and event.interval is not None:
+                self.unschedule(event)
+
+    def run(self):
+        """
+        Calls the scheduled callbacks until stop is called.
+        :return:
+        """
+        with self.__condition:
+            self.__running = True
+        while True:
+            with self.__condition:
+                while self.__running:
+                    timeout = self.__time_to_next_event()
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self.__condition.wait(timeout)
+                if not self.__running:
+                    return
+            self.tick()
+
+    def stop(self):
+        with self.__condition:
+            self.__running = False
+            self.__condition.notify()
+
+    def statistics(self):
+        """
+        Returns the number of frames and of scheduled events.
+        :return: A dictionary of the counter values.
+        """
+        with self.__condition:
+            return {
+                'frames': self.__frames,
+                'scheduledEvents': len(self.__events)
+            }
+
+    def __time_to_next_event(self):
+        if not self.__events:
+            return None
+        return min(event.deadline for event in self.__events) \
+            - time.monotonic()
+
+
+Clock = HeadlessClock()
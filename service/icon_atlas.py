@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import tempfile
+from json import JSONDecodeError
+from os.path import abspath, dirname, join, splitext
+
+from service.write_behind_persister import write_atomically
+
+ROOT_DIRECTORY = dirname(dirname(abspath(__file__)))
+ICON_DIRECTORY = join(ROOT_DIRECTORY, 'icons')
+CACHE_DIRECTORY = join(ROOT_DIRECTORY, '.cache')
+
+ATLAS_NAME = 'icons'
+
+
+class IconAtlas:
+    """
+    Packs the material icons into a Kivy texture atlas which is cached on
+    disk and rebuilt only when the icon set changes.
+
+    Rows and popups reference the icons by their atlas region, so after the
+    atlas was loaded once, showing an icon does not touch the file system.
+    Icons which are not part of the atlas fall back to their png file.
+    """
+
+    def __init__(self, icon_directory=ICON_DIRECTORY,
+                 cache_directory=CACHE_DIRECTORY, icon_size: int = 128,
+                 page_size: int = 1024):
+        """
+        :param icon_directory: The directory of the png icons.
+        :param cache_directory: The directory to store the atlas in.
+        :param icon_size: The edge length in pixels the icons are scaled to.
+        :param page_size: The edge length in pixels of an atlas page.
+        """
+        self.__icon_directory = icon_directory
+        self.__atlas_path = join(cache_directory, ATLAS_NAME)
+        self.__manifest_path = self.__atlas_path + '.manifest'
+        self.__icon_size = icon_size
+        self.__page_size = page_size
+        self.__ids = frozenset()
+
+    def load(self):
+        """
+        Uses the cached atlas if it was built from the current icon set and
+        builds a new one otherwise.
+        :return: True if the atlas is available, else False.
+        """
+        icon_names = self.__icon_names()
+        digest = self.__digest(icon_names)
+
+        manifest = self.__read_manifest()
+        if manifest is not None and manifest.get('digest') == digest \
+                and os.path.exists(self.__atlas_path + '.atlas'):
+            self.__ids = frozenset(manifest['ids'])
+            return True
+
+        if self.__build(icon_names):
+            os.makedirs(dirname(self.__manifest_path), exist_ok=True)
+            write_atomically(self.__manifest_path, json.dumps({
+                'digest': digest,
+                'ids': [splitext(name)[0] for name in icon_names]
+            }).encode('utf-8'))
+            self.__ids = frozenset(splitext(name)[0] for name in icon_names)
+            return True
+
+        self.__ids = frozenset()
+        return False
+
+    def source(self, image_name):
+        """
+        :param image_name: The name of the icon without extension.
+        :return: The atlas url of the icon or the path of its png file if
+        the icon is not part of the atlas.
+        """
+        if image_name in self.__ids:
+            return 'atlas://%s/%s' % (self.__atlas_path, image_name)
+        return join(self.__icon_directory, image_name + '.png')
+
+    def __icon_names(self):
+        return sorted(name for name in os.listdir(self.__icon_directory)
+                      if name.endswith('.png'))
+
+    def __digest(self, icon_names):
+        """
+        Summarizes the icon set by names, sizes and modification times along
+        with the atlas layout parameters.
+        :param icon_names: The sorted file names of the icons.
+        :return: The hex digest of the icon set.
+        """
+        digest = hashlib.sha1(
+            ('%d %d' % (self.__icon_size, self.__page_size)).encode('utf-8'))
+        for name in icon_names:
+            status = os.stat(join(self.__icon_directory, name))
+            digest.update(('\n%s %d %d' % (
+                name, status.st_size, status.st_mtime_ns)).encode('utf-8'))
+        return digest.hexdigest()
+
+    def __read_manifest(self):
+        if not os.path.exists(self.__manifest_path):
+            return None
+        try:
+            with open(self.__manifest_path) as manifest:
+                return json.load(manifest)
+        except JSONDecodeError:
+            return None
+
+    def __build(self, icon_names):
+        """
+        Scales the icons down and packs them into the atlas pages.
+        :param icon_names: The sorted file names of the icons.
+        :return: True on success, else False.
+        """
+        try:
+            from kivy.atlas import Atlas
+            from PIL import Image as PilImage
+        except ImportError as e:
+            print('[IconAtlas] Could not build the icon atlas, using the png '
+                  'files. %s' % str(e))
+            return False
+
+        os.makedirs(dirname(self.__atlas_path), exist_ok=True)
+        with tempfile.TemporaryDirectory() as scaled_directory:
+            scaled_paths = []
+            for name in icon_names:
+                image = PilImage.open(join(self.__icon_directory, name))
+                image.thumbnail((self.__icon_size, self.__icon_size),
+                                PilImage.LANCZOS)
+                scaled_path = join(scaled_directory, name)
+                image.save(scaled_path)
+                scaled_paths.append(scaled_path)
+
+            result = Atlas.create(self.__atlas_path, scaled_paths,
+                                  self.__page_size, use_path=False)
+
+        if not result:
+            print('[IconAtlas] Could not pack %d icons into pages of %d '
+                  'pixels.' % (len(icon_names), self.__page_size))
+            return False
+
+        print('[IconAtlas] Built the icon atlas "%s.atlas".' % self.__atlas_path)
+        return True
+
+
+_icon_atlas = None
+
+
+def icon_atlas():
+    """
+    :return: The shared icon atlas of the material icons, loaded on first use.
+    """
+    global _icon_atlas
+    if _icon_atlas is None:
+        _icon_atlas = IconAtlas()
+        _icon_atlas.load()
+    return _icon_atlas
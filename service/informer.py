@@ -1,27 +1,155 @@
+from threading import Lock
+
+from kivy.clock import Clock
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.image import Image
 from kivy.uix.label import Label
 from kivy.uix.popup import Popup
 
+from service.icon_atlas import icon_atlas
+
 
 class Informer:
+    """
+    Shows notifications to the user in a popup.
+
+    Requests may come from any thread and are shown on the main thread with
+    the next frame. A request equal to the pending or shown message is
+    dropped, a newer message replaces a stale pending one and the content of
+    an open popup instead of stacking a further popup. The popup and its
+    widgets are created once and reused for every message.
+    """
+
+    __lock = Lock()
+    __trigger = None
+    __pending = None
+    __shown = None
+
+    __popup = None
+    __box = None
+    __label = None
+    __image = None
+    __content = None
+
+    __requests = 0
+    __coalesced = 0
+    __replaced = 0
+    __shown_count = 0
+
     @staticmethod
     def show_popup(title, text):
-        Informer.__show_ok_pop(title, Label(text=text))
+        Informer.__request((title, text, None))
 
     @staticmethod
     def show_smiley_popup(title):
-        Informer.__show_ok_pop(title, Image(source='icons/smiley.png'))
+        Informer.__request((title, None, icon_atlas().source('smiley')))
 
     @staticmethod
     def show_ok_pop(title, widget):
-        button = Button(text='OK')
-        box = BoxLayout(orientation='vertical')
-        box.add_widget(widget)
-        box.add_widget(button)
-        popup = Popup(
-            title=title, content=box,
-            size_hint=(None, None), size=(600, 300))
-        button.bind(on_press=popup.dismiss)
-        popup.open()
\ No newline at end of file
+        """
+        Shows the given widget in the popup; to be called on the main thread.
+        :param title: The popup title.
+        :param widget: The widget to show above the ok button.
+        :return:
+        """
+        Informer.__show(title, widget)
+
+    @staticmethod
+    def statistics():
+        """
+        Returns the notification counters.
+        :return: A dictionary of the counter values.
+        """
+        with Informer.__lock:
+            return {
+                'requests': Informer.__requests,
+                'coalesced': Informer.__coalesced,
+                'replaced': Informer.__replaced,
+                'shown': Informer.__shown_count
+            }
+
+    @staticmethod
+    def __request(message):
+        """
+        Stores the message as pending and triggers showing it on the main
+        thread.
+        :param message: The tuple of title, text and image source.
+        :return:
+        """
+        with Informer.__lock:
+            Informer.__requests += 1
+            if message == Informer.__pending or (
+                    Informer.__pending is None
+                    and message == Informer.__shown):
+                Informer.__coalesced += 1
+                return
+            if Informer.__pending is not None:
+                Informer.__replaced += 1
+            Informer.__pending = message
+
+            if Informer.__trigger is None:
+                Informer.__trigger = Clock.create_trigger(
+                    Informer.__show_pending)
+        Informer.__trigger()
+
+    @staticmethod
+    def __show_pending(dt):
+        """
+        Shows the pending message in the popup.
+        :param dt: The time elapsed since the trigger.
+        :return:
+        """
+        with Informer.__lock:
+            message = Informer.__pending
+            Informer.__pending = None
+            if message is None:
+                return
+            Informer.__shown = message
+            Informer.__shown_count += 1
+
+        title, text, source = message
+        if text is not None:
+            if Informer.__label is None:
+                Informer.__label = Label()
+            Informer.__label.text = text
+            widget = Informer.__label
+        else:
+            if Informer.__image is None:
+                Informer.__image = Image()
+            Informer.__image.source = source
+            widget = Informer.__image
+        Informer.__show(title, widget)
+
+    @staticmethod
+    def __show(title, widget):
+        """
+        Puts the widget into the reused popup and opens it unless it is open
+        already.
+        :param title: The popup title.
+        :param widget: The widget to show above the ok button.
+        :return:
+        """
+        if Informer.__popup is None:
+            button = Button(text='OK')
+            Informer.__box = BoxLayout(orientation='vertical')
+            Informer.__box.add_widget(button)
+            Informer.__popup = Popup(
+                content=Informer.__box, size_hint=(None, None), size=(600, 300))
+            Informer.__popup.bind(on_dismiss=Informer.__on_dismiss)
+            button.bind(on_press=Informer.__popup.dismiss)
+
+        if Informer.__content is not widget:
+            if Informer.__content is not None:
+                Informer.__box.remove_widget(Informer.__content)
+            Informer.__box.add_widget(widget, index=1)
+            Informer.__content = widget
+
+        Informer.__popup.title = title
+        if Informer.__popup.parent is None:
+            Informer.__popup.open()
+
+    @staticmethod
+    def __on_dismiss(popup):
+        with Informer.__lock:
+            Informer.__shown = None
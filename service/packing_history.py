@@ -0,0 +1,247 @@
+import datetime
+import sqlite3
+import time
+from threading import RLock
+
+from service.sqlite_store import _Transaction
+
+EVENT_INSERT = 0
+EVENT_REMOVE = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS materials (
+    id INTEGER PRIMARY KEY,
+    uid TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS events (
+    time INTEGER NOT NULL,
+    material INTEGER NOT NULL REFERENCES materials (id),
+    kind INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_material_time ON events (material, time);
+CREATE TABLE IF NOT EXISTS daily_counters (
+    day INTEGER NOT NULL,
+    material INTEGER NOT NULL REFERENCES materials (id),
+    inserts INTEGER NOT NULL DEFAULT 0,
+    removes INTEGER NOT NULL DEFAULT 0,
+    needed INTEGER NOT NULL DEFAULT 0,
+    missed INTEGER NOT NULL DEFAULT 0,
+    superfluous INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, material)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS daily_counters_material
+    ON daily_counters (material, day);
+"""
+
+
+class PackingHistory:
+    """
+    Logs every insert and remove of a material and the final packing state
+    of each day in a SQLite database.
+
+    Unique ids are stored once and referenced by integer ids. Besides the
+    raw events, per day and material counters are maintained on every write,
+    so aggregate queries like the miss rate read one counter row per day and
+    material instead of scanning the events.
+    """
+
+    def __init__(self, database_path):
+        """
+        Opens or creates the history database.
+        :param database_path: The path of the database file.
+        """
+        self.__lock = RLock()
+        self.__database_path = database_path
+        self.__connection = None
+        self.__material_ids = {}
+        self.__new_material_ids = {}
+        self.reopen()
+
+    def close(self):
+        with self.__lock:
+            if self.__connection is not None:
+                self.__connection.close()
+                self.__connection = None
+
+    def reopen(self):
+        """
+        Opens the database again after close.
+        :return:
+        """
+        with self.__lock:
+            if self.__connection is not None:
+                return
+            self.__connection = sqlite3.connect(
+                self.__database_path, check_same_thread=False,
+                isolation_level=None)
+            self.__connection.execute('PRAGMA journal_mode=WAL')
+            self.__connection.execute('PRAGMA synchronous=NORMAL')
+            self.__connection.executescript(SCHEMA)
+            self.__material_ids = {
+                uid: material for material, uid in
+                self.__connection.execute('SELECT id, uid FROM materials')}
+
+    def record_changes(self, inserted, removed, timestamp=None):
+        """
+        Logs the inserted and removed materials and counts them for the day.
+        :param inserted: The unique ids put into the bag.
+        :param removed: The unique ids taken out of the bag.
+        :param timestamp: The unix time of the changes; now if None.
+        :return:
+        """
+        if not inserted and not removed:
+            return
+        if timestamp is None:
+            timestamp = time.time()
+        day = datetime.date.fromtimestamp(timestamp).toordinal()
+
+        with self.__lock, self.__transaction():
+            rows = [(int(timestamp), self.__material_id(uid), EVENT_INSERT)
+                    for uid in inserted] \
+                + [(int(timestamp), self.__material_id(uid), EVENT_REMOVE)
+                   for uid in removed]
+            self.__connection.executemany(
+                'INSERT INTO events (time, material, kind) VALUES (?, ?, ?)',
+                rows)
+            for _, material, kind in rows:
+                column = 'inserts' if kind == EVENT_INSERT else 'removes'
+                self.__ensure_counters(day, material)
+                self.__connection.execute(
+                    'UPDATE daily_counters SET %s = %s + 1 '
+                    'WHERE day = ? AND material = ?' % (column, column),
+                    (day, material))
+
+    def close_day(self, date: datetime.date, target_content, content_to_insert,
+                  content_to_remove):
+        """
+        Records the final packing state of a day. Closing a day again
+        replaces its previous state, e.g. when the app was restarted.
+        :param date: The day to close.
+        :param target_content: The unique ids needed on the day.
+        :param content_to_insert: The needed unique ids not packed.
+        :param content_to_remove: The packed unique ids not needed.
+        :return:
+        """
+        day = date.toordinal()
+        with self.__lock, self.__transaction():
+            self.__connection.execute(
+                'UPDATE daily_counters SET needed = 0, missed = 0, '
+                'superfluous = 0 WHERE day = ?', (day,))
+            for column, uids in (('needed', target_content),
+                                 ('missed', content_to_insert),
+                                 ('superfluous', content_to_remove)):
+                for uid in uids:
+                    material = self.__material_id(uid)
+                    self.__ensure_counters(day, material)
+                    self.__connection.execute(
+                        'UPDATE daily_counters SET %s = 1 '
+                        'WHERE day = ? AND material = ?' % column,
+                        (day, material))
+
+    def miss_rates(self, weeks: int = 4, today: datetime.date = None):
+        """
+        Determines how often each material was not packed on the days it was
+        needed.
+        :param weeks: The number of weeks to look back.
+        :param today: The last day to include; the current day if None.
+        :return: The list of (unique id, needed days, missed days, miss rate)
+        tuples, ordered by descending miss rate.
+        """
+        if today is None:
+            today = datetime.date.today()
+        first_day = today.toordinal() - 7 * weeks + 1
+
+        with self.__lock:
+            rows = self.__connection.execute(
+                'SELECT materials.uid, SUM(needed), SUM(missed) '
+                'FROM daily_counters '
+                'JOIN materials ON materials.id = daily_counters.material '
+                'WHERE day BETWEEN ? AND ? AND needed = 1 '
+                'GROUP BY daily_counters.material',
+                (first_day, today.toordinal())).fetchall()
+        return sorted(((uid, needed, missed, missed / needed)
+                       for uid, needed, missed in rows),
+                      key=lambda row: (-row[3], row[0]))
+
+    def daily_counters(self, uid, weeks: int = 4, today: datetime.date = None):
+        """
+        :param uid: The unique id of the material.
+        :param weeks: The number of weeks to look back.
+        :param today: The last day to include; the current day if None.
+        :return: The list of (date, inserts, removes, needed, missed,
+        superfluous) tuples of the material in ascending date order.
+        """
+        if today is None:
+            today = datetime.date.today()
+        material = self.__material_ids.get(uid)
+        if material is None:
+            return []
+
+        with self.__lock:
+            rows = self.__connection.execute(
+                'SELECT day, inserts, removes, needed, missed, superfluous '
+                'FROM daily_counters WHERE material = ? '
+                'AND day BETWEEN ? AND ? ORDER BY day',
+                (material, today.toordinal() - 7 * weeks + 1,
+                 today.toordinal())).fetchall()
+        return [(datetime.date.fromordinal(day),) + tuple(counters)
+                for day, *counters in rows]
+
+    def statistics(self):
+        """
+        Returns the number of stored materials, events and counter rows.
+        :return: A dictionary of the counter values.
+        """
+        with self.__lock:
+            return {
+                'materials': len(self.__material_ids),
+                'events': self.__connection.execute(
+                    'SELECT COUNT(*) FROM events').fetchone()[0],
+                'dailyCounters': self.__connection.execute(
+                    'SELECT COUNT(*) FROM daily_counters').fetchone()[0]
+            }
+
+    def __material_id(self, uid):
+        """
+        Looks up the integer id of a unique id, storing the unique id if it
+        is new. A new id is cached once its transaction is committed.
+        :param uid: The unique id of the material.
+        :return: The integer id.
+        """
+        material = self.__material_ids.get(uid)
+        if material is None:
+            material = self.__new_material_ids.get(uid)
+        if material is None:
+            material = self.__connection.execute(
+                'INSERT INTO materials (uid) VALUES (?)', (uid,)).lastrowid
+            self.__new_material_ids[uid] = material
+        return material
+
+    def __transaction(self):
+        return _HistoryTransaction(self.__connection, self.__material_ids,
+                                   self.__new_material_ids)
+
+    def __ensure_counters(self, day, material):
+        self.__connection.execute(
+            'INSERT OR IGNORE INTO daily_counters (day, material) '
+            'VALUES (?, ?)', (day, material))
+
+
+class _HistoryTransaction(_Transaction):
+    """
+    Transaction which moves the material ids created within it into the
+    cache on commit and forgets them on rollback.
+    """
+
+    def __init__(self, connection, material_ids, new_material_ids):
+        super().__init__(connection)
+        self.__material_ids = material_ids
+        self.__new_material_ids = new_material_ids
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            return super().__exit__(exc_type, exc_value, traceback)
+        finally:
+            if exc_type is None:
+                self.__material_ids.update(self.__new_material_ids)
+            self.__new_material_ids.clear()
@@ -0,0 +1,133 @@
+import json
+import os
+import time
+from json import JSONDecodeError
+from threading import Lock
+
+from service.write_behind_persister import WriteBehindPersister
+
+
+class PendingTagStore:
+    """
+    Keeps the unknown tags which wait for their registration in the companion
+    app, in the order of their first read.
+
+    Membership tests and insertions take constant time and bursts of new tags
+    are written to the new tags file in a single batch.
+    """
+
+    def __init__(self, new_tags_file_path, flush_period: float = 1.):
+        """
+        :param new_tags_file_path: The path of the new tags file.
+        :param flush_period: The time in seconds without further changes
+        after which the file is written.
+        """
+        self.__new_tags_file_path = new_tags_file_path
+        self.__tags = {}
+        self.__lock = Lock()
+        self.__persister = WriteBehindPersister(
+            new_tags_file_path, self.__serialize, quiet_period=flush_period)
+
+    def __contains__(self, uid):
+        return uid in self.__tags
+
+    def __iter__(self):
+        return iter(list(self.__tags))
+
+    def __len__(self):
+        return len(self.__tags)
+
+    def first_seen(self, uid):
+        return self.__tags[uid][0]
+
+    def last_seen(self, uid):
+        return self.__tags[uid][1]
+
+    def load(self):
+        """
+        Replaces the pending tags with the content of the new tags file.
+        :return:
+        """
+        tags = {}
+        if os.stat(self.__new_tags_file_path).st_size != 0:
+            try:
+                with open(self.__new_tags_file_path) as file:
+                    tags_object = json.load(file)
+            except JSONDecodeError as e:
+                print('[PendingTagStore] Could not read the new tags file '
+                      '"%s". %s' % (self.__new_tags_file_path, str(e)))
+                tags_object = {'tags': []}
+
+            seen = tags_object.get('seen', {})
+            for uid in tags_object['tags']:
+                timestamps = seen.get(uid, {})
+                tags[uid] = [timestamps.get('firstSeen'),
+                             timestamps.get('lastSeen')]
+
+        with self.__lock:
+            self.__tags = tags
+
+    def add(self, uid):
+        """
+        Adds an unknown tag or updates the time it was last seen.
+        :param uid: The unique id of the tag.
+        :return: True if the tag was not pending yet, else False.
+        """
+        now = time.time()
+        with self.__lock:
+            timestamps = self.__tags.get(uid)
+            is_new = timestamps is None
+            if is_new:
+                self.__tags[uid] = [now, now]
+            else:
+                timestamps[1] = now
+        self.__persister.schedule()
+        return is_new
+
+    def discard_known(self, known_tags):
+        """
+        Removes all tags which were registered in the meantime.
+        :param known_tags: The collection of registered unique ids.
+        :return: The list of removed unique ids.
+        """
+        with self.__lock:
+            if len(self.__tags) <= len(known_tags):
+                removed = [uid for uid in self.__tags if uid in known_tags]
+            else:
+                removed = [uid for uid in known_tags if uid in self.__tags]
+            for uid in removed:
+                del self.__tags[uid]
+
+        if removed:
+            self.__persister.schedule()
+        return removed
+
+    def flush(self):
+        """
+        Writes pending changes to the new tags file immediately.
+        :return:
+        """
+        self.__persister.close()
+
+    def statistics(self):
+        """
+        Returns the number of pending tags and the file write counters.
+        :return: A dictionary of the counter values.
+        """
+        statistics = self.__persister.statistics()
+        statistics['tags'] = len(self.__tags)
+        return statistics
+
+    def __serialize(self):
+        """
+        Converts the pending tags to the content of the new tags file.
+        :return: The json encoded tags.
+        """
+        with self.__lock:
+            tags_object = {
+                'tags': list(self.__tags),
+                'seen': {
+                    uid: {'firstSeen': first_seen, 'lastSeen': last_seen}
+                    for uid, (first_seen, last_seen) in self.__tags.items()}
+            }
+        return json.dumps(tags_object).encode('utf-8')
@@ -0,0 +1,364 @@
+import hashlib
+import json
+import sqlite3
+from threading import RLock
+
+from service.write_behind_persister import write_atomically
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday',
+            'saturday', 'sunday']
+
+SETTING_KEYS = ['gender', 'birthday', 'height', 'weight', 'bagWeight',
+                'lightingMode', 'animationType']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    uid TEXT PRIMARY KEY,
+    material_name TEXT NOT NULL,
+    img_name TEXT NOT NULL,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS tag_weekdays (
+    weekday INTEGER NOT NULL,
+    uid TEXT NOT NULL REFERENCES tags (uid) ON DELETE CASCADE,
+    PRIMARY KEY (weekday, uid)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tag_weekdays_uid ON tag_weekdays (uid);
+CREATE TABLE IF NOT EXISTS current_content (
+    uid TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS new_tags (
+    uid TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+EXPORTED_DIGEST_KEY = 'exportedDigest'
+
+
+class SqliteStore:
+    """
+    Stores the settings, the registered tags with their weekdays and the
+    current content in a SQLite database in WAL mode.
+
+    The data is exchanged in the schema of the json settings file, with the
+    weekday flags of a tag kept in an indexed table. The digest of the last
+    exported or imported json file is kept as well, so changes made to the
+    file while the database was not watching it can be detected.
+    """
+
+    def __init__(self, database_path):
+        """
+        Opens or creates the database.
+        :param database_path: The path of the database file.
+        """
+        self.__lock = RLock()
+        self.__database_path = database_path
+        self.__connection = None
+        self.__snapshot = None
+        self.reopen()
+
+    def close(self):
+        with self.__lock:
+            if self.__connection is not None:
+                self.__connection.close()
+                self.__connection = None
+
+    def reopen(self):
+        """
+        Opens the database again after close.
+        :return:
+        """
+        with self.__lock:
+            if self.__connection is not None:
+                return
+            self.__connection = sqlite3.connect(
+                self.__database_path, check_same_thread=False,
+                isolation_level=None)
+            self.__connection.execute('PRAGMA journal_mode=WAL')
+            self.__connection.execute('PRAGMA synchronous=NORMAL')
+            self.__connection.execute('PRAGMA foreign_keys=ON')
+            self.__connection.executescript(SCHEMA)
+
+    def is_empty(self):
+        """
+        :return: True if no settings were stored yet, else False.
+        """
+        with self.__lock:
+            return self.__connection.execute(
+                'SELECT COUNT(*) FROM settings').fetchone()[0] == 0
+
+    def load(self):
+        """
+        Reads all settings.
+        :return: The settings in the schema of the json settings file.
+        """
+        with self.__lock:
+            settings = {
+                key: json.loads(value) for key, value in
+                self.__connection.execute('SELECT key, value FROM settings')}
+            settings['tags'] = self.__load_tags()
+            settings['currentContent'] = [
+                uid for uid, in self.__connection.execute(
+                    'SELECT uid FROM current_content ORDER BY position')]
+            self.__snapshot = self.__copy(settings)
+            return settings
+
+    def exported_digest(self):
+        """
+        :return: The digest of the json settings file last exported or
+        imported or None.
+        """
+        with self.__lock:
+            row = self.__connection.execute(
+                'SELECT value FROM metadata WHERE key = ?',
+                (EXPORTED_DIGEST_KEY,)).fetchone()
+            return None if row is None else row[0]
+
+    def set_exported_digest(self, digest):
+        """
+        :param digest: The digest of the json settings file content which
+        matches the stored settings.
+        :return:
+        """
+        with self.__lock, self.__transaction():
+            self.__connection.execute(
+                'INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)',
+                (EXPORTED_DIGEST_KEY, digest))
+
+    def save(self, settings):
+        """
+        Stores the differences between the given settings and the settings
+        last loaded or saved within a single transaction.
+        :param settings: The settings in the schema of the json settings file.
+        :return:
+        """
+        with self.__lock:
+            old = self.__snapshot if self.__snapshot is not None \
+                else self.load()
+            with self.__transaction():
+                for key in SETTING_KEYS:
+                    if key in settings and settings[key] != old.get(key):
+                        self.__put_setting(key, settings[key])
+
+                old_tags, new_tags = old['tags'], settings['tags']
+                for uid in old_tags:
+                    if uid not in new_tags:
+                        self.__delete_tag(uid)
+                for uid, tag in new_tags.items():
+                    if old_tags.get(uid) != tag:
+                        self.__put_tag(uid, tag)
+
+                if list(settings['currentContent']) != old['currentContent']:
+                    self.__replace_content(settings['currentContent'])
+            self.__snapshot = self.__copy(settings)
+
+    def set_setting(self, key, value):
+        """
+        Stores a single setting.
+        :param key: The key of the setting in the json settings file.
+        :param value: The new value.
+        :return:
+        """
+        with self.__lock, self.__transaction():
+            self.__put_setting(key, value)
+            if self.__snapshot is not None:
+                self.__snapshot[key] = value
+
+    def put_tag(self, uid, tag):
+        """
+        Adds or replaces a tag.
+        :param uid: The unique id of the tag.
+        :param tag: The tag in the schema of the json settings file.
+        :return:
+        """
+        with self.__lock, self.__transaction():
+            self.__put_tag(uid, tag)
+            if self.__snapshot is not None:
+                self.__snapshot['tags'][uid] = dict(tag)
+
+    def delete_tag(self, uid):
+        """
+        Removes a tag and its weekdays.
+        :param uid: The unique id of the tag.
+        :return:
+        """
+        with self.__lock, self.__transaction():
+            self.__delete_tag(uid)
+            if self.__snapshot is not None:
+                self.__snapshot['tags'].pop(uid, None)
+
+    def insert_content(self, uid):
+        """
+        Adds a tag to the current content.
+        :param uid: The unique id of the tag.
+        :return:
+        """
+        with self.__lock, self.__transaction():
+            self.__connection.execute(
+                'INSERT OR IGNORE INTO current_content (uid, position) '
+                'SELECT ?, COALESCE(MAX(position), -1) + 1 '
+                'FROM current_content', (uid,))
+            if self.__snapshot is not None \
+                    and uid not in self.__snapshot['currentContent']:
+                self.__snapshot['currentContent'].append(uid)
+
+    def remove_content(self, uid):
+        """
+        Removes a tag from the current content.
+        :param uid: The unique id of the tag.
+        :return:
+        """
+        with self.__lock, self.__transaction():
+            self.__connection.execute(
+                'DELETE FROM current_content WHERE uid = ?', (uid,))
+            if self.__snapshot is not None \
+                    and uid in self.__snapshot['currentContent']:
+                self.__snapshot['currentContent'].remove(uid)
+
+    def load_new_tags(self):
+        with self.__lock:
+            return [uid for uid, in self.__connection.execute(
+                'SELECT uid FROM new_tags ORDER BY position')]
+
+    def save_new_tags(self, uids):
+        with self.__lock, self.__transaction():
+            self.__connection.execute('DELETE FROM new_tags')
+            self.__connection.executemany(
+                'INSERT OR IGNORE INTO new_tags (uid, position) VALUES (?, ?)',
+                [(uid, position) for position, uid in enumerate(uids)])
+
+    def import_json(self, settings_file_path, new_tags_file_path=None):
+        """
+        Replaces the stored data with the content of the json files.
+        :param settings_file_path: The path of the json settings file.
+        :param new_tags_file_path: The path of the new tags file or None.
+        :return:
+        """
+        with open(settings_file_path, 'rb') as file:
+            content = file.read()
+        self.save(json.loads(content.decode('utf-8')))
+        self.set_exported_digest(digest(content))
+
+        if new_tags_file_path is None:
+            return
+        with open(new_tags_file_path) as file:
+            self.save_new_tags(json.load(file)['tags'])
+
+    def export_json(self, settings_file_path, new_tags_file_path=None):
+        """
+        Writes the stored data to the json files.
+        :param settings_file_path: The path of the json settings file.
+        :param new_tags_file_path: The path of the new tags file or None.
+        :return:
+        """
+        content = json.dumps(self.load()).encode('utf-8')
+        write_atomically(settings_file_path, content)
+        self.set_exported_digest(digest(content))
+
+        if new_tags_file_path is None:
+            return
+        write_atomically(
+            new_tags_file_path,
+            json.dumps({'tags': self.load_new_tags()}).encode('utf-8'))
+
+    def __transaction(self):
+        return _Transaction(self.__connection)
+
+    def __load_tags(self):
+        weekdays = {}
+        for weekday, uid in self.__connection.execute(
+                'SELECT weekday, uid FROM tag_weekdays'):
+            weekdays.setdefault(uid, []).append(weekday)
+
+        return {
+            uid: self.__tag_from_row(
+                (material_name, img_name, extra), weekdays.get(uid, []))
+            for uid, material_name, img_name, extra in self.__connection.execute(
+                'SELECT uid, material_name, img_name, extra FROM tags')}
+
+    def __put_setting(self, key, value):
+        self.__connection.execute(
+            'INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
+            (key, json.dumps(value)))
+
+    def __put_tag(self, uid, tag):
+        # Weekdays flagged "1" are kept in the index table, any other key is
+        # kept as json to reproduce the tag exactly on export.
+        extra = {
+            key: value for key, value in tag.items()
+            if key not in ('materialName', 'imgName')
+            and not (key in WEEKDAYS and value == '1')}
+        self.__connection.execute(
+            'INSERT OR REPLACE INTO tags (uid, material_name, img_name, extra) '
+            'VALUES (?, ?, ?, ?)',
+            (uid, tag.get('materialName', ''), tag.get('imgName', ''),
+             json.dumps(extra)))
+        self.__connection.execute(
+            'DELETE FROM tag_weekdays WHERE uid = ?', (uid,))
+        self.__connection.executemany(
+            'INSERT INTO tag_weekdays (weekday, uid) VALUES (?, ?)',
+            [(weekday, uid) for weekday, name in enumerate(WEEKDAYS)
+             if tag.get(name) == '1'])
+
+    def __delete_tag(self, uid):
+        self.__connection.execute('DELETE FROM tags WHERE uid = ?', (uid,))
+
+    def __replace_content(self, uids):
+        self.__connection.execute('DELETE FROM current_content')
+        self.__connection.executemany(
+            'INSERT OR IGNORE INTO current_content (uid, position) '
+            'VALUES (?, ?)',
+            [(uid, position) for position, uid in enumerate(uids)])
+
+    @staticmethod
+    def __tag_from_row(row, weekdays):
+        material_name, img_name, extra = row
+        tag = {'materialName': material_name, 'imgName': img_name}
+        tag.update(json.loads(extra))
+        for weekday in weekdays:
+            tag[WEEKDAYS[weekday]] = '1'
+        return tag
+
+    @staticmethod
+    def __copy(settings):
+        copy = {key: settings[key] for key in SETTING_KEYS if key in settings}
+        copy['tags'] = {
+            uid: dict(tag) for uid, tag in settings.get('tags', {}).items()}
+        copy['currentContent'] = list(settings.get('currentContent', []))
+        return copy
+
+
+def digest(content: bytes):
+    """
+    :param content: The content of a json settings file.
+    :return: The digest identifying the content.
+    """
+    return hashlib.sha1(content).hexdigest()
+
+
+class _Transaction:
+    """
+    Context manager wrapping a block of statements into a single
+    transaction.
+    """
+
+    def __init__(self, connection):
+        self.__connection = connection
+
+    def __enter__(self):
+        self.__connection.execute('BEGIN IMMEDIATE')
+        return self.__connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__connection.execute('COMMIT' if exc_type is None else 'ROLLBACK')
+        return False
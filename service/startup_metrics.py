@@ -0,0 +1,39 @@
+import time
+
+# Imported first by the entry points, so this approximates the process start.
+START_TIME = time.perf_counter()
+
+
+def resident_memory():
+    """
+    :return: The resident memory of the process in kilobytes or None if it
+    cannot be determined.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    # The peak instead of the current resident memory, in kilobytes on linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def startup_statistics(mode):
+    """
+    Returns the time since the process start and the resident memory.
+    :param mode: The name of the startup mode, e.g. gui or headless.
+    :return: A dictionary of the values.
+    """
+    return {
+        'mode': mode,
+        'startupTime': time.perf_counter() - START_TIME,
+        'residentMemory': resident_memory()
+    }
+
@@ -0,0 +1,208 @@
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from importlib.util import resolve_name
+from threading import Lock
+
+from service.startup_metrics import START_TIME, startup_statistics
+
+# The path of a json file to write the startup profile to, or 1 to print it
+# only. Enables timing the imports, which slows them down slightly.
+PROFILE_VARIABLE = 'SCHOOLBAG_STARTUP_PROFILE'
+
+
+class StartupProfiler:
+    """
+    Records the import time of every module, the construction time of the
+    main components and the time to the first frame.
+
+    Imports are timed by wrapping the import statement. Each module gets its
+    own time, excluding the modules it imported, and its cumulative time.
+    Imports in other threads than the main thread, like the ones of the
+    hardware subsystems, are marked as background imports, since they do not
+    delay the first frame.
+    """
+
+    def __init__(self, profile_path=None):
+        """
+        :param profile_path: The path of the json file to write the report
+        to or None.
+        """
+        self.__profile_path = profile_path
+        self.__lock = Lock()
+        self.__original_import = None
+        self.__import_stacks = threading.local()
+        self.__imports = {}
+        self.__constructions = {}
+        self.__marks = {}
+
+    def time_imports(self):
+        """
+        Starts timing all further imports of modules not imported yet.
+        :return:
+        """
+        if self.__original_import is None:
+            self.__original_import = builtins.__import__
+            builtins.__import__ = self.__import
+
+    def stop_timing_imports(self):
+        if self.__original_import is not None:
+            builtins.__import__ = self.__original_import
+            self.__original_import = None
+
+    @contextmanager
+    def measure(self, name):
+        """
+        Records the time spent in the with block as the construction time of
+        the given component.
+        :param name: The name of the component.
+        :return:
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            with self.__lock:
+                self.__constructions[name] = duration
+
+    def mark(self, name):
+        """
+        Records the time since the process start, e.g. of the first frame.
+        :param name: The name of the point in time.
+        :return:
+        """
+        with self.__lock:
+            self.__marks[name] = time.perf_counter() - START_TIME
+
+    def report(self, mode, hardware_statistics=None):
+        """
+        Collects the startup timings.
+        :param mode: The name of the startup mode, e.g. gui or headless.
+        :param hardware_statistics: The statistics of the hardware startup
+        or None.
+        :return: A dictionary of the timings in seconds.
+        """
+        report = startup_statistics(mode)
+        with self.__lock:
+            report['marks'] = dict(self.__marks)
+            report['constructions'] = dict(self.__constructions)
+            report['imports'] = {name: dict(timing) for name, timing
+                                 in self.__imports.items()}
+        if hardware_statistics is not None:
+            report['hardware'] = {
+                name: {'state': values['state'],
+                       'duration': values['duration']}
+                for name, values in hardware_statistics.items()}
+        return report
+
+    def print_report(self, mode, hardware_statistics=None,
+                     import_count: int = 15):
+        """
+        Prints the startup timings and writes them to the profile file if
+        one is configured.
+        :param mode: The name of the startup mode, e.g. gui or headless.
+        :param hardware_statistics: The statistics of the hardware startup
+        or None.
+        :param import_count: The number of the slowest imports to print.
+        :return: The report.
+        """
+        report = self.report(mode, hardware_statistics)
+        print('[StartupProfiler] %s mode ready after %.3f s using %s kB '
+              'resident memory.' % (mode, report['startupTime'],
+                                    report['residentMemory']))
+        for name, value in sorted(report['marks'].items(),
+                                  key=lambda item: item[1]):
+            print('[StartupProfiler] %-40s at %8.1f ms' % (name, value * 1000))
+        for name, value in sorted(report['constructions'].items(),
+                                  key=lambda item: -item[1]):
+            print('[StartupProfiler] construct %-30s %8.1f ms'
+                  % (name, value * 1000))
+        for name, values in sorted(report.get('hardware', {}).items()):
+            if values['duration'] is not None:
+                print('[StartupProfiler] initialize %-29s %8.1f ms (%s)'
+                      % (name, values['duration'] * 1000, values['state']))
+        slowest = sorted(report['imports'].items(),
+                         key=lambda item: -item[1]['self'])[:import_count]
+        for name, timing in slowest:
+            print('[StartupProfiler] import %-33s %8.1f ms self %8.1f ms '
+                  'cumulative%s' % (name, timing['self'] * 1000,
+                                    timing['cumulative'] * 1000,
+                                    ' (background)' if timing['background']
+                                    else ''))
+
+        if self.__profile_path is not None:
+            with open(self.__profile_path, 'w') as profile_file:
+                json.dump(report, profile_file, indent=2, sort_keys=True)
+        return report
+
+    def __import(self, name, globals=None, locals=None, fromlist=(),
+                 level=0):
+        """
+        Imports the module and records its import time if it was not
+        imported before.
+        """
+        if level == 0:
+            module_name = name
+        else:
+            try:
+                module_name = resolve_name(
+                    '.' * level + name, (globals or {}).get('__package__'))
+            except (ImportError, ValueError):
+                module_name = None
+        if module_name is None or module_name in sys.modules:
+            return self.__original_import(
+                name, globals, locals, fromlist, level)
+
+        stack = getattr(self.__import_stacks, 'stack', None)
+        if stack is None:
+            stack = self.__import_stacks.stack = []
+        # The cumulative time of the modules imported by this one.
+        stack.append(0.)
+        start = time.perf_counter()
+        try:
+            return self.__original_import(
+                name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            if module_name in sys.modules:
+                with self.__lock:
+                    self.__imports[module_name] = {
+                        'self': cumulative - nested,
+                        'cumulative': cumulative,
+                        'background': threading.current_thread()
+                        is not threading.main_thread()
+                    }
+
+
+_startup_profiler = None
+
+
+def startup_profiler():
+    """
+    :return: The shared startup profiler, which times the imports if the
+    startup profile is enabled by the environment.
+    """
+    global _startup_profiler
+    if _startup_profiler is None:
+        profile = os.environ.get(PROFILE_VARIABLE, '')
+        _startup_profiler = StartupProfiler(
+            None if profile in ('', '0', '1') else profile)
+        if is_profile_enabled():
+            _startup_profiler.time_imports()
+    return _startup_profiler
+
+
+def is_profile_enabled():
+    """
+    :return: True if the startup profile is enabled by the environment,
+    else False.
+    """
+    return os.environ.get(PROFILE_VARIABLE, '') not in ('', '0')
@@ -0,0 +1,117 @@
+import time
+from collections import deque, namedtuple
+from threading import Lock
+
+TagEvent = namedtuple('TagEvent', ['uid', 'timestamp'])
+
+
+class TagEventQueue:
+    """
+    Bounded queue which hands over tag reads from the reader thread to the
+    consumer on the main thread.
+
+    Reads of the same tag within the deduplication period are dropped. If the
+    queue is full the oldest event is discarded.
+    """
+
+    def __init__(self, max_length: int = 64, deduplication_period: float = 1.):
+        """
+        :param max_length: The maximum number of pending events.
+        :param deduplication_period: The time in seconds in which further
+        reads of the same tag are ignored.
+        """
+        self.__events = deque()
+        self.__lock = Lock()
+        self.__max_length = max_length
+        self.__deduplication_period = deduplication_period
+        self.__last_publication = {}
+
+        self.__published = 0
+        self.__duplicates = 0
+        self.__dropped = 0
+        self.__drained = 0
+        self.__max_depth = 0
+        self.__total_age = 0.
+        self.__max_age = 0.
+
+    def __len__(self):
+        return len(self.__events)
+
+    def publish(self, uid):
+        """
+        Appends a timestamped event for the given tag unless the tag was
+        published within the deduplication period.
+        :param uid: The unique id of the read tag.
+        :return: True if the event was queued, else False.
+        """
+        now = time.monotonic()
+        with self.__lock:
+            last_publication = self.__last_publication.get(uid)
+            if last_publication is not None \
+                    and now - last_publication < self.__deduplication_period:
+                self.__duplicates += 1
+                return False
+
+            self.__last_publication[uid] = now
+            self.__forget_old_publications(now)
+
+            if len(self.__events) == self.__max_length:
+                self.__events.popleft()
+                self.__dropped += 1
+
+            self.__events.append(TagEvent(uid, now))
+            self.__published += 1
+            self.__max_depth = max(self.__max_depth, len(self.__events))
+        return True
+
+    def drain(self, max_count: int = None):
+        """
+        Removes and returns the pending events in the order of their arrival.
+        :param max_count: The maximum number of events to take, all if None.
+        :return: The list of removed events.
+        """
+        now = time.monotonic()
+        with self.__lock:
+            count = len(self.__events) if max_count is None \
+                else min(max_count, len(self.__events))
+            events = [self.__events.popleft() for _ in range(count)]
+
+            for event in events:
+                age = now - event.timestamp
+                self.__total_age += age
+                self.__max_age = max(self.__max_age, age)
+            self.__drained += len(events)
+        return events
+
+    def statistics(self):
+        """
+        Returns the queue depth and event age counters.
+        :return: A dictionary of the counter values.
+        """
+        with self.__lock:
+            return {
+                'depth': len(self.__events),
+                'maxDepth': self.__max_depth,
+                'published': self.__published,
+                'duplicates': self.__duplicates,
+                'dropped': self.__dropped,
+                'drained': self.__drained,
+                'meanAge': self.__total_age / self.__drained
+                if self.__drained else 0.,
+                'maxAge': self.__max_age
+            }
+
+    def __forget_old_publications(self, now):
+        """
+        Removes publication timestamps which are older than the deduplication
+        period once they outnumber the queue capacity.
+        :param now: The current monotonic time.
+        :return:
+        """
+        if len(self.__last_publication) <= self.__max_length:
+            return
+
+        self.__last_publication = {
+            uid: timestamp
+            for uid, timestamp in self.__last_publication.items()
+            if now - timestamp < self.__deduplication_period}
@@ -0,0 +1,176 @@
+import time
+from collections import namedtuple
+
+WeightEstimate = namedtuple('WeightEstimate', [
+    'measured', 'expected', 'difference', 'unweighed', 'missing',
+    'superfluous', 'unexplained', 'complete'])
+WeightEstimate.__doc__ = """
+The comparison of a measured load with the weight of the current content.
+
+measured, expected and difference are given in grams. unweighed lists the
+packed unique ids without a weight. missing lists registered but unpacked
+unique ids whose weights explain a surplus, superfluous lists packed unique
+ids whose weights explain a deficit. unexplained is the remaining difference
+in grams, which hints at untagged items, and complete is False if the time
+budget ended the search early.
+"""
+
+
+class WeightEstimator:
+    """
+    Explains the difference between the measured bag load and the expected
+    weight of the current content by a subset of tags.
+
+    The subset sum is solved on a bitset held in a Python integer, in which
+    bit n is set if a subset weighing n weight units exists. Adding an item
+    shifts and ors the whole bitset at once, so each item costs a few big
+    integer operations instead of a loop over all sums. Items are processed
+    until the time budget is used up, in which case the best subset of the
+    processed items is returned.
+    """
+
+    def __init__(self, tag_registry, empty_weight: int = 0,
+                 resolution: int = 10, tolerance: int = 50,
+                 time_budget: float = .05):
+        """
+        :param tag_registry: The tag registry holding the tag weights.
+        :param empty_weight: The weight in grams of the empty bag.
+        :param resolution: The weight in grams of one weight unit of the
+        search; weights are rounded to units.
+        :param tolerance: The difference in grams considered as matching.
+        :param time_budget: The maximum time in seconds of a search.
+        """
+        self.__tag_registry = tag_registry
+        self.__empty_weight = empty_weight
+        self.__resolution = resolution
+        self.__tolerance = tolerance
+        self.__time_budget = time_budget
+
+    @property
+    def empty_weight(self):
+        return self.__empty_weight
+
+    @empty_weight.setter
+    def empty_weight(self, empty_weight):
+        self.__empty_weight = empty_weight
+
+    @property
+    def tolerance(self):
+        return self.__tolerance
+
+    def has_weights(self):
+        """
+        :return: True if any registered tag has a weight, else False.
+        """
+        return any(tag.weight is not None
+                   for uid, tag in self.__tag_registry.items())
+
+    def estimate(self, measured_load, current_content, likely_missing=()):
+        """
+        Compares the measured load with the weight of the current content
+        and searches the tags explaining the difference.
+
+        Many subsets may match a difference; the search prefers the tags
+        listed first, so likely missing tags are tried before all others.
+        :param measured_load: The measured load in grams.
+        :param current_content: The unique ids of the packed tags.
+        :param likely_missing: The unpacked unique ids to prefer, e.g. the
+        ones needed today.
+        :return: The weight estimate.
+        """
+        packed = set(current_content)
+        expected = self.__empty_weight
+        unweighed = []
+        for uid in current_content:
+            tag = self.__tag_registry.get(uid)
+            if tag is None or tag.weight is None:
+                unweighed.append(uid)
+            else:
+                expected += tag.weight
+
+        difference = measured_load - expected
+        missing = []
+        superfluous = []
+        complete = True
+        if difference > self.__tolerance:
+            preferred = [uid for uid in likely_missing if uid not in packed]
+            skipped = packed.union(preferred)
+            candidates = [
+                (uid, self.__tag_registry[uid].weight) for uid in preferred
+                if uid in self.__tag_registry
+                and self.__tag_registry[uid].weight is not None]
+            candidates += [(uid, tag.weight)
+                           for uid, tag in self.__tag_registry.items()
+                           if uid not in skipped and tag.weight is not None]
+            missing, explained, complete = self.__search(
+                candidates, difference)
+        elif difference < -self.__tolerance:
+            candidates = [(uid, self.__tag_registry[uid].weight)
+                          for uid in current_content if uid not in unweighed]
+            superfluous, explained, complete = self.__search(
+                candidates, -difference)
+            explained = -explained
+        else:
+            explained = 0
+
+        return WeightEstimate(
+            measured_load, expected, difference, unweighed, missing,
+            superfluous, difference - explained, complete)
+
+    def __search(self, candidates, target):
+        """
+        Finds the subset of candidates whose weight is closest to the target.
+        :param candidates: The list of (unique id, weight) tuples.
+        :param target: The weight in grams to reach.
+        :return: The unique ids of the subset, their weight in grams and
+        False if the time budget ended the search early, else True.
+        """
+        deadline = time.perf_counter() + self.__time_budget
+        target_units = int(round(target / self.__resolution))
+        limit = target_units + int(round(self.__tolerance / self.__resolution))
+        mask = (1 << (limit + 1)) - 1
+
+        items = [(uid, int(round(weight / self.__resolution)))
+                 for uid, weight in candidates]
+        items = [(uid, units) for uid, units in items if 0 < units <= limit]
+
+        reachable = 1
+        history = []
+        complete = True
+        for uid, units in items:
+            if time.perf_counter() > deadline:
+                complete = False
+                break
+            history.append(reachable)
+            reachable = (reachable | (reachable << units)) & mask
+        items = items[:len(history)]
+
+        best = self.__closest_reachable(reachable, target_units, limit)
+        subset = []
+        remaining = best
+        for (uid, units), previous in zip(reversed(items), reversed(history)):
+            if remaining == 0:
+                break
+            if not previous >> remaining & 1:
+                subset.append(uid)
+                remaining -= units
+        subset.reverse()
+
+        chosen = set(subset)
+        weight = sum(weight for uid, weight in candidates if uid in chosen)
+        return subset, weight, complete
+
+    @staticmethod
+    def __closest_reachable(reachable, target_units, limit):
+        """
+        :return: The reachable sum closest to the target, preferring the
+        lower one on ties.
+        """
+        for distance in range(limit + 1):
+            if target_units - distance >= 0 \
+                    and reachable >> (target_units - distance) & 1:
+                return target_units - distance
+            if target_units + distance <= limit \
+                    and reachable >> (target_units + distance) & 1:
+                return target_units + distance
+        return 0
@@ -0,0 +1,265 @@
+import os
+import tempfile
+import time
+from os.path import basename, dirname
+from threading import Condition, Lock, Thread, current_thread
+
+# Read once on import, since reading the umask means setting it, which is not
+# safe while other threads create files.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def write_atomically(path, data: bytes):
+    """
+    Replaces the file at the given path with the given data so that the file
+    holds either the old or the new content even if the system crashes.
+
+    The data is written to a temporary file within the same directory, which
+    is synced and renamed onto the target afterwards. The file keeps the
+    permissions of the replaced file, a new file gets the default ones.
+    :param path: The path of the file to replace.
+    :param data: The new file content.
+    :return:
+    """
+    directory = dirname(path)
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    descriptor, temporary_path = tempfile.mkstemp(
+        prefix='.%s.' % basename(path), suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            # mkstemp creates the file readable by the owner only.
+            os.chmod(temporary_path, mode)
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.unlink(temporary_path)
+        raise
+
+    if hasattr(os, 'O_DIRECTORY'):
+        directory_descriptor = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory_descriptor)
+        finally:
+            os.close(directory_descriptor)
+
+
+class WriteBehindPersister:
+    """
+    Coalesces bursts of save requests into a single atomic file write after
+    a short quiet period.
+
+    The content is either passed with each request, taken on the requesting
+    thread, or produced by the serialize method on the writing thread. A
+    failed write stays pending and is retried with a growing delay.
+    """
+
+    def __init__(self, path, serialize=None, quiet_period: float = .5,
+                 max_delay: float = 5., max_retry_delay: float = 60.,
+                 on_written=None):
+        """
+        :param path: The path of the file to write.
+        :param serialize: The method returning the file content as bytes for
+        requests without content; it is called from the writing thread.
+        :param quiet_period: The time in seconds without further requests
+        after which the file is written.
+        :param max_delay: The maximum time in seconds a request is deferred
+        by continuous further requests.
+        :param max_retry_delay: The maximum time in seconds between two
+        attempts to write after a failure.
+        :param on_written: The method called from the writing thread with the
+        content after each successful write, or None.
+        """
+        self.__path = path
+        self.__serialize = serialize
+        self.__quiet_period = quiet_period
+        self.__max_delay = max_delay
+        self.__max_retry_delay = max_retry_delay
+        self.__on_written = on_written
+
+        self.__lock = Condition(Lock())
+        self.__write_lock = Lock()
+        self.__worker = None
+        self.__stopping = False
+        self.__dirty = False
+        self.__content = None
+        self.__written_content = None
+        self.__first_request = 0.
+        self.__deadline = 0.
+        self.__retry_delay = 0.
+        self.__retry_time = 0.
+
+        self.__requests = 0
+        self.__writes = 0
+        self.__failures = 0
+        self.__total_write_time = 0.
+        self.__max_write_time = 0.
+        self.__last_write_time = 0.
+
+    def schedule(self, content: bytes = None):
+        """
+        Requests a write of the file which is executed as soon as no further
+        request arrived within the quiet period.
+        :param content: The file content, replacing the one of a pending
+        request; the serialize method is called on writing if None.
+        :return:
+        """
+        now = time.monotonic()
+        with self.__lock:
+            self.__requests += 1
+            self.__content = content
+            self.__stopping = False
+            if self.__dirty:
+                self.__deadline = max(
+                    min(now + self.__quiet_period,
+                        self.__first_request + self.__max_delay),
+                    self.__retry_time)
+                return
+
+            self.__dirty = True
+            self.__first_request = now
+            self.__deadline = max(now + self.__quiet_period,
+                                  self.__retry_time)
+            if self.__worker is None:
+                self.__worker = Thread(
+                    target=self.__worker_method, daemon=True)
+                self.__worker.start()
+            self.__lock.notify()
+
+    def flush(self):
+        """
+        Writes the file immediately if a write is pending.
+
+        If writing fails, the content stays pending unless a newer request
+        replaced it, and the worker retries after the retry delay.
+        :return: True if the file was written, else False.
+        """
+        with self.__write_lock:
+            with self.__lock:
+                if not self.__dirty:
+                    return False
+                self.__dirty = False
+                content = self.__content
+                self.__content = None
+                written_content = self.__written_content
+
+            start = time.perf_counter()
+            try:
+                if content is None:
+                    content = self.__serialize()
+                with self.__lock:
+                    # Set ahead of the write, so a watcher seeing the new
+                    # file recognizes it as our own.
+                    self.__written_content = content
+                write_atomically(self.__path, content)
+            except Exception as e:
+                self.__on_write_failed(content, written_content, e)
+                return False
+            write_time = time.perf_counter() - start
+
+            with self.__lock:
+                self.__retry_delay = 0.
+                self.__retry_time = 0.
+                self.__writes += 1
+                self.__total_write_time += write_time
+                self.__max_write_time = max(self.__max_write_time, write_time)
+                self.__last_write_time = write_time
+            if self.__on_written is not None:
+                self.__on_written(content)
+        return True
+
+    def __on_write_failed(self, content, written_content, error):
+        """
+        Keeps the failed content pending and delays the next attempt.
+        :param content: The content which could not be written or None.
+        :param written_content: The content of the file before the attempt.
+        :param error: The exception raised by the attempt.
+        :return:
+        """
+        now = time.monotonic()
+        with self.__lock:
+            self.__failures += 1
+            self.__written_content = written_content
+            self.__retry_delay = min(
+                max(2 * self.__retry_delay, self.__quiet_period),
+                self.__max_retry_delay)
+            self.__retry_time = now + self.__retry_delay
+            if not self.__dirty:
+                self.__dirty = True
+                self.__content = content
+                self.__first_request = now
+            self.__deadline = max(self.__deadline, self.__retry_time)
+            retry_delay = self.__retry_delay
+        print('[WriteBehindPersister] Could not write "%s", retrying in '
+              '%.1f s. %s' % (self.__path, retry_delay, str(error)))
+
+    def __worker_method(self):
+        """
+        Waits for pending requests and writes the file once their deadline
+        has passed.
+        :return:
+        """
+        while True:
+            with self.__lock:
+                while not self.__dirty and not self.__stopping:
+                    self.__lock.wait()
+                if not self.__dirty:
+                    if self.__worker is current_thread():
+                        self.__worker = None
+                    return
+                remaining = self.__deadline - time.monotonic()
+                if remaining > 0:
+                    self.__lock.wait(remaining)
+                    continue
+            self.flush()
+
+    def is_own_content(self, content: bytes):
+        """
+        :param content: The content of the file.
+        :return: True if the content is the one last written or waiting to
+        be written, else False.
+        """
+        with self.__lock:
+            return content == self.__written_content \
+                or (self.__content is not None and content == self.__content)
+
+    def close(self):
+        """
+        Writes any pending change and stops the writing thread; to be called
+        on shutdown. A further request starts the thread again. If the write
+        failed, the thread keeps retrying and stops once it succeeded.
+        :return:
+        """
+        self.flush()
+        with self.__lock:
+            self.__stopping = True
+            self.__lock.notify()
+            worker = self.__worker
+            if self.__dirty:
+                return
+            self.__worker = None
+        if worker is not None:
+            worker.join()
+
+    def statistics(self):
+        """
+        Returns the write counters and latencies.
+        :return: A dictionary of the counter values.
+        """
+        with self.__lock:
+            return {
+                'requests': self.__requests,
+                'writes': self.__writes,
+                'failures': self.__failures,
+                'pending': self.__dirty,
+                'meanWriteTime': self.__total_write_time / self.__writes
+                if self.__writes else 0.,
+                'maxWriteTime': self.__max_write_time,
+                'lastWriteTime': self.__last_write_time
+            }
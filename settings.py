@@ -1,172 +1,515 @@
 import json
 import os
+from contextlib import contextmanager
 from json import JSONDecodeError
 from os.path import dirname, abspath
 
-from kivy.event import EventDispatcher
-from kivy.properties import NumericProperty, StringProperty, OptionProperty, ListProperty, DictProperty
-from watchdog.events import FileSystemEventHandler
-from watchdog.observers import Observer
+from service.content_journal import ContentJournal
+from service.events import Clock, EventDispatcher, NumericProperty, \
+    StringProperty, OptionProperty, ListProperty, DictProperty
+from service.file_watcher import FileWatcher
+from service.pending_tag_store import PendingTagStore
+from service.sqlite_store import SqliteStore, digest
+from service.write_behind_persister import WriteBehindPersister
+from tag_record import TagRecord
+from tag_registry import TagRegistry
 
 
 class Settings(EventDispatcher):
-    FILE_WRITE_PERMISSION = 'w'
+    """
+    Holds the user settings and keeps them in sync with the settings file.
+
+    Dispatches on_change with the set of changed property names. Changes
+    made within a transaction are reported by a single on_change once the
+    outermost transaction ends.
+    """
+
+    __events__ = ('on_change',)
+
+    PROPERTY_NAMES = ('gender', 'birthday', 'height', 'weight', 'bag_weight',
+                      'lighting_mode', 'animation_type', 'current_content',
+                      'tags')
+
+    # The keys of the scalar properties in the settings file.
+    SETTING_KEYS = {'gender': 'gender', 'birthday': 'birthday',
+                    'height': 'height', 'weight': 'weight',
+                    'bag_weight': 'bagWeight', 'lighting_mode': 'lightingMode',
+                    'animation_type': 'animationType'}
 
     gender = OptionProperty('male', options=['male', 'female'])
     birthday = StringProperty()
     height = NumericProperty(0)
     weight = NumericProperty(0)
+    # The weight in grams of the empty school bag.
+    bag_weight = NumericProperty(0)
     lighting_mode = OptionProperty('off', options=['off', 'manual', 'automatic'])
     animation_type = StringProperty()
     current_content = ListProperty()
+    # Unique ids mapped to TagRecord instances.
     tags = DictProperty()
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, database_path=None, profile_directory=None,
+                 **kwargs):
         """
         Determines the location of the settings file, initially loads all
         settings values and sets up the changes observer.
         :param args:
+        :param database_path: The path of a SQLite database to store the
+        settings in; the json settings file is used if None.
+        :param profile_directory: The directory holding the settings files of
+        a profile; the project root if None.
         :param kwargs:
         """
         super().__init__(*args, **kwargs)
-        self.__root_directory = dirname(abspath(__file__)) + '/'
+        if profile_directory is None:
+            self.__root_directory = dirname(abspath(__file__)) + '/'
+        else:
+            self.__root_directory = abspath(profile_directory) + '/'
+            self.__create_profile_files()
         self.__settings_file_path = self.__root_directory + 'data.json'
         self.__new_tags_file_path = self.__root_directory + 'newRFID.json'
+        self.__pending_tags = PendingTagStore(self.__new_tags_file_path)
+        self.__store = None
+        if database_path is not None:
+            self.__store = SqliteStore(database_path)
+        # Whether property changes are written to the database rows; not
+        # before the properties were loaded.
+        self.__is_store_synchronized = False
+        self.__persister = WriteBehindPersister(
+            self.__settings_file_path,
+            serialize=None if self.__store is None else self.__export_store,
+            on_written=self.__on_settings_file_written)
+        self.__settings_file_digest = None
+        self.__content_journal = ContentJournal(
+            self.__root_directory + 'content.journal',
+            self.__root_directory + 'content.snapshot.json')
+        self.__journaled_content = None
+        self.__suspended_file_state = None
+
+        self.__transaction_depth = 0
+        self.__changed_names = set()
+
+        self.tag_registry = TagRegistry()
+        for name in self.PROPERTY_NAMES:
+            self.fbind(name, self.__on_property_changed, name)
 
         self.__load()
         self.__setup_changes_observer()
 
     def save(self):
         """
-        Save the current settings to the given json file.
+        Schedules saving the current settings to the json settings file.
+
+        Several saves within a short period result in a single write. The
+        content is encoded right away, so the writing thread does not read
+        the properties while they change. With a database, which receives
+        each change as it happens, the writing thread exports the stored
+        rows instead and the json file is kept for the companion app.
+        :return:
+        """
+        if self.__store is not None:
+            self.__persister.schedule()
+            return
+        self.__persister.schedule(json.dumps(self.__snapshot()).encode('utf-8'))
+
+    def flush(self):
+        """
+        Writes any pending changes to the settings file immediately; to be
+        called on shutdown.
+        :return:
+        """
+        if self.__suspended_file_state is not None:
+            return
+        if self.__content_journal.statistics()['entries']:
+            self.__compact_content_journal()
+        self.__persister.close()
+        self.__pending_tags.flush()
+
+    def suspend(self):
+        """
+        Writes any pending changes and releases the file watcher, the writing
+        threads, the content journal and the database while the profile is
+        inactive; the settings stay in memory.
+        :return:
+        """
+        if self.__suspended_file_state is not None:
+            return
+        self.settings_watcher.stop()
+        self.flush()
+        self.__content_journal.close()
+        if self.__store is not None:
+            self.__store.close()
+        self.__suspended_file_state = self.__settings_file_state()
+
+    def resume(self):
+        """
+        Reopens the resources released by suspend and reloads the settings
+        file only if it changed in the meantime.
+        :return:
+        """
+        if self.__suspended_file_state is None:
+            return
+        file_state = self.__suspended_file_state
+        self.__suspended_file_state = None
+        if self.__store is not None:
+            self.__store.reopen()
+        self.__content_journal.reopen()
+        self.settings_watcher.start()
+        if self.__settings_file_state() != file_state:
+            self.__reload()
+
+    def content_journal_statistics(self):
+        """
+        Returns the journal length and append latencies of the current
+        content.
+        :return: A dictionary of the counter values.
+        """
+        return self.__content_journal.statistics()
+
+    def persistence_statistics(self):
+        """
+        Returns the write counters and latencies of the settings file.
+        :return: A dictionary of the counter values.
+        """
+        return self.__persister.statistics()
+
+    def __create_profile_files(self):
+        """
+        Creates the profile directory with empty settings and new tags files
+        unless they exist, so a new profile starts with default values.
+        :return:
+        """
+        os.makedirs(self.__root_directory, exist_ok=True)
+        for name in ('data.json', 'newRFID.json'):
+            path = self.__root_directory + name
+            if not os.path.exists(path):
+                open(path, 'ab').close()
+
+    def __snapshot(self):
+        """
+        :return: The current settings in the schema of the settings file.
+        """
+        return {
+            'gender': self.gender,
+            'birthday': self.birthday,
+            'height': self.height,
+            'weight': self.weight,
+            'bagWeight': self.bag_weight,
+            'lightingMode': self.lighting_mode,
+            'animationType': self.animation_type,
+            'tags': {uid: tag.to_json() for uid, tag in self.tags.items()},
+            'currentContent': list(self.current_content)
+        }
+
+    @contextmanager
+    def transaction(self):
+        """
+        Collects all property changes made within the context and dispatches
+        them as a single on_change when the outermost transaction ends.
+        :return:
+        """
+        self.__transaction_depth += 1
+        try:
+            yield self
+        finally:
+            self.__transaction_depth -= 1
+            if self.__transaction_depth == 0 and self.__changed_names:
+                changed_names = self.__changed_names
+                self.__changed_names = set()
+                self.dispatch('on_change', changed_names)
+
+    def on_change(self, changed_names):
+        pass
+
+    def __on_property_changed(self, name, instance, value):
+        """
+        Records the changed property and dispatches on_change unless a
+        transaction is running.
+
+        Replaced tags are passed to the tag registry right away, so its per
+        tag listeners are up to date once on_change is dispatched. With a
+        database only the changed rows are written.
+        :param name: The name of the changed property.
+        :param instance: This settings instance.
+        :param value: The new value.
         :return:
         """
-        with open(self.__settings_file_path, self.FILE_WRITE_PERMISSION) as file:
-            settings_to_save = {
-                'gender': self.gender,
-                'birthday': self.birthday,
-                'height': self.height,
-                'weight': self.weight,
-                'lightingMode': self.lighting_mode,
-                'animationType': self.animation_type,
-                'tags': self.tags,
-                'currentContent': self.current_content
-            }
-            json.dump(settings_to_save, file)
+        if name == 'tags':
+            added, removed, changed = self.tag_registry.update(value)
+            if self.__is_store_synchronized:
+                self.__store_tag_changes(removed, added + changed)
+        elif name == 'current_content':
+            self.__journal_content_changes(value)
+        elif self.__is_store_synchronized:
+            self.__store.set_setting(self.SETTING_KEYS[name], value)
+
+        if self.__transaction_depth:
+            self.__changed_names.add(name)
+        else:
+            self.dispatch('on_change', {name})
+
+    def __journal_content_changes(self, content):
+        """
+        Appends the differences to the last journaled content to the content
+        journal and compacts it once it grew long enough. With a database the
+        differences are written to its rows instead and the settings file is
+        exported afterwards.
+        :param content: The new current content.
+        :return:
+        """
+        if self.__journaled_content is None:
+            return
+
+        journaled_content = self.__journaled_content
+        self.__journaled_content = set(content)
+        inserted = [uid for uid in content if uid not in journaled_content]
+        removed = [uid for uid in journaled_content
+                   if uid not in self.__journaled_content]
+        if self.__is_store_synchronized:
+            if inserted or removed:
+                self.__store_content_changes(inserted, removed)
+        elif self.__content_journal.record(inserted, removed):
+            self.__compact_content_journal()
+
+    def __store_tag_changes(self, removed, updated):
+        """
+        Writes the changed tags to the database.
+        :param removed: The unique ids of the removed tags.
+        :param updated: The unique ids of the added and changed tags.
+        :return:
+        """
+        for uid in removed:
+            self.__store.delete_tag(uid)
+        for uid in updated:
+            self.__store.put_tag(uid, self.tags[uid].to_json())
+
+    def __store_content_changes(self, inserted, removed):
+        """
+        Writes the content changes to the database and schedules the export
+        of the settings file.
+        :param inserted: The unique ids of the inserted tags.
+        :param removed: The unique ids of the removed tags.
+        :return:
+        """
+        for uid in removed:
+            self.__store.remove_content(uid)
+        for uid in inserted:
+            self.__store.insert_content(uid)
+        self.save()
+
+    def __export_store(self):
+        """
+        :return: The stored settings encoded as settings file content; called
+        on the writing thread.
+        """
+        return json.dumps(self.__store.load()).encode('utf-8')
+
+    def __compact_content_journal(self):
+        """
+        Moves the journaled content into the snapshot and updates the
+        settings file, which exports the current content.
+        :return:
+        """
+        self.__content_journal.compact(self.current_content)
+        self.save()
 
     def register_new_tag(self, tag):
         """
-        Appends a new tag to the list of new tags and updates the new tags file.
+        Adds a new tag to the pending tags, which are written to the new tags
+        file in batches.
         :param tag:
         :return:
         """
-        if tag in self.__new_tags:
-            return
-        self.__new_tags.append(tag)
-        self.__update_new_tags_file()
+        self.__pending_tags.add(tag)
+
+    def pending_tags_statistics(self):
+        """
+        Returns the number of pending tags and the new tags file counters.
+        :return: A dictionary of the counter values.
+        """
+        return self.__pending_tags.statistics()
 
     def __load(self):
         """
         Loads all properties by reading in the json settings files.
         :return:
         """
-        self.__read_in_settings_file()
+        content = self.__read_settings_file()
+        if self.__store is None:
+            self.__read_in_settings_file(content)
+        else:
+            self.__load_store(content)
+            self.__is_store_synchronized = True
+            # Content left in the journal, e.g. from running without the
+            # database, is written to the rows as it is replayed.
+            self.__journaled_content = set(self.current_content)
+        self.current_content = self.__content_journal.load(
+            self.current_content)
+        self.__journaled_content = set(self.current_content)
         self.__read_in_new_tags_file()
         self.__update_new_tags()
 
-    def __read_in_settings_file(self):
-        if os.stat(self.__settings_file_path).st_size == 0:
+    def __load_store(self, content):
+        """
+        Loads the properties from the database, or from the settings file if
+        it differs from the last export, e.g. since the companion app changed
+        it while the station was off or the database is new. The imported
+        settings replace the stored ones.
+        :param content: The raw content of the settings file.
+        :return:
+        """
+        self.__settings_file_digest = digest(content)
+        settings = None
+        if content and self.__settings_file_digest \
+                != self.__store.exported_digest():
+            try:
+                settings = json.loads(content.decode('utf-8'))
+            except (JSONDecodeError, UnicodeDecodeError) as e:
+                print('[Settings] Could not import the settings file "%s". %s'
+                      % (self.__settings_file_path, str(e)))
+
+        if settings is not None:
+            self.__apply_settings(settings)
+            self.__store.save(self.__snapshot())
+            self.__store.set_exported_digest(self.__settings_file_digest)
+        elif self.__store.is_empty():
             self.set_default_values()
+        else:
+            self.__apply_settings(self.__store.load())
+
+    def __on_settings_file_written(self, content):
+        """
+        Records the written settings file as the last export of the
+        database; called on the writing thread.
+        :param content: The written content.
+        :return:
+        """
+        if self.__store is not None:
+            self.__store.set_exported_digest(digest(content))
+
+    def __reload(self):
+        """
+        Reloads the settings after the settings file changed unless the file
+        content is the one last read or written by ourselves.
+
+        The properties are updated on the main thread.
+        :return:
+        """
+        content = self.__read_settings_file()
+        if digest(content) == self.__settings_file_digest \
+                or self.__persister.is_own_content(content):
             return
 
-        with open(self.__settings_file_path) as settings_file:
-            try:
-                settings = json.load(settings_file)
-                self.gender = settings['gender']
-                self.birthday = settings['birthday']
-                self.height = settings['height']
-                self.weight = settings['weight']
-                self.lighting_mode = settings['lightingMode']
-                self.animation_type = settings['animationType']
-                self.current_content = settings['currentContent']
-                self.tags = settings['tags']
-
-            except JSONDecodeError as e:
-                print('[Settings] Could not read the settings file "%s". %s'
-                      % (self.__settings_file_path, str(e)))
-                self.set_default_values()
+        def apply(dt):
+            self.__read_in_settings_file(content)
+            if self.__store is not None:
+                self.__store.set_exported_digest(digest(content))
+            self.__update_new_tags()
+        Clock.schedule_once(apply)
 
-    def __read_in_new_tags_file(self):
+    def __settings_file_state(self):
+        """
+        :return: The modification time, size and inode of the settings file.
+        """
+        status = os.stat(self.__settings_file_path)
+        return status.st_mtime_ns, status.st_size, status.st_ino
+
+    def __read_settings_file(self):
+        """
+        :return: The raw content of the settings file.
+        """
+        with open(self.__settings_file_path, 'rb') as settings_file:
+            return settings_file.read()
+
+    def __read_in_settings_file(self, content):
         """
-        Opens the new tags file and copies its list into the internal list of
-        new tags.
+        Updates the properties whose values differ from the given settings
+        file content.
+        :param content: The raw content of the settings file.
         :return:
         """
-        if os.stat(self.__new_tags_file_path).st_size == 0:
-            self.__new_tags = []
+        self.__settings_file_digest = digest(content)
+        if not content:
+            self.set_default_values()
             return
 
-        with open(self.__new_tags_file_path) as file:
-            tags_object = json.load(file)
-            self.__new_tags = tags_object['tags']
+        try:
+            self.__apply_settings(json.loads(content.decode('utf-8')))
+        except (JSONDecodeError, UnicodeDecodeError) as e:
+            print('[Settings] Could not read the settings file "%s". %s'
+                  % (self.__settings_file_path, str(e)))
+            self.set_default_values()
 
-    def __update_new_tags(self):
+    def __apply_settings(self, settings):
         """
-        Deletes any tag from the list of new tags if it is listed in the list
-        of known tags.
+        Updates the properties from settings in the schema of the settings
+        file within a single transaction.
+
+        The current content is only taken from the file on startup, later on
+        the content journal holds its latest state.
+        :param settings: The settings dictionary.
         :return:
         """
-        for tag in self.tags:
-            if tag not in self.__new_tags:
-                continue
-            self.__new_tags.remove(tag)
+        with self.transaction():
+            self.__set_if_changed('gender', settings['gender'])
+            self.__set_if_changed('birthday', settings['birthday'])
+            self.__set_if_changed('height', settings['height'])
+            self.__set_if_changed('weight', settings['weight'])
+            self.__set_if_changed('bag_weight', settings.get('bagWeight', 0))
+            self.__set_if_changed('lighting_mode', settings['lightingMode'])
+            self.__set_if_changed('animation_type', settings['animationType'])
+            if self.__journaled_content is None:
+                self.__set_if_changed(
+                    'current_content', settings['currentContent'])
+            self.__set_if_changed('tags', {
+                uid: TagRecord.from_json(tag)
+                for uid, tag in settings['tags'].items()})
 
-        self.__update_new_tags_file()
+    def __set_if_changed(self, name, value):
+        """
+        Assigns the value to the property of the given name only if it
+        differs, so bound callbacks fire for actual changes only.
+        :param name: The property name.
+        :param value: The new value.
+        :return:
+        """
+        if getattr(self, name) == value:
+            return
+        setattr(self, name, value)
 
-    def __update_new_tags_file(self):
+    def __read_in_new_tags_file(self):
+        """
+        Reads the pending tags from the new tags file.
+        :return:
+        """
+        self.__pending_tags.load()
+
+    def __update_new_tags(self):
         """
-        Opens the new tags file and overrides its content with the internal
-        list of new tags.
+        Deletes any tag from the pending tags if it is listed in the known
+        tags.
         :return:
         """
-        with open(self.__new_tags_file_path, self.FILE_WRITE_PERMISSION) as file:
-            json.dump({'tags': self.__new_tags}, file)
+        self.__pending_tags.discard_known(self.tags)
 
     def __setup_changes_observer(self):
         """
-        Sets up a file observer which recognizes any changes in the settings
+        Sets up a file watcher which recognizes any changes in the settings
         file and triggers an update of all settings.
         :return:
         """
-        self.settings_handler = SettingsFileHandler(
-            self.__settings_file_path, self.__load)
-        self.observer = Observer()
-        self.observer.schedule(
-            self.settings_handler, path=self.__root_directory, recursive=False)
-        self.observer.start()
+        self.settings_watcher = FileWatcher(
+            self.__settings_file_path, self.__reload)
+        self.settings_watcher.start()
 
     def set_default_values(self):
-        self.gender = 'male'
-        self.birthday = ''
-        self.height = 0
-        self.weight = 0
-        self.lighting_mode = 'off'
-        self.animation_type = 'constant'
-        self.tags = {}
-        self.current_content = []
-
-
-class SettingsFileHandler(FileSystemEventHandler):
-    """
-    Handler for the settings file watchdog.
-    """
-
-    def __init__(self, settings_file_path, reload_settings):
-        super().__init__()
-        self.settings_file_path = settings_file_path
-        self.reload_settings = reload_settings
-
-    def on_modified(self, event):
-        if event.src_path != self.settings_file_path:
-            return
-        self.reload_settings()
+        with self.transaction():
+            self.gender = 'male'
+            self.birthday = ''
+            self.height = 0
+            self.weight = 0
+            self.bag_weight = 0
+            self.lighting_mode = 'off'
+            self.animation_type = 'constant'
+            self.tags = {}
+            self.current_content = []
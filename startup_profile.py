@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from os.path import abspath, dirname, join
+
+ROOT_DIRECTORY = dirname(abspath(__file__))
+
+
+class StartupProfile:
+    """
+    Starts the headless daemon several times in fresh processes and collects
+    the startup profiles, so a regression of the cold boot time can fail a
+    build.
+    """
+
+    def __init__(self, runs: int = 5):
+        """
+        :param runs: The number of startups.
+        """
+        self.__runs = runs
+
+    def run(self):
+        """
+        Starts the daemon and reads the startup profile of every run.
+        :return: The median first frame time, startup time and resident
+        memory, along with the import times of the last run.
+        """
+        profiles = []
+        with tempfile.TemporaryDirectory() as directory:
+            profile_path = join(directory, 'profile.json')
+            environment = dict(os.environ)
+            environment['SCHOOLBAG_STARTUP_PROFILE'] = profile_path
+            for _ in range(self.__runs):
+                subprocess.run(
+                    [sys.executable, join(ROOT_DIRECTORY, 'headless.py'),
+                     '--exit-after-startup'],
+                    env=environment, cwd=ROOT_DIRECTORY, check=True,
+                    stdout=subprocess.DEVNULL)
+                with open(profile_path) as profile_file:
+                    profiles.append(json.load(profile_file))
+
+        return {
+            'runs': len(profiles),
+            'firstFrame': statistics.median(
+                profile['marks']['firstFrame'] for profile in profiles),
+            'startupTime': statistics.median(
+                profile['startupTime'] for profile in profiles),
+            'residentMemory': statistics.median(
+                profile['residentMemory'] or 0 for profile in profiles),
+            'imports': profiles[-1]['imports']
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Profiles the startup of the headless daemon and fails '
+                    'if it exceeds the given budgets.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--imports', type=int, default=10,
+                        help='number of the slowest imports to print')
+    parser.add_argument('--max-first-frame', type=float,
+                        help='seconds until the first frame')
+    parser.add_argument('--max-resident-memory', type=int,
+                        help='kilobytes of resident memory')
+    arguments = parser.parse_args()
+
+    results = StartupProfile(arguments.runs).run()
+    print('runs: %d' % results['runs'])
+    print('firstFrame: %.3f s' % results['firstFrame'])
+    print('startupTime: %.3f s' % results['startupTime'])
+    print('residentMemory: %d kB' % results['residentMemory'])
+    slowest = sorted(results['imports'].items(),
+                     key=lambda item: -item[1]['self'])[:arguments.imports]
+    for name, timing in slowest:
+        print('import %s: %.1f ms' % (name, timing['self'] * 1000))
+
+    exceeded = []
+    if arguments.max_first_frame is not None \
+            and results['firstFrame'] > arguments.max_first_frame:
+        exceeded.append('first frame')
+    if arguments.max_resident_memory is not None \
+            and results['residentMemory'] > arguments.max_resident_memory:
+        exceeded.append('resident memory')
+    if exceeded:
+        print('Startup budget exceeded: %s' % ', '.join(exceeded))
+        sys.exit(1)
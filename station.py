@@ -0,0 +1,126 @@
+from profile_manager import ProfileManager
+from service.events import Clock
+from service.hardware_startup import HardwareStartup
+from service.startup_profiler import startup_profiler
+
+
+class Station:
+    """
+    Wires the profiles with the tag readers, the led stripe, the weight
+    measurement and the manual control; shared by the graphical user
+    interface and the headless daemon.
+
+    The hardware subsystems initialize in the background once start is
+    called; a subsystem which is not ready or failed is skipped. Their
+    modules are imported by the initializing threads as well, so loading the
+    device libraries does not delay the startup.
+    """
+
+    def __init__(self, on_hardware_state_changed=None, use_database=None):
+        """
+        Loads the profiles.
+        :param on_hardware_state_changed: The method called on the main
+        thread with the subsystem name and state whenever a state changes.
+        :param use_database: True to store the settings in a database; taken
+        from the environment if None.
+        """
+        self.__on_hardware_state_changed = on_hardware_state_changed
+        with startup_profiler().measure('ProfileManager'):
+            self.profile_manager = ProfileManager(use_database=use_database)
+        self.profile_manager.bind(active_profile=self.__on_active_profile)
+
+        self.hardware = HardwareStartup(self.__on_subsystem_state_changed)
+        self.hardware.add(
+            'tagRegistration', self.profile_manager.start_tag_reading)
+        self.hardware.add('ledStripe', self.__create_led_stripe_controller)
+        self.hardware.add('weightMeasurement', self.__create_weight_measurement)
+        self.hardware.add('manualControl', self.__create_manual_control)
+
+    def start(self):
+        """
+        Starts initializing the hardware subsystems in the background.
+        :return:
+        """
+        self.hardware.start()
+
+    def stop(self):
+        """
+        Stops all subsystems and writes the pending changes of all profiles.
+        :return:
+        """
+        self.profile_manager.__del__()
+        for name in ('ledStripe', 'weightMeasurement', 'manualControl'):
+            subsystem = self.hardware.get(name)
+            if subsystem is not None:
+                subsystem.__del__()
+        self.profile_manager.flush()
+
+    def __create_led_stripe_controller(self):
+        from led_stripe_controller import LedStripeController
+        return LedStripeController(self.profile_manager.settings)
+
+    def __create_manual_control(self):
+        from manual_control import ManualControl
+        return ManualControl(
+            self.__on_toggle_lighting_state, self.__on_set_next_animation)
+
+    def __create_weight_measurement(self):
+        from weight_measurement import WeightMeasurement
+        weight_measurement = WeightMeasurement(
+            self.profile_manager.settings,
+            self.__on_schoolbag_put_on,
+            self.__on_schoolbag_put_down,
+            on_load_changed=self.profile_manager.on_load_changed)
+        if not weight_measurement.is_attached():
+            raise RuntimeError('The arduino is not attached.')
+        return weight_measurement
+
+    def __on_subsystem_state_changed(self, name, state):
+        Clock.schedule_once(
+            lambda dt: self.__apply_subsystem_state(name, state))
+
+    def __apply_subsystem_state(self, name, state):
+        """
+        Lets a ready led stripe follow the active profile and reports the
+        state; called on the main thread.
+        :param name: The name of the subsystem.
+        :param state: The new state.
+        :return:
+        """
+        if name == 'ledStripe' and self.hardware.get(name) is not None:
+            self.hardware.get(name).set_settings(self.profile_manager.settings)
+        if self.__on_hardware_state_changed is not None:
+            self.__on_hardware_state_changed(name, state)
+
+    def __on_schoolbag_put_on(self):
+        self.profile_manager.on_schoolbag_put_on()
+        led_stripe_controller = self.hardware.get('ledStripe')
+        if led_stripe_controller is not None:
+            led_stripe_controller.on_schoolbag_put_on()
+
+    def __on_schoolbag_put_down(self):
+        self.profile_manager.on_schoolbag_put_down()
+        led_stripe_controller = self.hardware.get('ledStripe')
+        if led_stripe_controller is not None:
+            led_stripe_controller.on_schoolbag_put_down()
+
+    def __on_toggle_lighting_state(self):
+        led_stripe_controller = self.hardware.get('ledStripe')
+        if led_stripe_controller is not None:
+            led_stripe_controller.on_toggle_lighting_state()
+
+    def __on_set_next_animation(self):
+        led_stripe_controller = self.hardware.get('ledStripe')
+        if led_stripe_controller is not None:
+            led_stripe_controller.on_set_next_animation()
+
+    def __on_active_profile(self, profile_manager, profile):
+        """
+        Applies the lighting settings of the newly active profile.
+        :param profile_manager: The profile manager.
+        :param profile: The active profile.
+        :return:
+        """
+        led_stripe_controller = self.hardware.get('ledStripe')
+        if led_stripe_controller is not None:
+            led_stripe_controller.set_settings(profile.settings)
@@ -0,0 +1,136 @@
+import sys
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday',
+            'saturday', 'sunday']
+
+MATERIAL_NAME_KEY = 'materialName'
+IMAGE_NAME_KEY = 'imgName'
+WEIGHT_KEY = 'weight'
+
+
+class TagRecord:
+    """
+    Compact in-memory description of a registered tag.
+
+    The weekdays on which the material is needed are packed into a 7 bit
+    mask with bit 0 for monday. A second mask remembers which weekday keys
+    the json description contained, so the record converts back to the same
+    json. Image names are interned as many tags share the same icon. The
+    optional weight of the material is given in grams.
+    """
+
+    __slots__ = ('material_name', 'image_name', 'weekdays', 'weekday_keys',
+                 'weight', 'extra')
+
+    def __init__(self, material_name, image_name, weekdays: int = 0,
+                 weekday_keys: int = 0, weight: int = None, extra=None):
+        """
+        :param material_name: The name of the material.
+        :param image_name: The name of the icon without extension.
+        :param weekdays: The mask of the weekdays the material is needed on.
+        :param weekday_keys: The mask of the weekdays listed in the json.
+        :param weight: The weight of the material in grams or None.
+        :param extra: A tuple of (key, value) pairs of further json keys.
+        """
+        self.material_name = material_name
+        self.image_name = sys.intern(image_name)
+        self.weekdays = weekdays
+        self.weekday_keys = weekday_keys | weekdays
+        self.weight = weight
+        self.extra = extra
+
+    @classmethod
+    def from_json(cls, tag):
+        """
+        Converts a tag description of the json settings file.
+        :param tag: The dictionary describing the tag.
+        :return: The tag record.
+        """
+        weekdays = 0
+        weekday_keys = 0
+        weight = None
+        extra = []
+        for key, value in tag.items():
+            if key in WEEKDAY_BITS:
+                weekday_keys |= WEEKDAY_BITS[key]
+                if value == '1':
+                    weekdays |= WEEKDAY_BITS[key]
+            elif key == WEIGHT_KEY:
+                weight = cls.__parse_weight(value)
+                if weight is None:
+                    extra.append((key, value))
+            elif key != MATERIAL_NAME_KEY and key != IMAGE_NAME_KEY:
+                extra.append((key, value))
+
+        return cls(tag.get(MATERIAL_NAME_KEY, ''), tag.get(IMAGE_NAME_KEY, ''),
+                   weekdays, weekday_keys, weight,
+                   tuple(extra) if extra else None)
+
+    @staticmethod
+    def __parse_weight(value):
+        """
+        :param value: The json value of the weight key.
+        :return: The positive weight in whole grams or None if the value is
+        no valid weight.
+        """
+        try:
+            weight = int(round(float(value)))
+        except (TypeError, ValueError, OverflowError):
+            return None
+        return weight if weight > 0 else None
+
+    def to_json(self):
+        """
+        Converts the record to a tag description of the json settings file.
+        :return: The dictionary describing the tag.
+        """
+        tag = {
+            MATERIAL_NAME_KEY: self.material_name,
+            IMAGE_NAME_KEY: self.image_name
+        }
+        for weekday, name in enumerate(WEEKDAYS):
+            if self.weekday_keys >> weekday & 1:
+                tag[name] = '1' if self.weekdays >> weekday & 1 else '0'
+        if self.weight is not None:
+            tag[WEIGHT_KEY] = self.weight
+        if self.extra:
+            tag.update(self.extra)
+        return tag
+
+    def is_needed_on(self, weekday: int):
+        """
+        :param weekday: The weekday index, 0 for monday.
+        :return: True if the material is needed on the weekday, else False.
+        """
+        return bool(self.weekdays >> weekday & 1)
+
+    def needed_weekdays(self):
+        """
+        :return: The tuple of weekday indexes the material is needed on.
+        """
+        return tuple(weekday for weekday in range(len(WEEKDAYS))
+                     if self.weekdays >> weekday & 1)
+
+    def __eq__(self, other):
+        if not isinstance(other, TagRecord):
+            return NotImplemented
+        return self.material_name == other.material_name \
+            and self.image_name == other.image_name \
+            and self.weekdays == other.weekdays \
+            and self.weekday_keys == other.weekday_keys \
+            and self.weight == other.weight \
+            and self.extra == other.extra
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash((self.material_name, self.image_name, self.weekdays))
+
+    def __repr__(self):
+        return 'TagRecord(%r, %r, weekdays=%s)' % (
+            self.material_name, self.image_name, format(self.weekdays, '07b'))
+
+
+WEEKDAY_BITS = {name: 1 << weekday for weekday, name in enumerate(WEEKDAYS)}
@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from threading import Event, Thread
 
 import sys
@@ -9,20 +10,51 @@ if sys.platform.startswith('linux'):
 else:
     from mock.mfrc522_mock import MFRC522
 
+READER_DEVICES = ['/dev/spidev0.0']
+
 
 class TagRegistration:
-    def __init__(self, update_tags_list):
+    def __init__(self, update_tags_list, tag_readers=None,
+                 read_interval: float = 1 / 4.,
+                 deduplication_period: float = 2.):
         """
-        Sets up the rfid reader.
+        Sets up the rfid readers.
+        :param update_tags_list: The method to call with each accepted uid.
+        :param tag_readers: The readers to scan, a MFRC522 on each of the
+        READER_DEVICES if None.
+        :param read_interval: The time in seconds between two sweeps over
+        all readers.
+        :param deduplication_period: The time in seconds in which a tag
+        accepted by one reader is ignored by the others.
         """
-        self.__tag_reader = MFRC522()
+        if tag_readers is None:
+            tag_readers = [MFRC522(dev=device) for device in READER_DEVICES]
+
+        self.__readers = [
+            {
+                'reader': tag_reader,
+                'uid': [],
+                'counter': 0,
+                'errors': 0,
+                'statistics': {
+                    'device': getattr(tag_reader, 'dev', str(index)),
+                    'requests': 0,
+                    'reads': 0,
+                    'accepted': 0,
+                    'duplicates': 0,
+                    'failures': 0
+                }
+            }
+            for index, tag_reader in enumerate(tag_readers)]
+        self.__read_interval = read_interval
+        self.__deduplication_period = deduplication_period
         self.__authentication_key = [0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF]
         self.__authentication_key_length = 8
-        self.__rfid_registration = {
-            'uid': [],
-            'counter': 0,
-            'errors': 0
-        }
+        # Ordered by acceptance time, oldest first.
+        self.__last_acceptances = OrderedDict()
+        self.__sweeps = 0
+        self.__sweep_time = 0.
+        self.__max_sweep_time = 0.
 
         self.__update_tags_list = update_tags_list
 
@@ -53,9 +85,23 @@ class TagRegistration:
         self.__stop_read_thread.set()
         self.__read_thread.join()
 
+    def statistics(self):
+        """
+        Returns the sweep timings and the read counters of each reader.
+        :return: A dictionary of the counter values.
+        """
+        return {
+            'sweeps': self.__sweeps,
+            'meanSweepTime': self.__sweep_time / self.__sweeps
+            if self.__sweeps else 0.,
+            'maxSweepTime': self.__max_sweep_time,
+            'trackedTags': len(self.__last_acceptances),
+            'readers': [dict(reader['statistics']) for reader in self.__readers]
+        }
+
     def __read_thread_method(self):
         """
-        Cyclically reads for any rfid tag in front of the reader.
+        Cyclically reads for any rfid tag in front of the readers.
 
         Can be stopped by setting the __stop_read_thread event.
         :return:
@@ -64,94 +110,154 @@ class TagRegistration:
             if self.__stop_read_thread.is_set():
                 return
 
-            self.__read()
-            time.sleep(0.25)
+            self.__sweep()
+            time.sleep(self.__read_interval)
 
-    def __read(self):
+    def __sweep(self):
         """
-        Reads any tag and updates the current configuration if a tag was
-        detected.
+        Sends a request on every reader first and collects the answers
+        afterwards, so the readers wait for their tags simultaneously and the
+        sweep time hardly grows with the number of readers.
         :return:
         """
-        status, tag_type = self.__tag_reader.MFRC522_Request(
-            self.__tag_reader.PICC_REQIDL)
-        if not self.__read_succeeded(status):
-            return
+        start = time.perf_counter()
+
+        for reader in self.__readers:
+            reader['reader'].MFRC522_RequestStart(reader['reader'].PICC_REQIDL)
 
-        status, uid = self.__tag_reader.MFRC522_Anticoll()
-        if not status == self.__tag_reader.MI_OK:
+        for reader in self.__readers:
+            reader['statistics']['requests'] += 1
+            status, tag_type = reader['reader'].MFRC522_RequestFinish()
+            if not self.__read_succeeded(reader, status):
+                continue
+            self.__read(reader)
+
+        sweep_time = time.perf_counter() - start
+        self.__sweeps += 1
+        self.__sweep_time += sweep_time
+        self.__max_sweep_time = max(self.__max_sweep_time, sweep_time)
+
+    def __read(self, reader):
+        """
+        Reads the tag in front of the given reader and updates the current
+        configuration if the tag was accepted.
+        :param reader: The reader which detected a tag.
+        :return:
+        """
+        tag_reader = reader['reader']
+        status, uid = tag_reader.MFRC522_Anticoll()
+        if not status == tag_reader.MI_OK:
+            reader['statistics']['failures'] += 1
             print('[TagRegistration] Getting unique id of the tag failed')
             return
 
-        if not self.__authenticate_read(uid):
+        if not self.__authenticate_read(tag_reader, uid):
+            reader['statistics']['failures'] += 1
             print('[TagRegistration] Authentication of the tag failed')
             return
 
-        if not self.__reached_acceptance_level(uid):
+        reader['statistics']['reads'] += 1
+        if not self.__reached_acceptance_level(reader, uid):
+            return
+
+        uid_hex = '-'.join([format(fragment, '02x') for fragment in uid])
+        if self.__is_duplicate(reader, uid_hex):
+            reader['statistics']['duplicates'] += 1
             return
 
-        uid_hex = [format(fragment, '02x') for fragment in uid]
-        self.__update_tags_list('-'.join(uid_hex))
+        reader['statistics']['accepted'] += 1
+        self.__update_tags_list(uid_hex)
+
+    def __is_duplicate(self, reader, uid):
+        """
+        Checks whether another reader accepted the same tag within the
+        deduplication period and remembers the acceptance otherwise.
+
+        Acceptances older than the deduplication period are forgotten, so
+        only the tags of the last period are kept.
+        :param reader: The reader which accepted the tag.
+        :param uid: The unique id of the tag.
+        :return: True if the tag is a duplicate, else False.
+        """
+        now = time.monotonic()
+        last_acceptance = self.__last_acceptances.get(uid)
+        if last_acceptance is not None and last_acceptance[0] is not reader \
+                and now - last_acceptance[1] < self.__deduplication_period:
+            return True
+
+        self.__last_acceptances[uid] = (reader, now)
+        self.__last_acceptances.move_to_end(uid)
+        while self.__last_acceptances:
+            oldest_uid, (_, oldest_time) = next(
+                iter(self.__last_acceptances.items()))
+            if now - oldest_time < self.__deduplication_period:
+                break
+            del self.__last_acceptances[oldest_uid]
+        return False
 
-    def __read_succeeded(self, status):
+    @staticmethod
+    def __read_succeeded(reader, status):
         """
         Compensates unsuccessful reads as they cyclically occur although a tag
         remains in front of the reader.
+        :param reader: The reader the status belongs to.
         :param status: The read status.
         :return: True if reading succeeded, else False.
         """
-        if status == self.__tag_reader.MI_OK:
-            self.__rfid_registration['errors'] = 0
+        if status == reader['reader'].MI_OK:
+            reader['errors'] = 0
             return True
 
-        if self.__rfid_registration['errors'] == 1:
-            self.__rfid_registration['uid'] = []
-            self.__rfid_registration['counter'] = 0
+        if reader['errors'] == 1:
+            reader['uid'] = []
+            reader['counter'] = 0
         else:
-            self.__rfid_registration['errors'] += 1
+            reader['errors'] += 1
         return False
 
-    def __authenticate_read(self, uid):
+    def __authenticate_read(self, tag_reader, uid):
         """
         Authenticates the given unique id.
+        :param tag_reader: The reader in front of which the tag is.
         :param uid: The rfid tag unique id.
         :return: True if authenticated, else False.
         """
-        self.__tag_reader.MFRC522_SelectTag(uid)
-        status = self.__tag_reader.MFRC522_Auth(
-            self.__tag_reader.PICC_AUTHENT1A,
+        tag_reader.MFRC522_SelectTag(uid)
+        status = tag_reader.MFRC522_Auth(
+            tag_reader.PICC_AUTHENT1A,
             self.__authentication_key_length,
             self.__authentication_key, uid)
 
-        if status != self.__tag_reader.MI_OK:
+        if status != tag_reader.MI_OK:
             return False
 
-        self.__tag_reader.MFRC522_Read(self.__authentication_key_length)
-        self.__tag_reader.MFRC522_StopCrypto1()
+        tag_reader.MFRC522_Read(self.__authentication_key_length)
+        tag_reader.MFRC522_StopCrypto1()
         return True
 
     RFID_REGISTRATION_ACCEPTANCE = 2
 
-    def __reached_acceptance_level(self, uid):
+    def __reached_acceptance_level(self, reader, uid):
         """
         Counts the number of reads of the same unique id one after the other.
 
         A unique id has to be read twice to be accepted as being read in. That
         way the user has to hold the tag in front of the reader for at least
         one second.
+        :param reader: The reader which registered the unique id.
         :param uid: The unique id which was registered by the reader.
         :return: True if the unique id reached the acceptance level, else False.
         """
-        if uid == self.__rfid_registration['uid']:
-            if self.__rfid_registration['counter'] == 0:
+        if uid == reader['uid']:
+            if reader['counter'] == 0:
                 return False
-            self.__rfid_registration['counter'] += 1
+            reader['counter'] += 1
         else:
-            self.__rfid_registration['uid'] = uid
-            self.__rfid_registration['counter'] = 1
+            reader['uid'] = uid
+            reader['counter'] = 1
 
-        if not self.__rfid_registration['counter'] == self.RFID_REGISTRATION_ACCEPTANCE:
+        if not reader['counter'] == self.RFID_REGISTRATION_ACCEPTANCE:
             return False
 
-        self.__rfid_registration['counter'] = 0
+        reader['counter'] = 0
         return True
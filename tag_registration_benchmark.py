@@ -0,0 +1,115 @@
+import argparse
+import time
+
+from mock.rc522_simulator import CardScript, Rc522Simulator, SimulatedCard, \
+    SimulatedSpiBus, install
+
+DEVICES = ['/dev/spidev0.0', '/dev/spidev0.1', '/dev/spidev1.0',
+           '/dev/spidev1.1', '/dev/spidev1.2']
+
+
+class TagRegistrationBenchmark:
+    """
+    Runs the MFRC522 driver and the tag registration against a simulated
+    reader and measures the tag throughput and the time to acceptance.
+    """
+
+    def __init__(self, tag_count: int, dwell_time: float, gap_time: float,
+                 transfer_latency: float, read_interval: float,
+                 reader_count: int = 1):
+        """
+        Scripts the given number of cards to be held in front of the readers
+        one after another, taking turns between the readers.
+        :param tag_count: The number of cards.
+        :param dwell_time: The time in seconds each card stays in the field.
+        :param gap_time: The time in seconds between two cards.
+        :param transfer_latency: The time in seconds per SPI transfer.
+        :param read_interval: The tag registration's read interval in seconds.
+        :param reader_count: The number of readers on the SPI bus.
+        """
+        devices = DEVICES[:reader_count]
+        self.__scripts = [CardScript() for _ in devices]
+        self.__enter_times = {}
+        for i in range(tag_count):
+            card = SimulatedCard([0x10, (i >> 8) & 0xFF, i & 0xFF, 0x7A])
+            enter = i * (dwell_time + gap_time)
+            self.__scripts[i % len(devices)].add(card, enter, enter + dwell_time)
+            self.__enter_times[card.uid_string] = enter
+        self.__duration = tag_count * (dwell_time + gap_time)
+
+        self.__simulators = [
+            Rc522Simulator(script, transfer_latency=transfer_latency)
+            for script in self.__scripts]
+        install(SimulatedSpiBus(dict(zip(devices, self.__simulators))))
+
+        # The driver has to be imported after the simulator is installed.
+        from mfrc522.mfrc522 import MFRC522
+        from tag_registration import TagRegistration
+
+        self.__acceptance_times = {}
+        self.__start = 0.
+        self.__tag_registration = TagRegistration(
+            self.__on_tag_accepted,
+            tag_readers=[MFRC522(dev=device) for device in devices],
+            read_interval=read_interval)
+
+    def run(self):
+        """
+        Reads tags until the card script is finished.
+        :return: The benchmark results.
+        """
+        for script in self.__scripts:
+            script.restart()
+        for simulator in self.__simulators:
+            simulator.transfers = 0
+        self.__start = time.monotonic()
+        self.__tag_registration.start_tag_reading()
+        time.sleep(self.__duration)
+        self.__tag_registration.stop_tag_reading()
+        elapsed = time.monotonic() - self.__start
+        statistics = self.__tag_registration.statistics()
+
+        latencies = sorted(self.__acceptance_times.values())
+        return {
+            'tags': len(self.__enter_times),
+            'accepted': len(latencies),
+            'tagsPerSecond': len(latencies) / elapsed,
+            'meanTimeToAcceptance': sum(latencies) / len(latencies)
+            if latencies else None,
+            'maxTimeToAcceptance': latencies[-1] if latencies else None,
+            'spiTransfers': sum(
+                simulator.transfers for simulator in self.__simulators),
+            'meanSweepTime': statistics['meanSweepTime'],
+            'maxSweepTime': statistics['maxSweepTime'],
+            'readers': statistics['readers']
+        }
+
+    def __on_tag_accepted(self, uid):
+        elapsed = time.monotonic() - self.__start
+        if uid in self.__enter_times and uid not in self.__acceptance_times:
+            self.__acceptance_times[uid] = elapsed - self.__enter_times[uid]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmarks the rfid tag registration against a '
+                    'simulated MFRC522 reader.')
+    parser.add_argument('--tags', type=int, default=10)
+    parser.add_argument('--dwell', type=float, default=1.,
+                        help='seconds each tag stays in front of the reader')
+    parser.add_argument('--gap', type=float, default=.5,
+                        help='seconds between two tags')
+    parser.add_argument('--latency', type=float, default=20e-6,
+                        help='seconds per SPI transfer')
+    parser.add_argument('--readers', type=int, default=1,
+                        choices=range(1, len(DEVICES) + 1),
+                        help='number of readers on the SPI bus')
+    parser.add_argument('--interval', type=float, default=1 / 4.,
+                        help='seconds between two reads')
+    arguments = parser.parse_args()
+
+    results = TagRegistrationBenchmark(
+        arguments.tags, arguments.dwell, arguments.gap,
+        arguments.latency, arguments.interval, arguments.readers).run()
+    for key, value in results.items():
+        print('%s: %s' % (key, value))
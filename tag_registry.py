@@ -0,0 +1,79 @@
+from service.events import EventDispatcher
+
+
+class TagRegistry(EventDispatcher):
+    """
+    Keeps the registered tags and reports the differences of each update per
+    unique id.
+
+    Dispatches on_tag_added, on_tag_removed and on_tag_changed for every
+    affected tag, followed by a single on_tags_updated per update.
+    """
+
+    __events__ = ('on_tag_added', 'on_tag_removed', 'on_tag_changed',
+                  'on_tags_updated')
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.__tags = {}
+
+    def __contains__(self, uid):
+        return uid in self.__tags
+
+    def __getitem__(self, uid):
+        return self.__tags[uid]
+
+    def __iter__(self):
+        return iter(self.__tags)
+
+    def __len__(self):
+        return len(self.__tags)
+
+    def get(self, uid, default=None):
+        return self.__tags.get(uid, default)
+
+    def items(self):
+        return self.__tags.items()
+
+    def update(self, tags):
+        """
+        Replaces the registered tags and dispatches the differences.
+        :param tags: The dictionary of unique ids and tag records.
+        :return: The lists of added, removed and changed unique ids.
+        """
+        old_tags = self.__tags
+        new_tags = dict(tags)
+
+        removed = [uid for uid in old_tags if uid not in new_tags]
+        added = []
+        changed = []
+        for uid, tag in new_tags.items():
+            if uid not in old_tags:
+                added.append(uid)
+            elif old_tags[uid] != tag:
+                changed.append(uid)
+
+        self.__tags = new_tags
+
+        for uid in removed:
+            self.dispatch('on_tag_removed', uid, old_tags[uid])
+        for uid in added:
+            self.dispatch('on_tag_added', uid, new_tags[uid])
+        for uid in changed:
+            self.dispatch('on_tag_changed', uid, old_tags[uid], new_tags[uid])
+
+        if added or removed or changed:
+            self.dispatch('on_tags_updated', added, removed, changed)
+        return added, removed, changed
+
+    def on_tag_added(self, uid, tag):
+        pass
+
+    def on_tag_removed(self, uid, tag):
+        pass
+
+    def on_tag_changed(self, uid, old_tag, new_tag):
+        pass
+
+    def on_tags_updated(self, added, removed, changed):
+        pass
@@ -0,0 +1,9 @@
+import os
+import sys
+from os.path import abspath, dirname
+
+# The business logic runs on the headless event system, so the tests need
+# neither Kivy nor a display.
+os.environ['SCHOOLBAG_HEADLESS'] = '1'
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
@@ -0,0 +1,104 @@
+import json
+import os
+
+from service.content_journal import ContentJournal
+
+
+def open_journal(tmp_path, compaction_threshold=128):
+    return ContentJournal(str(tmp_path / 'content.journal'),
+                          str(tmp_path / 'content.snapshot.json'),
+                          compaction_threshold)
+
+
+def journal_data(tmp_path):
+    with open(str(tmp_path / 'content.journal'), 'rb') as journal:
+        return journal.read()
+
+
+def append(tmp_path, data):
+    with open(str(tmp_path / 'content.journal'), 'ab') as journal:
+        journal.write(data)
+
+
+def test_initial_content_becomes_the_snapshot(tmp_path):
+    journal = open_journal(tmp_path)
+    assert journal.load(['a', 'b']) == ['a', 'b']
+    journal.close()
+    with open(str(tmp_path / 'content.snapshot.json')) as snapshot:
+        assert json.load(snapshot) == ['a', 'b']
+
+
+def test_recorded_changes_are_replayed(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.load(['a', 'b'])
+    journal.record(['c'], ['a'])
+    journal.record(['d'], [])
+    journal.record(['a'], ['d'])
+    journal.close()
+
+    journal = open_journal(tmp_path)
+    assert journal.load(['ignored']) == ['b', 'c', 'a']
+    assert journal.statistics()['entries'] == 5
+    journal.close()
+
+
+def test_torn_tail_is_discarded_and_truncated(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.load([])
+    journal.record(['a'], [])
+    journal.close()
+    append(tmp_path, b'+b')
+
+    journal = open_journal(tmp_path)
+    assert journal.load([]) == ['a']
+    journal.record(['c'], [])
+    journal.close()
+    assert journal_data(tmp_path) == b'+a\n+c\n'
+
+
+def test_entries_from_an_unreadable_line_on_are_discarded(tmp_path):
+    for garbage in (b'\xff\xfe\n', b'*a\n', b'+\n', b'\n'):
+        journal = open_journal(tmp_path)
+        journal.load([])
+        journal.compact([])
+        journal.record(['a'], [])
+        journal.close()
+        append(tmp_path, garbage + b'+b\n')
+
+        journal = open_journal(tmp_path)
+        assert journal.load([]) == ['a']
+        assert journal.statistics()['entries'] == 1
+        journal.close()
+        assert journal_data(tmp_path) == b'+a\n'
+
+
+def test_compaction_moves_the_journal_into_the_snapshot(tmp_path):
+    journal = open_journal(tmp_path, compaction_threshold=3)
+    journal.load([])
+    assert not journal.record(['a', 'b'], [])
+    assert journal.record(['c'], [])
+    journal.compact(['a', 'b', 'c'])
+    assert journal.statistics()['entries'] == 0
+    assert journal.statistics()['compactions'] == 1
+    assert os.path.getsize(str(tmp_path / 'content.journal')) == 0
+    journal.record([], ['b'])
+    journal.close()
+
+    journal = open_journal(tmp_path)
+    assert journal.load([]) == ['a', 'c']
+    journal.close()
+
+
+def test_journal_surviving_a_compaction_replays_to_the_same_content(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.load([])
+    journal.record(['a', 'b'], [])
+    journal.record([], ['a'])
+    journal.close()
+    # A crash after replacing the snapshot but before truncating the journal.
+    with open(str(tmp_path / 'content.snapshot.json'), 'w') as snapshot:
+        json.dump(['b'], snapshot)
+
+    journal = open_journal(tmp_path)
+    assert journal.load([]) == ['b']
+    journal.close()
@@ -0,0 +1,76 @@
+from service.content_list import ContentList
+
+
+class RecordingList(list):
+    """
+    Row list which records the operations applied to it.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.operations = []
+
+    def __setitem__(self, index, value):
+        self.operations.append(('set', index))
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self.operations.append(('delete', index))
+        super().__delitem__(index)
+
+    def append(self, value):
+        self.operations.append(('append', value))
+        super().append(value)
+
+
+def new_list(uids):
+    content_list = ContentList(lambda uid: {'uid': uid})
+    content_list.update(uids)
+    data = RecordingList()
+    content_list.attach(data)
+    data.operations.clear()
+    return content_list, data
+
+
+def test_update_applies_only_the_removals_and_insertions():
+    content_list, data = new_list(['a', 'b', 'c'])
+    assert content_list.update(['a', 'c', 'd'])
+    assert data.operations == [('delete', 1), ('append', {'uid': 'd'})]
+    assert content_list.uids == ['a', 'c', 'd']
+    assert data == [{'uid': 'a'}, {'uid': 'c'}, {'uid': 'd'}]
+
+
+def test_reorder_does_not_touch_the_rows():
+    content_list, data = new_list(['a', 'b', 'c'])
+    assert not content_list.update(['c', 'a', 'b'])
+    assert not content_list.update({'b', 'c', 'a'})
+    assert data.operations == []
+    assert content_list.uids == ['a', 'b', 'c']
+
+
+def test_replacing_all_uids_removes_from_the_end():
+    content_list, data = new_list(['a', 'b'])
+    assert content_list.update(['x', 'y'])
+    assert data.operations == [('delete', 1), ('delete', 0),
+                               ('append', {'uid': 'x'}),
+                               ('append', {'uid': 'y'})]
+    assert content_list.uids == ['x', 'y']
+
+
+def test_refresh_replaces_a_single_row():
+    content_list, data = new_list(['a', 'b'])
+    assert content_list.refresh('b')
+    assert not content_list.refresh('x')
+    assert data.operations == [('set', 1)]
+
+
+def test_detached_rows_are_kept_privately():
+    content_list, data = new_list(['a'])
+    content_list.detach()
+    content_list.update(['a', 'b'])
+    assert data == [{'uid': 'a'}]
+    assert data.operations == []
+
+    other = []
+    content_list.attach(other)
+    assert other == [{'uid': 'a'}, {'uid': 'b'}]
@@ -0,0 +1,53 @@
+import sys
+import time
+from threading import Event
+
+import pytest
+
+from service import file_watcher
+from service.file_watcher import FileWatcher
+from service.write_behind_persister import write_atomically
+
+
+def watch(tmp_path, use_inotify):
+    path = str(tmp_path / 'data.json')
+    write_atomically(path, b'{}')
+    changed = Event()
+    watcher = FileWatcher(path, changed.set, debounce_period=.05,
+                          poll_interval=.02, use_inotify=use_inotify)
+    watcher.start()
+    return path, watcher, changed
+
+
+@pytest.mark.parametrize('use_inotify', [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(
+        file_watcher._load_inotify() is None,
+        reason='inotify is not available'))])
+def test_replaced_file_is_reported(tmp_path, use_inotify):
+    path, watcher, changed = watch(tmp_path, use_inotify)
+    assert watcher.backend == ('inotify' if use_inotify else 'polling')
+    try:
+        # Lets the polling watcher take the initial state.
+        time.sleep(.05)
+        write_atomically(path, b'{"height": 150}')
+        assert changed.wait(2.)
+        assert watcher.statistics()['notifications'] == 1
+    finally:
+        watcher.stop()
+
+
+def test_polling_watcher_stops_without_waiting_for_the_interval(tmp_path):
+    path = str(tmp_path / 'data.json')
+    write_atomically(path, b'{}')
+    watcher = FileWatcher(path, lambda: None, poll_interval=60.,
+                          use_inotify=False)
+    watcher.start()
+    start = time.monotonic()
+    watcher.stop()
+    assert time.monotonic() - start < 1.
+
+
+def test_inotify_is_only_loaded_on_linux(monkeypatch):
+    monkeypatch.setattr(sys, 'platform', 'win32')
+    assert file_watcher._load_inotify() is None
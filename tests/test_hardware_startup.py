@@ -0,0 +1,69 @@
+import time
+from threading import Event
+
+from service.hardware_startup import HardwareStartup, STATE_FAILED, \
+    STATE_PENDING, STATE_READY, STATE_STARTING
+
+
+def fail():
+    raise RuntimeError('The device is not attached.')
+
+
+def test_failed_subsystem_does_not_affect_the_others():
+    states = []
+    hardware = HardwareStartup(lambda name, state: states.append(
+        (name, state)))
+    hardware.add('ledStripe', lambda: 'led stripe')
+    hardware.add('weightMeasurement', fail)
+    assert hardware.statistics()['ledStripe']['state'] == STATE_PENDING
+
+    hardware.start()
+    assert hardware.wait(2.)
+    assert hardware.get('ledStripe') == 'led stripe'
+    assert hardware.get('weightMeasurement') is None
+    assert hardware.get('unknown') is None
+    assert hardware.instances() == ['led stripe']
+
+    statistics = hardware.statistics()
+    assert statistics['ledStripe']['state'] == STATE_READY
+    assert statistics['ledStripe']['error'] is None
+    assert statistics['weightMeasurement']['state'] == STATE_FAILED
+    assert statistics['weightMeasurement']['error'] \
+        == 'RuntimeError: The device is not attached.'
+    assert statistics['weightMeasurement']['duration'] >= 0
+    assert sorted(states) == [
+        ('ledStripe', STATE_READY), ('ledStripe', STATE_STARTING),
+        ('weightMeasurement', STATE_FAILED),
+        ('weightMeasurement', STATE_STARTING)]
+
+
+def test_subsystems_initialize_in_parallel():
+    release = Event()
+    hardware = HardwareStartup()
+    hardware.add('slow', lambda: release.wait(2.) and 'slow')
+    hardware.add('fast', lambda: 'fast')
+    hardware.start()
+
+    deadline = time.monotonic() + 2.
+    while hardware.get('fast') is None and time.monotonic() < deadline:
+        time.sleep(.01)
+    assert hardware.get('fast') == 'fast'
+    assert hardware.statistics()['slow']['state'] == STATE_STARTING
+    assert not hardware.wait(.05)
+
+    release.set()
+    assert hardware.wait(2.)
+    assert hardware.get('slow') == 'slow'
+
+
+def test_start_initializes_pending_subsystems_only():
+    calls = []
+    hardware = HardwareStartup()
+    hardware.add('first', lambda: calls.append('first') or 'first')
+    hardware.start()
+    assert hardware.wait(2.)
+
+    hardware.add('second', lambda: calls.append('second') or 'second')
+    hardware.start()
+    assert hardware.wait(2.)
+    assert calls == ['first', 'second']
@@ -0,0 +1,175 @@
+import time
+from threading import Thread
+
+import pytest
+
+from service.headless_events import DictProperty, EventDispatcher, \
+    HeadlessClock, ListProperty, NumericProperty, OptionProperty
+
+
+class Dispatcher(EventDispatcher):
+    __events__ = ('on_event',)
+
+    count = NumericProperty(0)
+    mode = OptionProperty('off', options=['off', 'on'])
+    items = ListProperty()
+    values = DictProperty()
+
+    def __init__(self, **kwargs):
+        self.calls = []
+        super().__init__(**kwargs)
+
+    def on_event(self, value):
+        self.calls.append(('default', value))
+
+    def on_count(self, instance, value):
+        self.calls.append(('on_count', value))
+
+
+def test_handlers_are_called_in_reverse_order_before_the_default():
+    dispatcher = Dispatcher()
+    dispatcher.bind(on_event=lambda instance, value: dispatcher.calls.append(
+        ('first', value)))
+    dispatcher.bind(on_event=lambda instance, value: dispatcher.calls.append(
+        ('second', value)))
+    dispatcher.dispatch('on_event', 1)
+    assert dispatcher.calls == [('second', 1), ('first', 1), ('default', 1)]
+
+
+def test_handler_returning_true_stops_the_dispatch():
+    dispatcher = Dispatcher()
+    dispatcher.bind(on_event=lambda instance, value: dispatcher.calls.append(
+        ('first', value)))
+    dispatcher.bind(on_event=lambda instance, value: True)
+    assert dispatcher.dispatch('on_event', 1) is True
+    assert dispatcher.calls == []
+
+
+def test_property_observers_are_called_on_changes_only():
+    dispatcher = Dispatcher(count=1)
+    observed = []
+    dispatcher.bind(count=lambda instance, value: observed.append(value))
+    dispatcher.count = 2
+    dispatcher.count = 2
+    dispatcher.count = 3
+    assert observed == [2, 3]
+    assert dispatcher.calls == [('on_count', 1), ('on_count', 2),
+                                ('on_count', 3)]
+
+
+def test_unbound_observers_are_not_called():
+    dispatcher = Dispatcher()
+    observed = []
+
+    def observer(*args):
+        observed.append(args)
+    dispatcher.bind(count=observer)
+    dispatcher.fbind('count', observer, 'name')
+    dispatcher.unbind(count=observer)
+    dispatcher.funbind('count', observer, 'name')
+    dispatcher.count = 1
+    assert observed == []
+
+
+def test_fbind_passes_its_arguments_first():
+    dispatcher = Dispatcher()
+    observed = []
+    dispatcher.fbind('count', lambda *args: observed.append(args), 'name')
+    dispatcher.count = 5
+    assert observed == [('name', dispatcher, 5)]
+
+
+def test_unknown_names_are_rejected():
+    with pytest.raises(TypeError):
+        Dispatcher(unknown=1)
+    with pytest.raises(KeyError):
+        Dispatcher().bind(unknown=print)
+    with pytest.raises(ValueError):
+        Dispatcher().mode = 'blinking'
+    with pytest.raises(ValueError):
+        Dispatcher().count = None
+
+
+def test_list_and_dict_changes_in_place_are_observed():
+    dispatcher = Dispatcher()
+    observed = []
+    dispatcher.bind(items=lambda instance, value: observed.append(
+        list(value)))
+    dispatcher.bind(values=lambda instance, value: observed.append(
+        dict(value)))
+    dispatcher.items.append('a')
+    dispatcher.items += ['b']
+    dispatcher.items.remove('a')
+    dispatcher.values['a'] = 1
+    dispatcher.values.update(b=2)
+    del dispatcher.values['a']
+    assert observed == [['a'], ['a', 'b'], ['b'], {'a': 1},
+                        {'a': 1, 'b': 2}, {'b': 2}]
+
+
+def test_instances_have_their_own_values():
+    first, second = Dispatcher(), Dispatcher()
+    first.items.append('a')
+    assert second.items == []
+
+
+def test_clock_calls_due_callbacks_only():
+    clock = HeadlessClock()
+    calls = []
+    clock.schedule_once(lambda dt: calls.append('now'))
+    clock.schedule_once(lambda dt: calls.append('later'), 60.)
+    clock.tick()
+    assert calls == ['now']
+    clock.tick()
+    assert calls == ['now']
+    assert clock.statistics()['scheduledEvents'] == 1
+
+
+def test_interval_stops_when_the_callback_returns_false():
+    clock = HeadlessClock(frame_time=0)
+    calls = []
+
+    def callback(dt):
+        calls.append(dt)
+        return len(calls) < 3
+    clock.schedule_interval(callback, 0)
+    for _ in range(5):
+        clock.tick()
+    assert len(calls) == 3
+    assert clock.statistics()['scheduledEvents'] == 0
+
+
+def test_trigger_is_scheduled_once_and_can_be_cancelled():
+    clock = HeadlessClock()
+    calls = []
+    trigger = clock.create_trigger(lambda dt: calls.append(dt))
+    trigger()
+    trigger()
+    assert clock.statistics()['scheduledEvents'] == 1
+    clock.tick()
+    assert len(calls) == 1
+
+    trigger()
+    trigger.cancel()
+    clock.tick()
+    assert len(calls) == 1
+
+    event = clock.schedule_interval(lambda dt: calls.append(dt), 0)
+    clock.unschedule(event)
+    clock.tick()
+    assert len(calls) == 1
+
+
+def test_run_returns_after_stop_from_another_thread():
+    clock = HeadlessClock()
+    calls = []
+    clock.schedule_once(lambda dt: calls.append(dt))
+    thread = Thread(target=clock.run, daemon=True)
+    thread.start()
+    time.sleep(.05)
+    clock.schedule_once(lambda dt: calls.append(dt))
+    time.sleep(.05)
+    clock.stop()
+    thread.join(1.)
+    assert not thread.is_alive()
+    assert len(calls) == 2
@@ -0,0 +1,71 @@
+from mock.rc522_simulator import SimulatedSpiBus, install
+
+# The driver binds the spidev and GPIO modules on import, so the simulated bus
+# has to be installed first.
+install(SimulatedSpiBus())
+
+from mfrc522 import mfrc522  # noqa: E402
+from mfrc522.mfrc522 import MFRC522  # noqa: E402
+
+
+def bus():
+    """
+    :return: The simulated bus the driver was imported with, which is the one
+    of the first test module importing it.
+    """
+    return mfrc522.spidev.SpiDev.__self__
+
+
+def test_readers_keep_their_spi_handles_open():
+    first = MFRC522(dev='/dev/spidev1.0')
+    second = MFRC522(dev='/dev/spidev1.1')
+    opens = bus().opens
+    first_transfers = bus().readers['/dev/spidev1.0'].transfers
+    second_transfers = bus().readers['/dev/spidev1.1'].transfers
+
+    for _ in range(3):
+        first.Read_MFRC522(first.VersionReg)
+        second.Read_MFRC522(second.VersionReg)
+    assert bus().opens == opens
+    assert bus().readers['/dev/spidev1.0'].transfers == first_transfers + 3
+    assert bus().readers['/dev/spidev1.1'].transfers == second_transfers + 3
+
+    third = MFRC522(dev='/dev/spidev1.0')
+    assert third.spi is first.spi
+    assert bus().opens == opens
+
+
+def test_cached_register_skips_the_redundant_transfer():
+    reader = MFRC522(dev='/dev/spidev2.0')
+    simulator = bus().readers['/dev/spidev2.0']
+    transfers = simulator.transfers
+
+    assert reader.Read_MFRC522(reader.ModeReg) == 0x3D
+    assert simulator.transfers == transfers
+
+    reader.SetBitMask(reader.ModeReg, 0x40)
+    reader.ClearBitMask(reader.TxControlReg, 0x03)
+    assert simulator.transfers == transfers + 2
+    assert reader.Read_MFRC522(reader.ModeReg) == 0x7D
+    assert simulator.transfers == transfers + 2
+
+    reader.MFRC522_Reset()
+    reader.Read_MFRC522(reader.ModeReg)
+    assert simulator.transfers == transfers + 4
+
+
+def test_volatile_registers_are_always_read_from_the_chip():
+    reader = MFRC522(dev='/dev/spidev2.1')
+    simulator = bus().readers['/dev/spidev2.1']
+    for register in (reader.FIFOLevelReg, reader.CommIrqReg,
+                     reader.Status2Reg):
+        assert register in reader.VOLATILE_REGISTERS
+        transfers = simulator.transfers
+        reader.Read_MFRC522(register)
+        reader.Read_MFRC522(register)
+        assert simulator.transfers == transfers + 2
+        assert register not in reader.registerCache
+
+    transfers = simulator.transfers
+    reader.SetBitMask(reader.FIFOLevelReg, 0x80)
+    assert simulator.transfers == transfers + 2
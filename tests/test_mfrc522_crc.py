@@ -0,0 +1,58 @@
+import pytest
+
+from mock.rc522_simulator import Rc522Simulator, SimulatedSpiBus, install
+
+DEVICE = '/dev/spidev0.0'
+
+# The driver binds the spidev and GPIO modules on import, so the simulated bus
+# has to be installed first.
+install(SimulatedSpiBus({DEVICE: Rc522Simulator()}))
+
+from mfrc522.mfrc522 import MFRC522, crc_a  # noqa: E402
+
+# ISO/IEC 14443-3 CRC_A examples, the CRC given as [low byte, high byte].
+CRC_A_VECTORS = [
+    ([0x00, 0x00], [0xA0, 0x1E]),
+    ([0x12, 0x34], [0x26, 0xCF]),
+    # HLTA
+    ([0x50, 0x00], [0x57, 0xCD]),
+    # READ of block 0
+    ([0x30, 0x00], [0x02, 0xA8]),
+]
+
+FRAMES = [
+    [],
+    [0x93, 0x70, 0x10, 0x00, 0x00, 0x7A, 0x6A],
+    [0xA0, 0x04],
+    list(range(16)),
+    [0xFF] * 18,
+]
+
+
+@pytest.fixture(scope='module')
+def reader():
+    return MFRC522(dev=DEVICE, host_crc=False)
+
+
+@pytest.mark.parametrize('data,crc', CRC_A_VECTORS)
+def test_host_crc_matches_iso_vectors(data, crc):
+    assert crc_a(data) == crc
+
+
+@pytest.mark.parametrize('data,crc', CRC_A_VECTORS)
+def test_coprocessor_crc_matches_iso_vectors(reader, data, crc):
+    assert reader.CalulateCRC_Coprocessor(data) == crc
+
+
+@pytest.mark.parametrize('data', FRAMES)
+def test_host_crc_matches_coprocessor(reader, data):
+    assert reader.MFRC522_CheckCRC(data)
+    assert crc_a(data) == reader.CalulateCRC_Coprocessor(data)
+
+
+def test_calculate_crc_uses_the_configured_path():
+    host_reader = MFRC522(dev=DEVICE, host_crc=True)
+    coprocessor_reader = MFRC522(dev=DEVICE, host_crc=False)
+    for data in FRAMES:
+        assert host_reader.CalulateCRC(data) \
+            == coprocessor_reader.CalulateCRC(data)
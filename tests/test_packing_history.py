@@ -0,0 +1,72 @@
+import datetime
+import sqlite3
+
+import pytest
+
+from service.packing_history import PackingHistory
+
+MONDAY = datetime.date(2026, 3, 2)
+
+
+def timestamp(date, hour=8):
+    return datetime.datetime(date.year, date.month, date.day, hour).timestamp()
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = PackingHistory(str(tmp_path / 'history.db'))
+    yield history
+    history.close()
+
+
+def test_changes_are_counted_on_their_day(history):
+    tuesday = MONDAY + datetime.timedelta(days=1)
+    history.record_changes(['a1', 'b2'], [], timestamp(MONDAY))
+    history.record_changes(['a1'], ['a1'], timestamp(MONDAY, 23))
+    history.record_changes([], ['a1'], timestamp(tuesday, 0))
+
+    assert history.daily_counters('a1', today=tuesday) == [
+        (MONDAY, 2, 1, 0, 0, 0), (tuesday, 0, 1, 0, 0, 0)]
+    assert history.daily_counters('b2', today=tuesday) == [
+        (MONDAY, 1, 0, 0, 0, 0)]
+    assert history.statistics() == {
+        'materials': 2, 'events': 5, 'dailyCounters': 3}
+
+
+def test_closing_a_day_again_replaces_its_state(history):
+    history.close_day(MONDAY, ['a1', 'b2'], ['a1', 'b2'], ['c3'])
+    history.close_day(MONDAY, ['a1', 'b2'], ['b2'], [])
+
+    assert history.daily_counters('a1', today=MONDAY) == [
+        (MONDAY, 0, 0, 1, 0, 0)]
+    assert history.daily_counters('b2', today=MONDAY) == [
+        (MONDAY, 0, 0, 1, 1, 0)]
+    assert history.daily_counters('c3', today=MONDAY) == [
+        (MONDAY, 0, 0, 0, 0, 0)]
+
+
+def test_miss_rates_cover_the_weeks_ordered_by_rate(history):
+    for days_ago, missed in ((0, ['b2']), (7, ['a1', 'b2']), (13, ['b2']),
+                             (14, ['c3', 'a1']), (20, ['c3', 'a1'])):
+        history.close_day(MONDAY - datetime.timedelta(days=days_ago),
+                          ['a1', 'b2', 'c3'], missed, [])
+
+    assert history.miss_rates(weeks=2, today=MONDAY) == [
+        ('b2', 3, 3, 1.), ('a1', 3, 1, 1 / 3), ('c3', 3, 0, 0.)]
+    assert history.miss_rates(weeks=3, today=MONDAY) == [
+        ('a1', 5, 3, .6), ('b2', 5, 3, .6), ('c3', 5, 2, .4)]
+    assert history.miss_rates(
+        weeks=1, today=MONDAY - datetime.timedelta(days=21)) == []
+
+
+def test_rolled_back_transaction_leaves_no_material_ids(history):
+    with pytest.raises(sqlite3.IntegrityError):
+        history.record_changes(['a1'], [None], timestamp(MONDAY))
+    assert history._PackingHistory__material_ids == {}
+    assert history.statistics() == {
+        'materials': 0, 'events': 0, 'dailyCounters': 0}
+
+    history.record_changes(['a1'], [], timestamp(MONDAY))
+    assert history.daily_counters('a1', today=MONDAY) == [
+        (MONDAY, 1, 0, 0, 0, 0)]
+    assert history.statistics()['materials'] == 1
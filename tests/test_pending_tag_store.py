@@ -0,0 +1,77 @@
+import json
+
+from service.pending_tag_store import PendingTagStore
+
+
+def new_store(tmp_path, flush_period=10.):
+    path = str(tmp_path / 'newRFID.json')
+    open(path, 'ab').close()
+    return path, PendingTagStore(path, flush_period)
+
+
+def test_tags_keep_the_order_of_their_first_read(tmp_path):
+    path, store = new_store(tmp_path)
+    assert store.add('b')
+    assert store.add('a')
+    first_seen = store.first_seen('b')
+    assert not store.add('b')
+    assert list(store) == ['b', 'a']
+    assert len(store) == 2 and 'a' in store
+    assert store.first_seen('b') == first_seen
+    assert store.last_seen('b') >= first_seen
+
+
+def test_burst_of_tags_is_written_in_one_batch(tmp_path):
+    path, store = new_store(tmp_path)
+    for index in range(20):
+        store.add('tag%d' % index)
+    assert store.statistics()['writes'] == 0
+
+    store.flush()
+    statistics = store.statistics()
+    assert statistics['writes'] == 1
+    assert statistics['requests'] == 20
+    assert statistics['tags'] == 20
+    with open(path) as file:
+        tags_object = json.load(file)
+    assert tags_object['tags'] == ['tag%d' % index for index in range(20)]
+    assert set(tags_object['seen']['tag0']) == {'firstSeen', 'lastSeen'}
+
+
+def test_load_reads_the_written_file(tmp_path):
+    path, store = new_store(tmp_path)
+    store.add('b')
+    store.add('a')
+    store.flush()
+
+    loaded = PendingTagStore(path)
+    loaded.load()
+    assert list(loaded) == ['b', 'a']
+    assert loaded.first_seen('b') == store.first_seen('b')
+
+
+def test_load_accepts_files_without_timestamps(tmp_path):
+    path, store = new_store(tmp_path)
+    with open(path, 'w') as file:
+        json.dump({'tags': ['a', 'b']}, file)
+    store.load()
+    assert list(store) == ['a', 'b']
+    assert store.first_seen('a') is None
+
+
+def test_load_ignores_an_unreadable_file(tmp_path):
+    path, store = new_store(tmp_path)
+    with open(path, 'w') as file:
+        file.write('{"tags": [')
+    store.load()
+    assert len(store) == 0
+
+
+def test_registered_tags_are_discarded(tmp_path):
+    path, store = new_store(tmp_path)
+    for uid in ('a', 'b', 'c'):
+        store.add(uid)
+    assert store.discard_known({'b': None, 'x': None}) == ['b']
+    assert sorted(store.discard_known(['a', 'c', 'x', 'y'])) == ['a', 'c']
+    assert list(store) == []
+    assert store.discard_known(['a']) == []
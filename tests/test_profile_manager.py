@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+
+import pytest
+
+from profile_manager import ProfileManager
+from service.events import Clock
+
+
+def write_settings(path, **values):
+    settings = {
+        'gender': 'female', 'birthday': '', 'height': 0, 'weight': 0,
+        'lightingMode': 'off', 'animationType': 'constant',
+        'currentContent': [],
+        'tags': {uid: {'materialName': uid, 'imgName': 'default_image'}
+                 for uid in ('a1', 'b2')}}
+    settings.update(values)
+    with open(path, 'w') as settings_file:
+        json.dump(settings, settings_file)
+
+
+@pytest.fixture
+def profile_manager(tmp_path):
+    os.makedirs(str(tmp_path / 'anna'))
+    write_settings(str(tmp_path / 'anna' / 'data.json'))
+    profile_manager = ProfileManager(
+        ['anna', 'ben'], profiles_directory=str(tmp_path), use_database=False)
+    yield profile_manager
+    profile_manager.__del__()
+
+
+def watcher_threads(tmp_path):
+    return [thread.name for thread in threading.enumerate()
+            if thread.name.startswith('FileWatcher %s' % tmp_path)]
+
+
+def open_history_files(tmp_path):
+    if not os.path.isdir('/proc/self/fd'):
+        pytest.skip('open files can not be listed')
+    paths = []
+    for descriptor in os.listdir('/proc/self/fd'):
+        try:
+            path = os.readlink(os.path.join('/proc/self/fd', descriptor))
+        except OSError:
+            continue
+        if path.startswith(str(tmp_path)) and path.endswith('history.db'):
+            paths.append(path)
+    return paths
+
+
+def test_only_the_active_profile_holds_resources(tmp_path, profile_manager):
+    anna = str(tmp_path / 'anna')
+    ben = str(tmp_path / 'ben')
+    assert profile_manager.active_profile.name == 'anna'
+    assert watcher_threads(tmp_path) == ['FileWatcher %s/data.json' % anna]
+    assert open_history_files(tmp_path) == [anna + '/history.db']
+
+    profile_manager.switch_to('ben')
+    assert profile_manager.active_profile.name == 'ben'
+    assert watcher_threads(tmp_path) == ['FileWatcher %s/data.json' % ben]
+    assert open_history_files(tmp_path) == [ben + '/history.db']
+
+    profile_manager.switch_to('anna')
+    assert watcher_threads(tmp_path) == ['FileWatcher %s/data.json' % anna]
+    assert open_history_files(tmp_path) == [anna + '/history.db']
+
+
+def test_suspended_profile_keeps_its_content(tmp_path, profile_manager):
+    profile_manager.settings.current_content.append('a1')
+    profile_manager.switch_to('ben')
+    assert profile_manager.settings.current_content == []
+
+    profile_manager.switch_to('anna')
+    assert profile_manager.settings.current_content == ['a1']
+    profile_manager.settings.current_content.append('b2')
+    assert profile_manager.settings.content_journal_statistics()[
+        'entries'] == 1
+
+
+def test_settings_file_changed_while_suspended_is_reloaded(tmp_path,
+                                                          profile_manager):
+    profile_manager.switch_to('ben')
+    write_settings(str(tmp_path / 'anna' / 'data.json'), height=130)
+
+    profile_manager.switch_to('anna')
+    Clock.tick()
+    assert profile_manager.settings.height == 130
@@ -0,0 +1,52 @@
+import pytest
+
+from settings import Settings
+
+
+@pytest.fixture
+def settings(tmp_path):
+    settings = Settings(profile_directory=str(tmp_path))
+    yield settings
+    settings.suspend()
+
+
+def observe(settings):
+    changes = []
+    settings.bind(on_change=lambda instance, names: changes.append(names))
+    return changes
+
+
+def test_change_outside_a_transaction_is_dispatched_right_away(settings):
+    changes = observe(settings)
+    settings.height = 140
+    settings.weight = 35
+    assert changes == [{'height'}, {'weight'}]
+
+
+def test_nested_transactions_dispatch_one_change(settings):
+    changes = observe(settings)
+    with settings.transaction():
+        settings.height = 140
+        with settings.transaction():
+            settings.weight = 35
+            settings.height = 150
+        assert changes == []
+        settings.lighting_mode = 'manual'
+    assert changes == [{'height', 'weight', 'lighting_mode'}]
+
+    with settings.transaction():
+        pass
+    assert len(changes) == 1
+
+
+def test_exception_in_a_transaction_still_dispatches(settings):
+    changes = observe(settings)
+    with pytest.raises(RuntimeError):
+        with settings.transaction():
+            with settings.transaction():
+                settings.height = 140
+                raise RuntimeError()
+    assert changes == [{'height'}]
+
+    settings.weight = 35
+    assert changes == [{'height'}, {'weight'}]
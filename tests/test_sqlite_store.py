@@ -0,0 +1,161 @@
+import json
+
+import pytest
+
+from service.sqlite_store import SqliteStore, digest
+from settings import Settings
+
+SETTINGS = {
+    'gender': 'female',
+    'birthday': '2012-03-04',
+    'height': 140,
+    'weight': 35,
+    'bagWeight': 800,
+    'lightingMode': 'automatic',
+    'animationType': 'cycle',
+    'tags': {
+        'a1': {'materialName': 'Mathe', 'imgName': 'math', 'monday': '1',
+               'tuesday': '0', 'friday': '1', 'weight': 400},
+        'b2': {'materialName': 'Atlas', 'imgName': 'atlas', 'comment': 'x'}
+    },
+    'currentContent': ['b2', 'a1']
+}
+
+
+def write_settings(path, settings):
+    with open(path, 'w') as settings_file:
+        json.dump(settings, settings_file)
+
+
+def test_json_round_trip(tmp_path):
+    settings_path = str(tmp_path / 'data.json')
+    new_tags_path = str(tmp_path / 'newRFID.json')
+    write_settings(settings_path, SETTINGS)
+    with open(new_tags_path, 'w') as new_tags_file:
+        json.dump({'tags': ['c3', 'd4']}, new_tags_file)
+
+    store = SqliteStore(str(tmp_path / 'settings.db'))
+    assert store.is_empty()
+    store.import_json(settings_path, new_tags_path)
+    assert store.load() == SETTINGS
+    assert store.load_new_tags() == ['c3', 'd4']
+
+    export_path = str(tmp_path / 'export.json')
+    store.export_json(export_path, str(tmp_path / 'exportRFID.json'))
+    with open(export_path, 'rb') as export_file:
+        content = export_file.read()
+    assert json.loads(content.decode('utf-8')) == SETTINGS
+    assert store.exported_digest() == digest(content)
+    store.close()
+
+
+def test_save_stores_the_differences(tmp_path):
+    store = SqliteStore(str(tmp_path / 'settings.db'))
+    store.save(SETTINGS)
+    changed = json.loads(json.dumps(SETTINGS))
+    changed['height'] = 150
+    del changed['tags']['b2']
+    changed['tags']['a1']['tuesday'] = '1'
+    changed['currentContent'] = ['a1']
+    store.save(changed)
+    store.close()
+
+    store = SqliteStore(str(tmp_path / 'settings.db'))
+    assert store.load() == changed
+    store.close()
+
+
+@pytest.fixture
+def open_settings(tmp_path):
+    opened = []
+
+    def open_settings():
+        settings = Settings(database_path=str(tmp_path / 'settings.db'),
+                            profile_directory=str(tmp_path))
+        opened.append(settings)
+        return settings
+    yield open_settings
+    for settings in opened:
+        settings.settings_watcher.stop()
+
+
+def close(settings):
+    settings.flush()
+    settings.settings_watcher.stop()
+
+
+def test_settings_file_is_imported_into_a_new_database(tmp_path,
+                                                       open_settings):
+    write_settings(str(tmp_path / 'data.json'), SETTINGS)
+    settings = open_settings()
+    assert settings.height == 140
+    assert settings.bag_weight == 800
+    assert sorted(settings.tags) == ['a1', 'b2']
+    close(settings)
+
+    store = SqliteStore(str(tmp_path / 'settings.db'))
+    assert store.load()['height'] == 140
+    with open(str(tmp_path / 'data.json'), 'rb') as settings_file:
+        assert store.exported_digest() == digest(settings_file.read())
+    store.close()
+
+
+def test_database_is_used_while_the_export_is_unchanged(tmp_path,
+                                                        open_settings):
+    write_settings(str(tmp_path / 'data.json'), SETTINGS)
+    settings = open_settings()
+    settings.height = 150
+    settings.save()
+    close(settings)
+
+    store = SqliteStore(str(tmp_path / 'settings.db'))
+    store.set_setting('weight', 36)
+    store.close()
+    settings = open_settings()
+    assert settings.height == 150
+    assert settings.weight == 36
+    close(settings)
+
+
+def test_changed_settings_file_is_imported_on_startup(tmp_path,
+                                                      open_settings):
+    write_settings(str(tmp_path / 'data.json'), SETTINGS)
+    close(open_settings())
+
+    changed = dict(SETTINGS, height=160, tags={})
+    write_settings(str(tmp_path / 'data.json'), changed)
+    settings = open_settings()
+    assert settings.height == 160
+    assert dict(settings.tags) == {}
+    close(settings)
+
+    store = SqliteStore(str(tmp_path / 'settings.db'))
+    assert store.load()['height'] == 160
+    assert store.load()['tags'] == {}
+    store.close()
+
+
+def test_row_changes_are_stored_and_exported(tmp_path, open_settings):
+    write_settings(str(tmp_path / 'data.json'), SETTINGS)
+    settings = open_settings()
+
+    def fail():
+        raise AssertionError('The settings are read on the main thread.')
+    settings._Settings__snapshot = fail
+    settings.current_content.remove('b2')
+    settings.current_content.append('c3')
+    settings.lighting_mode = 'off'
+    settings.tags = {'a1': settings.tags['a1']}
+
+    store = SqliteStore(str(tmp_path / 'settings.db'))
+    stored = store.load()
+    assert stored['currentContent'] == ['a1', 'c3']
+    assert stored['lightingMode'] == 'off'
+    assert sorted(stored['tags']) == ['a1']
+    store.close()
+
+    close(settings)
+    with open(str(tmp_path / 'data.json'), 'rb') as settings_file:
+        content = settings_file.read()
+    assert json.loads(content.decode('utf-8')) == stored
+    assert settings.content_journal_statistics()['entries'] == 0
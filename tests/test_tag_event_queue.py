@@ -0,0 +1,70 @@
+import pytest
+
+from service import tag_event_queue
+from service.tag_event_queue import TagEventQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(tag_event_queue.time, 'monotonic', clock)
+    return clock
+
+
+def test_events_are_drained_in_the_order_of_their_arrival(clock):
+    queue = TagEventQueue()
+    for uid in ('c', 'a', 'b'):
+        assert queue.publish(uid)
+    assert len(queue) == 3
+
+    assert [event.uid for event in queue.drain(2)] == ['c', 'a']
+    assert [event.uid for event in queue.drain()] == ['b']
+    assert queue.drain() == []
+
+
+def test_reads_within_the_deduplication_period_are_coalesced(clock):
+    queue = TagEventQueue(deduplication_period=.5)
+    assert queue.publish('a')
+    clock.now += .2
+    assert not queue.publish('a')
+    assert queue.publish('b')
+    clock.now += .5
+    assert queue.publish('a')
+
+    assert [event.uid for event in queue.drain()] == ['a', 'b', 'a']
+    statistics = queue.statistics()
+    assert statistics['published'] == 3
+    assert statistics['duplicates'] == 1
+
+
+def test_oldest_event_is_dropped_when_the_queue_is_full(clock):
+    queue = TagEventQueue(max_length=2)
+    for uid in ('a', 'b', 'c'):
+        queue.publish(uid)
+    assert [event.uid for event in queue.drain()] == ['b', 'c']
+    statistics = queue.statistics()
+    assert statistics['dropped'] == 1
+    assert statistics['maxDepth'] == 2
+
+
+def test_statistics_count_depth_and_event_age(clock):
+    queue = TagEventQueue()
+    assert queue.statistics()['meanAge'] == 0.
+    queue.publish('a')
+    clock.now += 1.
+    queue.publish('b')
+    assert queue.statistics()['depth'] == 2
+
+    clock.now += 1.
+    queue.drain()
+    assert queue.statistics() == {
+        'depth': 0, 'maxDepth': 2, 'published': 2, 'duplicates': 0,
+        'dropped': 0, 'drained': 2, 'meanAge': 1.5, 'maxAge': 2.}
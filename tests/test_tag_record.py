@@ -0,0 +1,48 @@
+import pytest
+
+from tag_record import TagRecord
+
+
+@pytest.mark.parametrize('tag', [
+    {'materialName': 'Mathe', 'imgName': 'math'},
+    {'materialName': 'Mathe', 'imgName': 'math', 'monday': '1',
+     'tuesday': '0', 'sunday': '1'},
+    {'materialName': 'Atlas', 'imgName': 'atlas', 'weight': 1200,
+     'comment': 'blue cover', 'color': 3},
+    {'materialName': 'Heft', 'imgName': 'book', 'weight': 'heavy'},
+    {'materialName': 'Heft', 'imgName': 'book', 'weight': -5},
+])
+def test_json_round_trip(tag):
+    assert TagRecord.from_json(tag).to_json() == tag
+
+
+def test_weekdays_are_packed_into_a_mask():
+    record = TagRecord.from_json({
+        'materialName': 'Mathe', 'imgName': 'math', 'monday': '1',
+        'wednesday': '0', 'friday': '1'})
+    assert record.weekdays == 0b10001
+    assert record.needed_weekdays() == (0, 4)
+    assert record.is_needed_on(0) and not record.is_needed_on(2)
+
+
+def test_weight_is_parsed_in_whole_grams():
+    assert TagRecord.from_json({'weight': '399.6'}).weight == 400
+    assert TagRecord.from_json({'weight': 0}).weight is None
+    assert TagRecord.from_json({'weight': None}).weight is None
+    assert TagRecord.from_json({}).weight is None
+
+
+def test_records_compare_by_value():
+    tag = {'materialName': 'Mathe', 'imgName': 'math', 'monday': '1'}
+    record = TagRecord.from_json(tag)
+    assert record == TagRecord.from_json(dict(tag))
+    assert hash(record) == hash(TagRecord.from_json(dict(tag)))
+    assert record != TagRecord.from_json(dict(tag, monday='0'))
+    assert record != TagRecord.from_json(dict(tag, weight=300))
+    assert record != tag
+
+
+def test_image_names_are_interned():
+    first = TagRecord.from_json({'imgName': ''.join(['ma', 'th'])})
+    second = TagRecord.from_json({'imgName': ''.join(['m', 'ath'])})
+    assert first.image_name is second.image_name
@@ -0,0 +1,42 @@
+import time
+
+from mock.rc522_simulator import SimulatedSpiBus, install
+
+# The driver binds the spidev and GPIO modules on import.
+install(SimulatedSpiBus())
+
+from tag_registration import TagRegistration  # noqa: E402
+
+
+def is_duplicate(tag_registration, reader, uid):
+    return tag_registration._TagRegistration__is_duplicate(reader, uid)
+
+
+def test_second_reader_within_period_is_duplicate():
+    tag_registration = TagRegistration(lambda uid: None, [object(), object()])
+    first, second = object(), object()
+    assert not is_duplicate(tag_registration, first, 'a')
+    assert is_duplicate(tag_registration, second, 'a')
+    assert not is_duplicate(tag_registration, first, 'a')
+
+
+def test_acceptances_older_than_the_period_are_forgotten():
+    tag_registration = TagRegistration(
+        lambda uid: None, [object()], deduplication_period=.05)
+    reader = object()
+    for index in range(500):
+        is_duplicate(tag_registration, reader, 'tag%d' % index)
+    assert tag_registration.statistics()['trackedTags'] == 500
+
+    time.sleep(.1)
+    assert not is_duplicate(tag_registration, reader, 'last')
+    assert tag_registration.statistics()['trackedTags'] == 1
+
+
+def test_zero_period_keeps_no_acceptances():
+    tag_registration = TagRegistration(
+        lambda uid: None, [object()], deduplication_period=0)
+    reader = object()
+    assert not is_duplicate(tag_registration, reader, 'a')
+    assert not is_duplicate(tag_registration, object(), 'a')
+    assert tag_registration.statistics()['trackedTags'] == 0
@@ -0,0 +1,58 @@
+from tag_record import TagRecord
+from tag_registry import TagRegistry
+
+
+def record(name, **values):
+    return TagRecord.from_json(dict(values, materialName=name, imgName=name))
+
+
+def observe(registry):
+    events = []
+    registry.bind(
+        on_tag_added=lambda instance, uid, tag: events.append(
+            ('added', uid, tag.material_name)),
+        on_tag_removed=lambda instance, uid, tag: events.append(
+            ('removed', uid, tag.material_name)),
+        on_tag_changed=lambda instance, uid, old_tag, new_tag: events.append(
+            ('changed', uid, old_tag.material_name, new_tag.material_name)),
+        on_tags_updated=lambda instance, added, removed, changed:
+        events.append(('updated', added, removed, changed)))
+    return events
+
+
+def test_update_dispatches_the_differences_per_tag():
+    registry = TagRegistry()
+    registry.update({'a1': record('Mathe'), 'b2': record('Atlas')})
+    events = observe(registry)
+
+    assert registry.update({'a1': record('Mathe', monday='1'),
+                            'c3': record('Heft')}) \
+        == (['c3'], ['b2'], ['a1'])
+    assert events == [
+        ('removed', 'b2', 'Atlas'), ('added', 'c3', 'Heft'),
+        ('changed', 'a1', 'Mathe', 'Mathe'),
+        ('updated', ['c3'], ['b2'], ['a1'])]
+    assert sorted(registry) == ['a1', 'c3']
+    assert registry['a1'].is_needed_on(0)
+    assert registry.get('b2') is None
+
+
+def test_unchanged_tags_dispatch_nothing():
+    registry = TagRegistry()
+    tags = {'a1': record('Mathe'), 'b2': record('Atlas')}
+    registry.update(tags)
+    events = observe(registry)
+
+    assert registry.update({uid: record(tag.material_name)
+                            for uid, tag in tags.items()}) == ([], [], [])
+    assert events == []
+    assert len(registry) == 2
+
+
+def test_registry_keeps_its_own_copy_of_the_tags():
+    registry = TagRegistry()
+    tags = {'a1': record('Mathe')}
+    registry.update(tags)
+    tags['b2'] = record('Atlas')
+    assert 'b2' not in registry
+    assert dict(registry.items()) == {'a1': record('Mathe')}
@@ -0,0 +1,54 @@
+from tag_record import TagRecord
+from tag_registry import TagRegistry
+from weekday_index import WeekdayIndex
+
+MONDAY, TUESDAY, FRIDAY = 0, 1, 4
+
+
+def record(**weekdays):
+    return TagRecord.from_json(dict(weekdays, materialName='', imgName=''))
+
+
+def test_index_is_built_from_the_registered_tags():
+    registry = TagRegistry()
+    registry.update({'a1': record(monday='1', friday='1'),
+                     'b2': record(monday='1'), 'c3': record()})
+    index = WeekdayIndex(registry)
+    assert index.tags_for(MONDAY) == {'a1', 'b2'}
+    assert index.tags_for(FRIDAY) == {'a1'}
+    assert index.tags_for(TUESDAY) == set()
+    assert index.is_needed_on('a1', FRIDAY)
+    assert not index.is_needed_on('c3', MONDAY)
+
+
+def test_index_follows_added_and_removed_tags():
+    registry = TagRegistry()
+    registry.update({'a1': record(monday='1')})
+    index = WeekdayIndex(registry)
+    monday_tags = index.tags_for(MONDAY)
+
+    registry.update({'b2': record(monday='1', tuesday='1')})
+    assert index.tags_for(MONDAY) == {'b2'}
+    assert index.tags_for(TUESDAY) == {'b2'}
+    assert index.tags_for(MONDAY) is monday_tags
+
+    registry.update({})
+    assert index.tags_for(MONDAY) == set()
+    assert index.tags_for(TUESDAY) == set()
+
+
+def test_changed_weekdays_move_the_tag():
+    registry = TagRegistry()
+    registry.update({'a1': record(monday='1', friday='1'),
+                     'b2': record(friday='1')})
+    index = WeekdayIndex(registry)
+
+    registry.update({'a1': record(monday='0', tuesday='1'),
+                     'b2': record(friday='1')})
+    assert index.tags_for(MONDAY) == set()
+    assert index.tags_for(TUESDAY) == {'a1'}
+    assert index.tags_for(FRIDAY) == {'b2'}
+
+    registry.update({'a1': record(monday='0', tuesday='1'), 'b2': record()})
+    assert index.tags_for(FRIDAY) == set()
+    assert not index.is_needed_on('b2', FRIDAY)
@@ -0,0 +1,186 @@
+import json
+
+import pytest
+
+import content_management
+from content_management import ContentManagement
+from service.events import Clock
+from service.weight_estimator import WeightEstimator
+from settings import Settings
+from tag_record import TagRecord
+from tag_registry import TagRegistry
+
+BAG_WEIGHT = 800
+
+
+def registry(**weights):
+    tag_registry = TagRegistry()
+    tag_registry.update({
+        uid: TagRecord(uid, 'default_image', weight=weight)
+        for uid, weight in weights.items()})
+    return tag_registry
+
+
+def test_matching_load_is_explained():
+    estimator = WeightEstimator(
+        registry(book=400, pencils=100), empty_weight=BAG_WEIGHT)
+    estimate = estimator.estimate(1310, ['book', 'pencils'])
+    assert estimate.expected == 1300
+    assert estimate.difference == 10
+    assert not estimate.missing and not estimate.superfluous
+    assert estimate.unexplained == 10
+    assert estimate.complete
+
+
+def test_surplus_is_explained_by_unpacked_tags():
+    estimator = WeightEstimator(
+        registry(book=400, atlas=1200, ruler=30, folder=250),
+        empty_weight=BAG_WEIGHT)
+    estimate = estimator.estimate(BAG_WEIGHT + 400 + 250, ['book'])
+    assert estimate.missing == ['folder']
+    assert estimate.superfluous == []
+    assert estimate.unexplained == 0
+
+
+def test_likely_missing_tags_are_preferred():
+    estimator = WeightEstimator(
+        registry(book=400, other_book=400), empty_weight=BAG_WEIGHT)
+    estimate = estimator.estimate(
+        BAG_WEIGHT + 400, [], likely_missing=['other_book'])
+    assert estimate.missing == ['other_book']
+
+
+def test_deficit_is_explained_by_packed_tags():
+    estimator = WeightEstimator(
+        registry(book=400, atlas=1200, folder=250), empty_weight=BAG_WEIGHT)
+    estimate = estimator.estimate(
+        BAG_WEIGHT + 400, ['book', 'atlas', 'folder'])
+    assert estimate.superfluous == ['atlas', 'folder']
+    assert estimate.missing == []
+    assert estimate.unexplained == 0
+
+
+def test_bag_weight_is_no_surplus():
+    tag_registry = registry(book=400, folder=250)
+    estimate = WeightEstimator(tag_registry).estimate(
+        BAG_WEIGHT + 400, ['book'])
+    assert estimate.difference == BAG_WEIGHT
+    assert estimate.missing == ['folder']
+
+    estimator = WeightEstimator(tag_registry)
+    estimator.empty_weight = BAG_WEIGHT
+    estimate = estimator.estimate(BAG_WEIGHT + 400, ['book'])
+    assert estimate.difference == 0
+    assert not estimate.missing
+
+
+def test_exhausted_time_budget_is_incomplete():
+    estimator = WeightEstimator(
+        registry(**{'tag%d' % index: 100 + index for index in range(50)}),
+        time_budget=-1)
+    estimate = estimator.estimate(1000, [])
+    assert not estimate.complete
+    assert estimate.missing == []
+    assert estimate.unexplained == 1000
+
+
+def test_unweighed_content_is_listed():
+    tag_registry = registry(book=400)
+    tag_registry.update(dict(
+        tag_registry.items(), pencils=TagRecord('pencils', 'default_image')))
+    estimate = WeightEstimator(tag_registry).estimate(
+        500, ['book', 'pencils', 'unknown'])
+    assert estimate.unweighed == ['pencils', 'unknown']
+    assert estimate.expected == 400
+
+
+@pytest.fixture
+def management(tmp_path, monkeypatch):
+    with open(str(tmp_path / 'data.json'), 'w') as settings_file:
+        json.dump({
+            'gender': 'female', 'birthday': '', 'height': 0, 'weight': 0,
+            'bagWeight': BAG_WEIGHT, 'lightingMode': 'off',
+            'animationType': 'constant', 'currentContent': ['book'],
+            'tags': {
+                'book': {'materialName': 'Buch', 'imgName': 'default_image',
+                         'weight': 400},
+                'atlas': {'materialName': 'Atlas', 'imgName': 'default_image',
+                          'weight': 1200}
+            }}, settings_file)
+    settings = Settings(profile_directory=str(tmp_path))
+    management = ContentManagement(settings, load_settle_time=0)
+    management.on_schoolbag_put_on()
+    popups = []
+    monkeypatch.setattr(content_management.Informer, 'show_popup',
+                        lambda title, text: popups.append(text))
+    yield management, settings, popups
+    management.__del__()
+    settings.settings_watcher.stop()
+
+
+def settle(management, *loads):
+    for load in loads:
+        management.check_load(load)
+    Clock.tick()
+
+
+def test_check_load_waits_until_the_load_settled(management):
+    management, settings, popups = management
+    management.check_load(BAG_WEIGHT)
+    management.check_load(BAG_WEIGHT + 1600)
+    assert management.load_estimate is None
+
+    Clock.tick()
+    assert management.load_estimate.measured == BAG_WEIGHT + 1600
+    assert len(popups) == 1
+
+
+def test_check_load_shows_the_matching_popup(management):
+    management, settings, popups = management
+    settle(management, BAG_WEIGHT + 400)
+    assert popups == []
+
+    settle(management, BAG_WEIGHT + 1600)
+    assert popups[-1].startswith('Nicht gescanntes Material')
+    assert 'Atlas' in popups[-1]
+
+    settle(management, BAG_WEIGHT)
+    assert popups[-1].startswith('Gescanntes Material fehlt')
+    assert 'Buch' in popups[-1]
+
+    settle(management, BAG_WEIGHT + 400 + 700)
+    assert popups[-1].startswith('Unbekanntes Material')
+    assert len(popups) == 3
+
+
+def test_check_load_follows_the_bag_weight_setting(management):
+    management, settings, popups = management
+    settings.bag_weight = 1000
+    settle(management, 1000 + 400)
+    assert popups == []
+    assert management.load_estimate.expected == 1400
+
+
+def test_put_down_load_reports_nothing(management):
+    management, settings, popups = management
+    management.check_load(BAG_WEIGHT + 400)
+    management.on_schoolbag_put_down()
+    management.check_load(0)
+    Clock.tick()
+    assert popups == []
+    assert management.load_estimate is None
+
+    management.on_schoolbag_put_on()
+    settle(management, BAG_WEIGHT + 400)
+    assert popups == []
+    assert management.load_estimate.measured == BAG_WEIGHT + 400
+
+
+def test_load_before_put_on_is_checked_once_put_on(management):
+    management, settings, popups = management
+    management.on_schoolbag_put_down()
+    management.check_load(BAG_WEIGHT + 1600)
+    management.on_schoolbag_put_on()
+    Clock.tick()
+    assert management.load_estimate.measured == BAG_WEIGHT + 1600
+    assert len(popups) == 1
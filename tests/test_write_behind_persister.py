@@ -0,0 +1,170 @@
+import os
+import stat
+import time
+
+from service import write_behind_persister
+from service.write_behind_persister import WriteBehindPersister, \
+    write_atomically
+
+
+def file_mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_write_atomically_replaces_the_content(tmp_path):
+    path = str(tmp_path / 'data.json')
+    write_atomically(path, b'old')
+    write_atomically(path, b'new')
+    with open(path, 'rb') as file:
+        assert file.read() == b'new'
+    assert os.listdir(str(tmp_path)) == ['data.json']
+
+
+def test_write_atomically_keeps_the_mode_of_the_replaced_file(tmp_path):
+    path = str(tmp_path / 'data.json')
+    with open(path, 'wb') as file:
+        file.write(b'old')
+    os.chmod(path, 0o644)
+    write_atomically(path, b'new')
+    assert file_mode(path) == 0o644
+
+    os.chmod(path, 0o640)
+    write_atomically(path, b'newer')
+    assert file_mode(path) == 0o640
+
+
+def test_write_atomically_creates_files_with_the_default_mode(tmp_path):
+    umask = os.umask(0o022)
+    os.umask(umask)
+    path = str(tmp_path / 'new.json')
+    write_atomically(path, b'{}')
+    assert file_mode(path) == 0o666 & ~umask
+
+
+def read(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def test_scheduled_content_is_written_instead_of_serializing(tmp_path):
+    path = str(tmp_path / 'data.json')
+    serialized = []
+    persister = WriteBehindPersister(
+        path, lambda: serialized.append(1) or b'serialized', quiet_period=10.)
+    persister.schedule(b'first')
+    persister.schedule(b'second')
+    assert persister.is_own_content(b'second')
+    assert persister.flush()
+    assert read(path) == b'second'
+    assert not serialized
+    assert persister.is_own_content(b'second')
+    assert not persister.is_own_content(b'first')
+
+
+def test_requests_without_content_are_serialized_on_writing(tmp_path):
+    path = str(tmp_path / 'data.json')
+    persister = WriteBehindPersister(path, lambda: b'serialized')
+    persister.schedule()
+    persister.close()
+    assert read(path) == b'serialized'
+
+
+def wait_for(condition, timeout=5.):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(.01)
+
+
+def test_a_burst_of_requests_results_in_one_write(tmp_path):
+    path = str(tmp_path / 'data.json')
+    persister = WriteBehindPersister(path, quiet_period=.05)
+    for index in range(20):
+        persister.schedule(b'%d' % index)
+    wait_for(lambda: persister.statistics()['writes'] == 1)
+    time.sleep(.1)
+    statistics = persister.statistics()
+    assert statistics['requests'] == 20
+    assert statistics['writes'] == 1
+    assert not statistics['pending']
+    assert read(path) == b'19'
+
+
+def test_continuous_requests_are_written_after_the_max_delay(tmp_path):
+    path = str(tmp_path / 'data.json')
+    persister = WriteBehindPersister(path, quiet_period=.1, max_delay=.2)
+    start = time.monotonic()
+    while persister.statistics()['writes'] == 0:
+        assert time.monotonic() - start < 2.
+        persister.schedule(b'content')
+        time.sleep(.02)
+    assert time.monotonic() - start < 1.
+
+
+def test_flush_writes_immediately_and_only_when_pending(tmp_path):
+    path = str(tmp_path / 'data.json')
+    persister = WriteBehindPersister(path, quiet_period=60.)
+    assert not persister.flush()
+    persister.schedule(b'content')
+    assert persister.flush()
+    assert read(path) == b'content'
+    assert not persister.flush()
+    assert persister.statistics()['writes'] == 1
+
+
+def test_a_failed_write_is_retried(tmp_path, monkeypatch):
+    path = str(tmp_path / 'data.json')
+    failures = [OSError(28, 'No space left on device')]
+
+    def failing_write_atomically(path, data):
+        if failures:
+            raise failures.pop()
+        write_atomically(path, data)
+    monkeypatch.setattr(write_behind_persister, 'write_atomically',
+                        failing_write_atomically)
+
+    persister = WriteBehindPersister(path, quiet_period=.02)
+    persister.schedule(b'first')
+    wait_for(lambda: persister.statistics()['writes'] == 1)
+    statistics = persister.statistics()
+    assert statistics['failures'] == 1
+    assert not statistics['pending']
+    assert read(path) == b'first'
+
+    persister.schedule(b'second')
+    wait_for(lambda: persister.statistics()['writes'] == 2)
+    assert read(path) == b'second'
+
+
+def test_a_newer_request_replaces_the_failed_content(tmp_path, monkeypatch):
+    path = str(tmp_path / 'data.json')
+    def failing_write_atomically(path, data):
+        raise OSError(5, 'Input/output error')
+    monkeypatch.setattr(write_behind_persister, 'write_atomically',
+                        failing_write_atomically)
+    persister = WriteBehindPersister(path, quiet_period=60.)
+    persister.schedule(b'failed')
+    assert not persister.flush()
+    assert persister.statistics()['pending']
+
+    monkeypatch.undo()
+    persister.schedule(b'newer')
+    assert persister.flush()
+    assert read(path) == b'newer'
+
+
+def test_close_stops_the_writing_thread_until_the_next_request(tmp_path):
+    path = str(tmp_path / 'data.json')
+    persister = WriteBehindPersister(path, quiet_period=.01)
+    persister.schedule(b'first')
+    persister.close()
+    assert read(path) == b'first'
+    assert persister._WriteBehindPersister__worker is None
+
+    persister.schedule(b'second')
+    deadline = time.monotonic() + 2.
+    while persister.statistics()['writes'] < 2 \
+            and time.monotonic() < deadline:
+        time.sleep(.01)
+    assert read(path) == b'second'
+    persister.close()
@@ -1,6 +1,5 @@
-from kivy.clock import Clock
-
 from led_stripe_controller import LedStripeController
+from service.events import Clock
 from settings import Settings
 
 
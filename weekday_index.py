@@ -0,0 +1,58 @@
+from tag_record import WEEKDAYS
+
+
+class WeekdayIndex:
+    """
+    Maps each weekday to the set of tags which are needed on that day.
+
+    The index follows the per tag events of the tag registry, so each change
+    of the registry costs time proportional to the number of changed tags.
+    """
+
+    def __init__(self, tag_registry):
+        """
+        Builds the index from the registered tags and subscribes to the
+        registry's changes.
+        :param tag_registry: The tag registry to follow.
+        """
+        self.__tags_by_weekday = [set() for _ in WEEKDAYS]
+        self.__weekdays_by_tag = {}
+
+        for uid, tag in tag_registry.items():
+            self.__add(uid, tag)
+
+        tag_registry.bind(
+            on_tag_added=self.__on_tag_added,
+            on_tag_removed=self.__on_tag_removed,
+            on_tag_changed=self.__on_tag_changed)
+
+    def tags_for(self, weekday: int):
+        """
+        :param weekday: The weekday index, 0 for monday.
+        :return: The set of unique ids of the tags needed on the weekday. The
+        set is owned by the index and must not be modified.
+        """
+        return self.__tags_by_weekday[weekday]
+
+    def is_needed_on(self, uid, weekday: int):
+        return uid in self.__tags_by_weekday[weekday]
+
+    def __add(self, uid, tag):
+        weekdays = tag.needed_weekdays()
+        for weekday in weekdays:
+            self.__tags_by_weekday[weekday].add(uid)
+        self.__weekdays_by_tag[uid] = weekdays
+
+    def __remove(self, uid):
+        for weekday in self.__weekdays_by_tag.pop(uid, ()):
+            self.__tags_by_weekday[weekday].discard(uid)
+
+    def __on_tag_added(self, registry, uid, tag):
+        self.__add(uid, tag)
+
+    def __on_tag_removed(self, registry, uid, tag):
+        self.__remove(uid)
+
+    def __on_tag_changed(self, registry, uid, old_tag, new_tag):
+        self.__remove(uid)
+        self.__add(uid, new_tag)
@@ -16,21 +16,40 @@ class WeightMeasurement:
     LEFT_SENSOR = 2
     RIGHT_SENSOR = 3
 
-    def __init__(self, settings, on_schoolbag_put_on, on_schoolbag_put_down, measurement_interval: float = 1 / 10.):
+    def __init__(self, settings, on_schoolbag_put_on, on_schoolbag_put_down, measurement_interval: float = 1 / 10.,
+                 on_load_changed=None, grams_per_unit: float = 10., load_threshold: float = 20.):
+        """
+        Attaches the arduino and starts measuring.
+        :param settings: The settings.
+        :param on_schoolbag_put_on: The method called when the bag is put on.
+        :param on_schoolbag_put_down: The method called when the bag is put down.
+        :param measurement_interval: The time in seconds between two measurements.
+        :param on_load_changed: The method called with the load in grams from the measurement thread whenever it
+        changed by at least the load threshold, or None.
+        :param grams_per_unit: The load in grams per sensor value unit, to be calibrated for the sensors.
+        :param load_threshold: The load change in grams to report.
+        """
+        self.__measure_thread = None
         self.__attach_arduino()
         if not self.__arduino.isValid():
             print('[WeightMeasurement] Arduino initialization failed')
             return
 
         self.__settings = settings
-        self.__measure_thread = None
         self.__stop_measurement_thread = Event()
         self.__measurement_interval = measurement_interval
         self.__on_schoolbag_put_on = on_schoolbag_put_on
         self.__on_schoolbag_put_down = on_schoolbag_put_down
+        self.__on_load_changed = on_load_changed
+        self.__grams_per_unit = grams_per_unit
+        self.__load_threshold = load_threshold
+        self.__reported_load = None
         self.__is_put_on = False
         self.__start_measure_thread()
 
+    def is_attached(self):
+        return self.__arduino.isValid()
+
     def __del__(self):
         self.__stop_measurement()
         self.__detach_arduino()
@@ -48,6 +67,7 @@ class WeightMeasurement:
 
     def __measure(self):
         self.__measure_sensor_values()
+        self.__report_load()
 
         if self.__compare_sensor_values(lambda v: v > 100) and not self.__is_put_on:
             self.__on_schoolbag_put_on()
@@ -88,5 +108,16 @@ class WeightMeasurement:
         self.__left_value = self.__arduino.analogRead(self.LEFT_SENSOR)
         self.__right_value = self.__arduino.analogRead(self.RIGHT_SENSOR)
 
+    def __report_load(self):
+        if self.__on_load_changed is None:
+            return
+
+        load = (self.__left_value + self.__right_value) * self.__grams_per_unit
+        if self.__reported_load is not None and abs(load - self.__reported_load) < self.__load_threshold:
+            return
+
+        self.__reported_load = load
+        self.__on_load_changed(load)
+
     def __compare_sensor_values(self, compare):
         return compare(self.__left_value) and compare(self.__right_value)